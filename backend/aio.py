@@ -0,0 +1,163 @@
+"""Async access to the (blocking) stores for the request handlers."""
+
+import functools
+from contextlib import asynccontextmanager
+from itertools import islice
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+import anyio
+import anyio.to_thread
+
+from .profiling import profiled
+from .storage import Plan, Store
+
+T = TypeVar("T")
+
+# Worker threads shared by all store calls. Requests beyond this wait on the
+# event loop rather than each parking a thread on a lock.
+DEFAULT_STORE_THREADS = 8
+
+
+class AsyncRWLock:
+    """Many readers or one writer, for tasks of a single event loop.
+
+    A waiting writer holds back new readers, so a steady stream of reads
+    cannot starve writes.
+    """
+
+    def __init__(self) -> None:
+        self._condition = anyio.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @asynccontextmanager
+    async def reading(self) -> AsyncIterator[None]:
+        async with self._condition:
+            while self._writing or self._writers_waiting:
+                await self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with anyio.CancelScope(shield=True):
+                async with self._condition:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._condition.notify_all()
+
+    @asynccontextmanager
+    async def writing(self) -> AsyncIterator[None]:
+        async with self._condition:
+            self._writers_waiting += 1
+            try:
+                while self._writing or self._readers:
+                    await self._condition.wait()
+            finally:
+                self._writers_waiting -= 1
+                # A cancelled writer may have been the one holding readers back.
+                self._condition.notify_all()
+            self._writing = True
+        try:
+            yield
+        finally:
+            with anyio.CancelScope(shield=True):
+                async with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
+
+
+class AsyncStore:
+    """Awaitable wrapper around a :class:`Store`.
+
+    Every call runs in a worker thread drawn from ``limiter``, under an
+    :class:`AsyncRWLock`: reads (and appends, which only add rows and are
+    coalesced by the store itself) share it, while updates, deletes and
+    bulk rewrites take it exclusively. The store's file lock then only
+    arbitrates between processes.
+    """
+
+    def __init__(self, store: Store, limiter: Optional[anyio.CapacityLimiter] = None):
+        self.store = store
+        self.limiter = limiter or anyio.CapacityLimiter(DEFAULT_STORE_THREADS)
+        self.rwlock = AsyncRWLock()
+
+    async def run(self, func: Callable[..., T], *args: object) -> T:
+        """Run ``func(*args)`` in a worker thread under the shared lock."""
+        async with self.rwlock.reading():
+            return await self._offload(func, *args)
+
+    async def run_exclusive(self, func: Callable[..., T], *args: object) -> T:
+        """Run ``func(*args)`` in a worker thread under the exclusive lock."""
+        async with self.rwlock.writing():
+            return await self._offload(func, *args)
+
+    async def get(self, row_id: str) -> Optional[Dict[str, str]]:
+        return await self.run(self.store.get, row_id)
+
+    async def select(self, *args: object, **kwargs: object) -> List[Dict[str, str]]:
+        return await self.run(functools.partial(self.store.select, *args, **kwargs))
+
+    async def count(self, where: Optional[Dict[str, str]] = None) -> int:
+        return await self.run(self.store.count, where)
+
+    async def version(self) -> Tuple[str, float]:
+        return await self.run(self.store.version)
+
+    async def append(self, row: Dict[str, str]) -> None:
+        await self.run(self.store.append, row)
+
+    async def append_many(self, rows: Sequence[Dict[str, str]]) -> None:
+        await self.run(self.store.append_many, rows)
+
+    async def upsert_many(self, rows: Iterable[Dict[str, str]]) -> Tuple[int, int]:
+        return await self.run_exclusive(self.store.upsert_many, rows)
+
+    async def replace_all(self, rows: Iterable[Dict[str, str]]) -> None:
+        await self.run_exclusive(self.store.replace_all, rows)
+
+    async def update(self, row_id: str, new_row: Dict[str, str]) -> bool:
+        return await self.run_exclusive(self.store.update, row_id, new_row)
+
+    async def apply(self, plan: Plan) -> None:
+        await self.run_exclusive(self.store.apply, plan)
+
+    async def delete(self, row_id: str) -> bool:
+        return await self.run_exclusive(self.store.delete, row_id)
+
+    async def iter_batches(
+        self,
+        where: Optional[Dict[str, str]] = None,
+        batch_size: int = 500,
+        since: Optional[Sequence[str]] = None,
+    ) -> AsyncIterator[List[Dict[str, str]]]:
+        """Yield :meth:`Store.iter_rows` a batch at a time, for streamed responses.
+
+        Each batch is read in a worker thread under the shared lock, which is
+        released in between, so a slow client holds neither a thread nor the
+        lock while it reads.
+        """
+        rows = self.store.iter_rows(where, batch_size=batch_size, since=since)
+        while True:
+            batch = await self.run(_take, rows, batch_size)
+            if not batch:
+                return
+            yield batch
+
+    async def _offload(self, func: Callable[..., T], *args: object) -> T:
+        return await anyio.to_thread.run_sync(profiled(func), *args, limiter=self.limiter)
+
+
+def _take(rows: Iterator[Dict[str, str]], count: int) -> List[Dict[str, str]]:
+    return list(islice(rows, count))
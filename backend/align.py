@@ -0,0 +1,157 @@
+"""Word-level alignment, mirroring ``alignTexts`` in ``frontend/src/lib/align.ts``.
+
+The output (diff tokens, counts, tie-breaking between equal-cost moves) must
+match the browser implementation exactly; ``backend/tests/test_align.py`` pins
+both to the shared fixtures in ``frontend/src/lib/align.fixtures.json``.
+
+The DP is first filled only in a band around the main diagonal, wide enough
+to reach the bottom-right corner. A cell ``k`` diagonals off the main one
+costs at least ``k``, so when the distance found fits in the band every cell
+it depends on was filled exactly, and the cells left out could only have lost
+the tie-breaks: the alignment is the full table's. Otherwise the band is
+widened to the distance found, an upper bound of the real one, and filled
+again.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .text import tokenize
+
+GOOD_THRESHOLD = 0.9
+# Below this many distinct pairs a batch is cheaper to score in-process than
+# to ship to worker processes.
+PARALLEL_MIN_PAIRS = 512
+PARALLEL_CHUNK_SIZE = 128
+# Edits beyond the length difference that the first, banded pass of the DP
+# allows for before it is redone in a band as wide as the distance it found.
+ALIGN_BAND = 8
+
+_DIAG, _UP, _LEFT = 0, 1, 2
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+@dataclass
+class AlignmentResult:
+    diff: List[Dict[str, Optional[str]]] = field(default_factory=list)
+    words_total: int = 0
+    words_correct: int = 0
+    accuracy: float = 0.0
+    reference_tokens: List[str] = field(default_factory=list)
+    hypothesis_tokens: List[str] = field(default_factory=list)
+
+    @property
+    def score(self) -> int:
+        return 1 if self.accuracy >= GOOD_THRESHOLD else 0
+
+
+def align_texts(reference: str, hypothesis: str) -> AlignmentResult:
+    ref_tokens = tokenize(reference)
+    hyp_tokens = tokenize(hypothesis)
+    band = abs(len(ref_tokens) - len(hyp_tokens)) + ALIGN_BAND
+    distance, backtrack = _fill(ref_tokens, hyp_tokens, band)
+    if distance > band:
+        # The best alignment may leave the band, but it costs no more than
+        # the one found in it: a band that wide is sure to hold it.
+        _, backtrack = _fill(ref_tokens, hyp_tokens, distance)
+
+    diff: List[Dict[str, Optional[str]]] = []
+    i = len(ref_tokens)
+    j = len(hyp_tokens)
+    matches = 0
+    while i > 0 or j > 0:
+        move = backtrack[i][j]
+        if i > 0 and j > 0 and move == _DIAG:
+            if ref_tokens[i - 1] == hyp_tokens[j - 1]:
+                diff.append({"op": "match", "ref": ref_tokens[i - 1], "hyp": hyp_tokens[j - 1]})
+                matches += 1
+            else:
+                diff.append({"op": "sub", "ref": ref_tokens[i - 1], "hyp": hyp_tokens[j - 1]})
+            i -= 1
+            j -= 1
+        elif i > 0 and (j == 0 or move == _UP):
+            diff.append({"op": "del", "ref": ref_tokens[i - 1], "hyp": None})
+            i -= 1
+        elif j > 0:
+            diff.append({"op": "ins", "ref": None, "hyp": hyp_tokens[j - 1]})
+            j -= 1
+
+    diff.reverse()
+    total = len(ref_tokens) or 1
+    return AlignmentResult(
+        diff=diff,
+        words_total=len(ref_tokens),
+        words_correct=matches,
+        accuracy=matches / total,
+        reference_tokens=ref_tokens,
+        hypothesis_tokens=hyp_tokens,
+    )
+
+
+def _fill(
+    ref_tokens: List[str], hyp_tokens: List[str], band: int
+) -> Tuple[int, List[bytearray]]:
+    """Fill the cells within ``band`` of the main diagonal; ``(distance, backtrack)``.
+
+    Cells off the band keep a cost higher than any real one.
+    """
+    rows = len(ref_tokens) + 1
+    cols = len(hyp_tokens) + 1
+    unreachable = rows + cols
+
+    # Only the previous cost row is needed to fill the next one; the
+    # backtrack matrix is kept as compact bytearrays.
+    previous = [j if j <= band else unreachable for j in range(cols)]
+    backtrack = [bytearray(cols) for _ in range(rows)]
+    for j in range(1, cols):
+        backtrack[0][j] = _LEFT
+
+    for i in range(1, rows):
+        ref_token = ref_tokens[i - 1]
+        current = [unreachable] * cols
+        if i <= band:
+            current[0] = i
+        moves = backtrack[i]
+        moves[0] = _UP
+        for j in range(max(1, i - band), min(cols, i + band + 1)):
+            cost = previous[j - 1] + (0 if ref_token == hyp_tokens[j - 1] else 1)
+            choice = _DIAG
+            cost_del = previous[j] + 1
+            if cost_del < cost:
+                cost = cost_del
+                choice = _UP
+            cost_ins = current[j - 1] + 1
+            if cost_ins < cost:
+                cost = cost_ins
+                choice = _LEFT
+            current[j] = cost
+            moves[j] = choice
+        previous = current
+    return previous[-1], backtrack
+
+
+def align_many(pairs: Sequence[Tuple[str, str]]) -> List[AlignmentResult]:
+    """Align a batch of ``(reference, hypothesis)`` pairs.
+
+    Duplicate pairs are aligned once, and large batches are spread over a
+    process pool.
+    """
+    unique = list(dict.fromkeys(pairs))
+    if len(unique) >= PARALLEL_MIN_PAIRS:
+        references, hypotheses = zip(*unique)
+        results = list(
+            _get_pool().map(align_texts, references, hypotheses, chunksize=PARALLEL_CHUNK_SIZE)
+        )
+    else:
+        results = [align_texts(reference, hypothesis) for reference, hypothesis in unique]
+    by_pair = dict(zip(unique, results))
+    return [by_pair[pair] for pair in pairs]
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor()
+    return _pool
@@ -0,0 +1,131 @@
+"""Word-level error index over stored attempt diffs, for ``/api/analytics/words``."""
+
+import heapq
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import compress
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from .columnar import CODE, DIFF, OPS, Columns
+
+MISSED_OPS = ("sub", "del")
+# The attempt fields read, for Columns.from_rows.
+COLUMNS = {"sentence_id": CODE, "target_lang": CODE, "diff_json": DIFF}
+
+_MISSED_CODES = frozenset(OPS.index(op) for op in MISSED_OPS)
+_SUB_CODE = OPS.index("sub")
+# Maps op codes to 1 when missed, 0 otherwise (bytes.translate).
+_MISSED_TABLE = bytes(code in _MISSED_CODES for code in range(256))
+
+
+@dataclass
+class WordErrors:
+    seen: int = 0
+    misses: int = 0
+    substitutions: Dict[str, int] = field(default_factory=dict)
+    sentence_ids: Set[str] = field(default_factory=set)
+
+    def summary(self, word: str, max_substitutions: int) -> Dict[str, object]:
+        top = heapq.nsmallest(
+            max_substitutions, self.substitutions.items(), key=lambda item: (-item[1], item[0])
+        )
+        return {
+            "word": word,
+            "misses": self.misses,
+            "seen": self.seen,
+            "miss_rate": self.misses / self.seen if self.seen else 0.0,
+            "substitutions": [{"hyp": hyp, "count": count} for hyp, count in top],
+            "sentence_ids": sorted(self.sentence_ids),
+        }
+
+
+class WordErrorIndex:
+    """Per target language: reference word -> how often it was missed.
+
+    A word counts as seen for every diff token that carries it as ``ref`` and
+    as missed when that token is a ``sub`` or ``del``; substitutions record
+    what was heard instead and ``sentence_ids`` where it was missed. Each
+    row's ``diff_json`` is decoded once, into a column block, and blocks are
+    tallied a token column at a time.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._languages: Dict[str, Dict[str, WordErrors]] = {}
+
+    def rebuild(self, rows: Iterable[Dict[str, str]]) -> None:
+        self.rebuild_columns([Columns.from_rows(rows, COLUMNS)])
+
+    def add(self, rows: Iterable[Dict[str, str]]) -> None:
+        self.add_columns(Columns.from_rows(rows, COLUMNS))
+
+    def rebuild_columns(self, blocks: Iterable[Columns]) -> None:
+        with self._lock:
+            self._languages = {}
+            for columns in blocks:
+                self._add(columns)
+
+    def add_columns(self, columns: Columns) -> None:
+        with self._lock:
+            self._add(columns)
+
+    def most_missed(
+        self,
+        target_lang: str,
+        limit: int = 50,
+        word: Optional[str] = None,
+        max_substitutions: int = 5,
+    ) -> List[Dict[str, object]]:
+        """Most-missed words first (ties by word), or just ``word`` when given."""
+        with self._lock:
+            words = self._languages.get(target_lang, {})
+            if word is not None:
+                found = words.get(word)
+                return [found.summary(word, max_substitutions)] if found else []
+            missed = (item for item in words.items() if item[1].misses)
+            top = heapq.nsmallest(limit, missed, key=lambda item: (-item[1].misses, item[0]))
+            return [errors.summary(key, max_substitutions) for key, errors in top]
+
+    def _add(self, columns: Columns) -> None:
+        tokens = columns.tokens("diff_json")
+        languages = columns.codes("target_lang")
+        sentences = columns.codes("sentence_id")
+        for language, value in enumerate(languages.values):
+            rows: Sequence[int] = tokens.rows
+            ops, refs, hyps = tokens.ops, tokens.refs, tokens.hyps
+            if len(languages.values) == 1:
+                tally = tokens.tally
+            else:
+                # Blocks from a shard hold one language; others are split.
+                keep = [code == language for code in map(languages.codes.__getitem__, rows)]
+                rows, ops, refs, hyps = (
+                    list(compress(items, keep)) for items in (rows, ops, refs, hyps)
+                )
+                tally = [(*key, count) for key, count in Counter(zip(ops, refs, hyps)).items()]
+            if not tally:
+                continue
+            words = self._languages.setdefault(value or "fr-FR", {})
+            found: Dict[int, WordErrors] = {}
+            for op, ref, hyp, count in tally:
+                if not ref:
+                    continue
+                errors = found.get(ref)
+                if errors is None:
+                    word = tokens.words[ref]
+                    errors = words.get(word)
+                    if errors is None:
+                        errors = words[word] = WordErrors()
+                    found[ref] = errors
+                errors.seen += count
+                if op not in _MISSED_CODES:
+                    continue
+                errors.misses += count
+                if op == _SUB_CODE and hyp:
+                    heard = tokens.words[hyp]
+                    errors.substitutions[heard] = errors.substitutions.get(heard, 0) + count
+            missed = bytes(ops).translate(_MISSED_TABLE)
+            sentence_codes = map(sentences.codes.__getitem__, compress(rows, missed))
+            for ref, sentence in set(zip(compress(refs, missed), sentence_codes)):
+                if ref:
+                    found[ref].sentence_ids.add(sentences.values[sentence])
@@ -1,32 +1,97 @@
 from __future__ import annotations
 
+import base64
+import binascii
 import csv
 import io
 import json
+import os
+import threading
 import uuid
 from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from itertools import islice, takewhile
 from pathlib import Path
-from typing import List, Optional
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
-from fastapi import Depends, FastAPI, File, HTTPException, Query, UploadFile
+import anyio
+import anyio.to_thread
+from fastapi import (
+    Body,
+    Depends,
+    FastAPI,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
+from .aio import DEFAULT_STORE_THREADS, AsyncStore
+from .align import align_many
+from .analytics import WordErrorIndex
+from .changelog import ChangeLog
+from .columnar import CODE, DIFF, FLOAT, INT, TIME, Columns
 from .csv_store import CSVStore
+from .duplicates import DuplicateIndex
+from .feed import Feed
+from .importer import MAX_REPORTED_ERRORS, CSVImportError, ImportReport, iter_sentences
+from .indexes import HashIndex, RowIndex, TagIndex, TextIndex
+from .metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware
 from .models import (
     Attempt,
     AttemptCreate,
-    DiffToken,
+    BulkOperation,
+    BulkReport,
+    BulkResult,
+    DuplicateCluster,
+    PracticeItem,
+    RescoreRequest,
+    RescoreResult,
     Sentence,
     SentenceCreate,
     SentenceUpdate,
+    StatsReport,
+    WordStat,
     now_iso,
 )
+from .profiling import PROFILE_DIR_ENV, PROFILE_ENV, SlowRequestProfiler, profiled
+from .responses import (
+    AttemptRecord,
+    attempts_response,
+    sentences_response,
+    sse_event,
+    sync_response,
+)
+from .scheduler import ReviewScheduler
+from .sharded_store import ShardedStore
+from .sqlite_store import SQLiteStore
+from .stats import AttemptStats
+from .storage import Store
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 SENTENCES_CSV = DATA_DIR / "sentences.csv"
 ATTEMPTS_CSV = DATA_DIR / "attempts.csv"
+ATTEMPTS_DIR = DATA_DIR / "attempts"
+SENTENCE_CHANGES_CSV = DATA_DIR / "sentences.changes.csv"
 
 SENTENCE_FIELDS = [
     "id",
@@ -53,6 +118,116 @@ ATTEMPT_FIELDS = [
     "duration_ms",
     "created_at",
 ]
+# How attempt fields are decoded into column blocks and snapshots, for the
+# in-memory views (see backend.columnar).
+ATTEMPT_COLUMNS = {
+    "sentence_id": CODE,
+    "target_lang": CODE,
+    "asr_lang": CODE,
+    "score": FLOAT,
+    "words_total": INT,
+    "words_correct": INT,
+    "duration_ms": INT,
+    "created_at": TIME,
+    "diff_json": DIFF,
+}
+
+STORAGE_ENV = "ECOUTE_STORAGE_BACKEND"
+DATA_DIR_ENV = "ECOUTE_DATA_DIR"
+SQLITE_PATH = DATA_DIR / "ecoute.sqlite3"
+
+ORDER_FIELDS = ["created_at", "id"]
+PAGINATION_HEADERS = ["X-Next-Cursor", "X-Total-Count"]
+CACHE_HEADERS = ["ETag", "Last-Modified"]
+DUPLICATE_HEADER = "X-Duplicate-Of"
+GZIP_MIN_SIZE = 1024
+ATTEMPT_STREAM_PATH = "/api/attempts/stream"
+# Comment lines sent on idle streams, so that proxies keep them open.
+STREAM_HEARTBEAT_SECONDS = 15.0
+# How long EventSource clients wait before reconnecting (with Last-Event-ID).
+STREAM_RETRY_MS = 3000
+STREAM_REPLAY_PAGE = 500
+# Imported sentences validated, screened and written at a time.
+IMPORT_BATCH_SIZE = 500
+# Writes through any worker are seen at once (shared generation counter);
+# hand edits of the CSV files within this many seconds.
+STAT_INTERVAL = 1.0
+
+T = TypeVar("T")
+# What create/import do with a sentence duplicating one in the bank: keep it,
+# keep it but report it, or leave it out.
+DuplicatePolicy = Literal["allow", "flag", "skip"]
+
+
+def sentence_indexes() -> List[RowIndex]:
+    return [
+        HashIndex("difficulty", default="medium"),
+        HashIndex("target_lang", default="fr-FR"),
+        HashIndex("translation_lang", default="zh-CN"),
+        TagIndex("tags"),
+        TextIndex(["sentence_text", "translation_text"]),
+    ]
+
+
+def attempt_indexes() -> List[RowIndex]:
+    return [
+        HashIndex("sentence_id"),
+        HashIndex("target_lang", default="fr-FR"),
+    ]
+
+
+def open_stores(backend: str = "csv", data_dir: Optional[Path] = None) -> Tuple[Store, Store]:
+    """Open the (sentences, attempts) stores on the ``csv`` or ``sqlite`` engine.
+
+    ``data_dir`` replaces the directory holding the files (``data/``). On CSV,
+    attempts are sharded by language and month under ``attempts/``, split out
+    of ``attempts.csv`` the first time.
+    """
+    paths = (SENTENCES_CSV, ATTEMPTS_CSV, ATTEMPTS_DIR, SQLITE_PATH)
+    if data_dir is not None:
+        paths = tuple(data_dir / path.name for path in paths)
+    sentences_csv, attempts_csv, attempts_dir, sqlite_path = paths
+    if backend == "sqlite":
+        return (
+            SQLiteStore(
+                sqlite_path,
+                "sentences",
+                SENTENCE_FIELDS,
+                order_by=ORDER_FIELDS,
+                indexes=sentence_indexes(),
+            ),
+            SQLiteStore(
+                sqlite_path,
+                "attempts",
+                ATTEMPT_FIELDS,
+                order_by=ORDER_FIELDS,
+                indexes=attempt_indexes(),
+            ),
+        )
+    if backend != "csv":
+        raise ValueError(f"Unknown storage backend: {backend!r}")
+    return (
+        CSVStore(
+            sentences_csv,
+            SENTENCE_FIELDS,
+            journal=True,
+            order_by=ORDER_FIELDS,
+            indexes=sentence_indexes(),
+            stat_interval=STAT_INTERVAL,
+        ),
+        ShardedStore(
+            attempts_dir,
+            ATTEMPT_FIELDS,
+            partition_field="target_lang",
+            partition_default="fr-FR",
+            order_by=ORDER_FIELDS,
+            group_commit_window=0.002,
+            indexes=attempt_indexes,
+            stat_interval=STAT_INTERVAL,
+            legacy=attempts_csv,
+            columns=ATTEMPT_COLUMNS,
+        ),
+    )
 
 
 def create_app() -> FastAPI:
@@ -63,51 +238,158 @@ def create_app() -> FastAPI:
         allow_origins=["*"],
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=PAGINATION_HEADERS + CACHE_HEADERS + [DUPLICATE_HEADER],
+    )
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE)
+
+    data_dir = Path(os.environ.get(DATA_DIR_ENV) or DATA_DIR)
+    slow_ms = os.environ.get(PROFILE_ENV)
+    if slow_ms:
+        app.add_middleware(
+            SlowRequestProfiler,
+            threshold_ms=float(slow_ms),
+            directory=Path(os.environ.get(PROFILE_DIR_ENV) or data_dir / "profiles"),
+            exclude=[ATTEMPT_STREAM_PATH],
+        )
+    # Outermost, so that latencies include compression (and profiling).
+    app.add_middleware(MetricsMiddleware)
+
+    sentence_store, attempt_store = open_stores(os.environ.get(STORAGE_ENV, "csv"), data_dir)
+    sentence_changes = ChangeLog(
+        data_dir / SENTENCE_CHANGES_CSV.name, "target_lang", partition_default="fr-FR"
     )
+    # In-memory views over the attempt history. The store reports every
+    # appended attempt, whichever worker process wrote it, and asks for a
+    # full pass (at startup, or after other changes) with ``None``.
+    attempt_stats = AttemptStats()
+    word_errors = WordErrorIndex()
+    scheduler = ReviewScheduler()
+
+    def record_attempts(rows: Optional[List[dict]]) -> None:
+        views = (attempt_stats, word_errors, scheduler)
+        if rows is not None:
+            columns = Columns.from_rows(rows, ATTEMPT_COLUMNS)
+            for view in views:
+                view.add_columns(columns)
+            return
+        # Sealed months come straight from their memory-mapped snapshots.
+        history = list(attempt_store.iter_columns(ATTEMPT_COLUMNS))
+        for view in views:
+            view.rebuild_columns(history)
+
+    def refreshed(func: Callable[..., T], *args: object) -> T:
+        # Catch up with attempts written by other workers before reading a view.
+        attempt_store.refresh()
+        return func(*args)
+
+    attempt_store.subscribe(record_attempts)
+    attempt_store.refresh()
+
+    # The duplicate index over the sentence bank is fed the same way, but
+    # only (re)built when a duplicate check needs it.
+    duplicate_index = DuplicateIndex()
+    sentences_changed = threading.Event()
+    sentences_changed.set()
+
+    def record_sentences(rows: Optional[List[dict]]) -> None:
+        if rows is None:
+            sentences_changed.set()
+        elif not sentences_changed.is_set():
+            duplicate_index.add(rows)
+
+    def current_duplicates() -> DuplicateIndex:
+        sentence_store.refresh()
+        if sentences_changed.is_set():
+            sentences_changed.clear()
+            duplicate_index.rebuild(sentence_store.iter_rows())
+        return duplicate_index
+
+    def duplicates_of(row: dict) -> List[str]:
+        return [row_id for row_id, _ in current_duplicates().matches(row)]
+
+    sentence_store.subscribe(record_sentences)
+    sentence_changes.watch(sentence_store)
+    sentence_store.refresh()
 
-    sentence_store = CSVStore(SENTENCES_CSV, SENTENCE_FIELDS)
-    attempt_store = CSVStore(ATTEMPTS_CSV, ATTEMPT_FIELDS)
+    # New attempts, pushed to the live streams of this process.
+    attempt_feed = Feed(["target_lang", "sentence_id"], name="attempts")
 
-    def get_sentence_store() -> CSVStore:
-        return sentence_store
+    limiter = anyio.CapacityLimiter(DEFAULT_STORE_THREADS)
+    sentences = AsyncStore(sentence_store, limiter)
+    attempts = AsyncStore(attempt_store, limiter)
 
-    def get_attempt_store() -> CSVStore:
-        return attempt_store
+    # Async so that FastAPI resolves them on the event loop, not in a thread.
+    async def get_sentence_store() -> AsyncStore:
+        return sentences
+
+    async def get_attempt_store() -> AsyncStore:
+        return attempts
 
     # Sentences -------------------------------------------------------------
 
     @app.get("/api/sentences", response_model=List[Sentence])
-    def list_sentences(
+    async def list_sentences(
+        request: Request,
         limit: int = Query(100, ge=1, le=500),
         offset: int = Query(0, ge=0),
         difficulty: Optional[str] = Query(None),
         search: Optional[str] = Query(None),
         target_lang: Optional[str] = Query(None),
         translation_lang: Optional[str] = Query(None),
-        store: CSVStore = Depends(get_sentence_store),
-    ) -> List[Sentence]:
-        rows = store.read_all()
-        filtered: List[Sentence] = []
-        for row in rows:
-            sentence = sentence_from_row(row)
-            if difficulty and sentence.difficulty != difficulty:
-                continue
-            if target_lang and sentence.target_lang != target_lang:
-                continue
-            if translation_lang and sentence.translation_lang != translation_lang:
-                continue
-            if search:
-                haystack = (
-                    f"{sentence.sentence_text} {sentence.translation_text or ''}".lower()
-                )
-                if search.lower() not in haystack:
+        tag: Optional[str] = Query(None),
+        cursor: Optional[str] = Query(None),
+        total: bool = Query(False),
+        store: AsyncStore = Depends(get_sentence_store),
+    ) -> Response:
+        filters = {
+            "difficulty": difficulty,
+            "target_lang": target_lang,
+            "translation_lang": translation_lang,
+            "tag": tag,
+            "search": (search or "").strip(),
+        }
+        where = {name: value for name, value in filters.items() if value}
+        validators = cache_validators(await store.version())
+        if is_not_modified(request, validators):
+            return Response(status_code=304, headers=validators)
+        after = decode_cursor(cursor)
+        rows, count = await store.run(select_page, store.store, where, offset, limit, after, total)
+        response = sentences_response(rows)
+        response.headers.update(validators)
+        set_pagination_headers(response, rows, limit, count)
+        return response
+
+    @app.get("/api/sentences/duplicates", response_model=List[DuplicateCluster])
+    async def list_duplicates(
+        target_lang: Optional[str] = Query(None),
+        near: bool = Query(True),
+        store: AsyncStore = Depends(get_sentence_store),
+    ) -> List[DuplicateCluster]:
+        def find() -> List[DuplicateCluster]:
+            found = []
+            for cluster in current_duplicates().clusters(target_lang, near=near):
+                rows = [row for row in map(store.store.get, cluster.ids) if row]
+                if len(rows) < 2:
                     continue
-            filtered.append(sentence)
-        return filtered[offset : offset + limit]
+                rows.sort(key=lambda row: (row.get("created_at") or "", row["id"]))
+                found.append(
+                    DuplicateCluster(
+                        target_lang=cluster.partition,
+                        exact=cluster.exact,
+                        similarity=round(cluster.similarity, 3),
+                        sentences=[sentence_from_row(row) for row in rows],
+                    )
+                )
+            return found
+
+        return await store.run(find)
 
     @app.post("/api/sentences", response_model=Sentence, status_code=201)
-    def create_sentence(
-        payload: SentenceCreate, store: CSVStore = Depends(get_sentence_store)
+    async def create_sentence(
+        payload: SentenceCreate,
+        response: Response,
+        duplicates: DuplicatePolicy = Query("flag"),
+        store: AsyncStore = Depends(get_sentence_store),
     ) -> Sentence:
         sentence = Sentence(
             id=str(uuid.uuid4()),
@@ -115,124 +397,505 @@ def create_app() -> FastAPI:
             updated_at=now_iso(),
             **payload.model_dump(),
         )
-        store.append(sentence_to_row(sentence))
+        row = sentence_to_row(sentence)
+        if duplicates == "allow":
+            await store.append(row)
+            return sentence
+
+        def check_and_append() -> List[str]:
+            found = duplicates_of(row)
+            if not found or duplicates == "flag":
+                store.store.append(row)
+            return found
+
+        # Exclusive when skipping, so that two copies sent at once cannot both get in.
+        run = store.run_exclusive if duplicates == "skip" else store.run
+        found = await run(check_and_append)
+        if found and duplicates == "skip":
+            raise HTTPException(
+                status_code=409, detail={"error": "Duplicate sentence", "duplicate_of": found}
+            )
+        if found:
+            response.headers[DUPLICATE_HEADER] = ",".join(found)
         return sentence
 
     @app.put("/api/sentences/{sentence_id}", response_model=Sentence)
-    def update_sentence(
+    async def update_sentence(
         sentence_id: str,
         payload: SentenceUpdate,
-        store: CSVStore = Depends(get_sentence_store),
+        store: AsyncStore = Depends(get_sentence_store),
     ) -> Sentence:
-        existing_row = store.get(sentence_id)
-        if not existing_row:
+        def read_modify_write() -> Optional[Sentence]:
+            existing_row = store.store.get(sentence_id)
+            if not existing_row:
+                return None
+            updated_data = sentence_from_row(existing_row).model_dump()
+            for key, value in payload.model_dump(exclude_unset=True).items():
+                updated_data[key] = value
+            updated_data["updated_at"] = now_iso()
+            updated = Sentence(**updated_data)
+            if not store.store.update(sentence_id, sentence_to_row(updated)):
+                raise HTTPException(status_code=500, detail="Failed to update sentence")
+            return updated
+
+        # Exclusive, so that concurrent edits of a sentence cannot lose updates.
+        updated = await store.run_exclusive(read_modify_write)
+        if updated is None:
             raise HTTPException(status_code=404, detail="Sentence not found")
-        sentence = sentence_from_row(existing_row)
-        updated_data = sentence.model_dump()
-        for key, value in payload.model_dump(exclude_unset=True).items():
-            updated_data[key] = value
-        updated_data["updated_at"] = now_iso()
-        updated = Sentence(**updated_data)
-        if not store.update(sentence_id, sentence_to_row(updated)):
-            raise HTTPException(status_code=500, detail="Failed to update sentence")
         return updated
 
     @app.delete("/api/sentences/{sentence_id}", status_code=204)
-    def delete_sentence(sentence_id: str, store: CSVStore = Depends(get_sentence_store)):
-        if not store.delete(sentence_id):
+    async def delete_sentence(
+        sentence_id: str, store: AsyncStore = Depends(get_sentence_store)
+    ):
+        if not await store.delete(sentence_id):
             raise HTTPException(status_code=404, detail="Sentence not found")
 
+    @app.post("/api/sentences/bulk", response_model=BulkReport)
+    async def bulk_sentences(
+        payload: List[BulkOperation] = Body(..., max_length=1000),
+        store: AsyncStore = Depends(get_sentence_store),
+    ) -> BulkReport:
+        report = BulkReport(applied=False, results=[])
+
+        def plan() -> Tuple[List[dict], List[str]]:
+            puts, deletes, report.results = plan_bulk(store.store, payload)
+            if any(result.error for result in report.results):
+                # All or nothing: report what failed and write nothing.
+                raise HTTPException(status_code=422, detail=report.model_dump())
+            # Net effect on the bank: a sentence updated then deleted counts once.
+            stored = {row["id"] for row in puts if store.store.get(row["id"]) is not None}
+            report.created = len(puts) - len(stored)
+            report.updated = len(stored)
+            report.deleted = sum(store.store.get(row_id) is not None for row_id in deletes)
+            return puts, deletes
+
+        await store.apply(plan)
+        report.applied = True
+        return report
+
     @app.get("/api/export/sentences")
-    def export_sentences(store: CSVStore = Depends(get_sentence_store)):
-        rows = store.read_all()
-        stream = io.StringIO()
-        writer = csv.DictWriter(stream, fieldnames=SENTENCE_FIELDS)
-        writer.writeheader()
-        writer.writerows(rows)
-        stream.seek(0)
-        filename = f"sentences_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
-        return StreamingResponse(
-            iter([stream.read()]),
-            media_type="text/csv",
-            headers=headers,
-        )
+    async def export_sentences(
+        request: Request, store: AsyncStore = Depends(get_sentence_store)
+    ):
+        validators = cache_validators(await store.version())
+        if is_not_modified(request, validators):
+            return Response(status_code=304, headers=validators)
+        response = csv_download("sentences", SENTENCE_FIELDS, store.iter_batches())
+        response.headers.update(validators)
+        return response
 
     @app.post("/api/import/sentences")
     async def import_sentences(
         file: UploadFile = File(...),
-        store: CSVStore = Depends(get_sentence_store),
+        mode: Literal["replace", "upsert", "append"] = Query("replace"),
+        duplicates: DuplicatePolicy = Query("flag"),
+        store: AsyncStore = Depends(get_sentence_store),
     ):
-        raw = await file.read()
+        report = ImportReport()
+        flagged: List[dict] = []
+        sentences = iter_sentences(
+            file.file,
+            report,
+            existing=store.store.get if mode != "replace" else None,
+            fresh_ids=mode == "append",
+        )
+        # A replaced bank is only checked against itself.
+        bank = duplicates_of if mode != "replace" else None
+        imported = DuplicateIndex()
+
+        def parse_batches() -> Iterator[List[dict]]:
+            while True:
+                batch = islice(sentences, IMPORT_BATCH_SIZE)
+                rows = [sentence_to_row(sentence) for sentence in batch]
+                if not rows:
+                    return
+                if duplicates != "allow":
+                    rows = screen_duplicates(rows, bank, duplicates == "skip", flagged, imported)
+                yield rows
+
+        batches = parse_batches()
+        created = updated = 0
         try:
-            text = raw.decode("utf-8")
-        except UnicodeDecodeError as exc:
-            raise HTTPException(status_code=400, detail="File must be UTF-8 encoded") from exc
-        reader = csv.DictReader(io.StringIO(text))
-        if reader.fieldnames is None:
-            raise HTTPException(status_code=400, detail="CSV missing header row")
-        required = {"sentence_text", "target_lang"}
-        missing = required - set(reader.fieldnames)
-        if missing:
-            raise HTTPException(
-                status_code=400,
-                detail=f"CSV missing required columns: {', '.join(sorted(missing))}",
-            )
-        imported_rows = []
-        count = 0
-        for raw_row in reader:
-            row = {field: (raw_row.get(field) or "").strip() for field in reader.fieldnames}
-            if not row["sentence_text"]:
-                continue
-            sentence = Sentence(
-                id=row.get("id") or str(uuid.uuid4()),
-                sentence_text=row["sentence_text"],
-                target_lang=row.get("target_lang") or "fr-FR",
-                translation_text=row.get("translation_text") or None,
-                translation_lang=row.get("translation_lang") or "zh-CN",
-                difficulty=row.get("difficulty") or "medium",
-                tags=row.get("tags") or "",
-                created_at=row.get("created_at") or now_iso(),
-                updated_at=row.get("updated_at") or now_iso(),
-            )
-            imported_rows.append(sentence_to_row(sentence))
-            count += 1
-        if not imported_rows:
-            raise HTTPException(status_code=400, detail="No valid sentences found in CSV")
-        store.replace_all(imported_rows)
-        return {"imported": count}
+            if mode == "replace":
+                # Streamed into the new table (or file) as they are parsed, so
+                # readers wait for the parse too; a bad upload leaves the bank
+                # as it was.
+                def replacement() -> Iterator[dict]:
+                    nonlocal created
+                    for rows in batches:
+                        created += len(rows)
+                        yield from rows
+
+                await store.replace_all(replacement())
+            else:
+                # A batch at a time, parsed before taking the store lock. An
+                # unusable upload is rejected before the first write.
+                while True:
+                    rows = await run_in_threadpool(next, batches, None)
+                    if rows is None:
+                        break
+                    if not rows:
+                        continue
+                    if mode == "upsert":
+                        batch_created, batch_updated = await store.upsert_many(rows)
+                        created += batch_created
+                        updated += batch_updated
+                    else:
+                        await store.append_many(rows)
+                        created += len(rows)
+        except CSVImportError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return {
+            "imported": report.valid,
+            "created": created,
+            "updated": updated,
+            "skipped": report.error_count + (len(flagged) if duplicates == "skip" else 0),
+            "errors": report.errors,
+            "duplicates": len(flagged),
+            "duplicate_rows": flagged[:MAX_REPORTED_ERRORS],
+        }
+
+    # Practice --------------------------------------------------------------
+
+    @app.get("/api/practice/next", response_model=List[PracticeItem])
+    async def next_practice(
+        target_lang: str = Query("fr-FR"),
+        n: int = Query(10, ge=1, le=100),
+        store: AsyncStore = Depends(get_sentence_store),
+    ) -> List[PracticeItem]:
+        where = {"target_lang": target_lang}
+        rows = {}
+
+        def is_live(sentence_id: str) -> bool:
+            row = store.store.get(sentence_id)
+            if row and (row.get("target_lang") or "fr-FR") == target_lang:
+                rows[sentence_id] = row
+                return True
+            return False
+
+        def new_ids() -> Iterator[str]:
+            for row in store.store.iter_rows(where, batch_size=max(n, 100)):
+                rows[row["id"]] = row
+                yield row["id"]
+
+        items = []
+        due = await store.run(refreshed, scheduler.next_due, target_lang, n, is_live, new_ids())
+        for sentence_id, card in due:
+            item = PracticeItem(sentence=sentence_from_row(rows[sentence_id]), new=card is None)
+            if card is not None:
+                item.due_at = datetime.fromtimestamp(card.due).isoformat(timespec="seconds")
+                item.interval_days = card.interval_days
+                item.repetitions = card.repetitions
+            items.append(item)
+        return items
 
     # Attempts --------------------------------------------------------------
 
     @app.get("/api/attempts", response_model=List[Attempt])
-    def list_attempts(
+    async def list_attempts(
         sentence_id: Optional[str] = Query(None),
         target_lang: Optional[str] = Query(None),
-        store: CSVStore = Depends(get_attempt_store),
-    ) -> List[Attempt]:
-        rows = store.read_all()
-        attempts = [attempt_from_row(row) for row in rows]
-        if sentence_id:
-            attempts = [attempt for attempt in attempts if attempt.sentence_id == sentence_id]
-        if target_lang:
-            attempts = [attempt for attempt in attempts if attempt.target_lang == target_lang]
-        return attempts
+        limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = Query(None),
+        order: Literal["asc", "desc"] = Query("asc"),
+        total: bool = Query(False),
+        parse_diff: bool = Query(False, description="Re-parse stored diffs into tokens"),
+        store: AsyncStore = Depends(get_attempt_store),
+    ) -> Response:
+        filters = {"sentence_id": sentence_id, "target_lang": target_lang}
+        where = {name: value for name, value in filters.items() if value}
+        after = decode_cursor(cursor)
+        rows, count = await store.run(
+            select_page, store.store, where, 0, limit, after, total, order == "desc"
+        )
+        response = attempts_response(rows, parse_diff=parse_diff)
+        set_pagination_headers(response, rows, limit, count)
+        return response
 
     @app.post("/api/attempts", response_model=Attempt, status_code=201)
-    def create_attempt(
-        payload: AttemptCreate, store: CSVStore = Depends(get_attempt_store)
+    async def create_attempt(
+        payload: AttemptCreate, store: AsyncStore = Depends(get_attempt_store)
     ) -> Attempt:
         attempt = Attempt(
             id=str(uuid.uuid4()),
             created_at=now_iso(),
             **payload.model_dump(),
         )
-        store.append(attempt_to_row(attempt))
+        row = attempt_to_row(attempt)
+        await store.append(row)
+        attempt_feed.publish([row])
         return attempt
 
+    @app.post("/api/attempts/batch", response_model=List[Attempt], status_code=201)
+    async def create_attempts(
+        payload: List[AttemptCreate] = Body(..., max_length=1000),
+        store: AsyncStore = Depends(get_attempt_store),
+    ) -> List[Attempt]:
+        attempts = [
+            Attempt(id=str(uuid.uuid4()), created_at=now_iso(), **item.model_dump())
+            for item in payload
+        ]
+        rows = [attempt_to_row(item) for item in attempts]
+        await store.append_many(rows)
+        attempt_feed.publish(rows)
+        return attempts
+
+    @app.get(ATTEMPT_STREAM_PATH)
+    async def stream_attempts(
+        sentence_id: Optional[str] = Query(None),
+        target_lang: Optional[str] = Query(None),
+        cursor: Optional[str] = Query(None, description="Resume after this event id"),
+        last_event_id: Optional[str] = Header(None),
+        store: AsyncStore = Depends(get_attempt_store),
+    ) -> StreamingResponse:
+        """New attempts as Server-Sent Events (``attempt``), each with its cursor as id.
+
+        A client reconnecting with ``Last-Event-ID`` (or ``cursor``) first gets
+        the attempts it missed, read from the store. One that falls more than
+        a queue's worth of attempts behind is disconnected, and catches up the
+        same way when it reconnects.
+        """
+        filters = {"sentence_id": sentence_id, "target_lang": target_lang}
+        where = {name: value for name, value in filters.items() if value}
+        after = decode_cursor(last_event_id or cursor)
+
+        def event(row: dict) -> bytes:
+            return sse_event(encode_cursor(row), "attempt", AttemptRecord(row).to_json())
+
+        async def events() -> AsyncIterator[bytes]:
+            position = after
+            # Subscribed before the replay, so no attempt falls in between, but
+            # only once the body is sent: a response that never is leaks nothing.
+            subscription = attempt_feed.subscribe(where)
+            try:
+                yield f"retry: {STREAM_RETRY_MS}\n\n".encode("ascii")
+                while position is not None:
+                    rows = await store.select(where, limit=STREAM_REPLAY_PAGE, after=position)
+                    for row in rows:
+                        yield event(row)
+                    if rows:
+                        position = cursor_values(rows[-1])
+                    if len(rows) < STREAM_REPLAY_PAGE:
+                        break
+                while not subscription.overflowed:
+                    rows = await subscription.next(STREAM_HEARTBEAT_SECONDS)
+                    if position is not None:
+                        # Attempts published once written, possibly after the replay read them.
+                        rows = [row for row in rows if cursor_values(row) > position]
+                    if not rows and not subscription.overflowed:
+                        yield b": keep-alive\n\n"
+                    for row in rows:
+                        yield event(row)
+            finally:
+                attempt_feed.unsubscribe(subscription)
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @app.get("/api/export/attempts")
+    async def export_attempts(
+        sentence_id: Optional[str] = Query(None),
+        target_lang: Optional[str] = Query(None),
+        date_from: Optional[str] = Query(None, description="Inclusive ISO date/datetime prefix"),
+        date_to: Optional[str] = Query(None, description="Inclusive ISO date/datetime prefix"),
+        store: AsyncStore = Depends(get_attempt_store),
+    ):
+        filters = {"sentence_id": sentence_id, "target_lang": target_lang}
+        where = {name: value for name, value in filters.items() if value}
+        # Rows are ordered by created_at, so the range is a starting point
+        # for the scan plus a stop condition rather than a filter.
+        batches = store.iter_batches(where, since=[date_from] if date_from else None)
+        if date_to:
+            batches = batches_until(
+                batches, lambda row: row["created_at"][: len(date_to)] <= date_to
+            )
+        return csv_download("attempts", ATTEMPT_FIELDS, batches)
+
+    @app.get("/api/stats", response_model=StatsReport)
+    async def get_stats(
+        group_by: Literal["sentence", "target_lang", "difficulty", "day"] = Query("sentence"),
+        store: AsyncStore = Depends(get_sentence_store),
+    ) -> StatsReport:
+        def difficulty_of(sentence_id: str) -> Optional[str]:
+            row = store.store.get(sentence_id)
+            return (row.get("difficulty") or "medium") if row else None
+
+        report = await store.run(refreshed, attempt_stats.report, group_by, difficulty_of)
+        return StatsReport(**report)
+
+    @app.get("/api/analytics/words", response_model=List[WordStat])
+    async def most_missed_words(
+        target_lang: str = Query("fr-FR"),
+        limit: int = Query(50, ge=1, le=500),
+        word: Optional[str] = Query(None),
+        store: AsyncStore = Depends(get_attempt_store),
+    ) -> List[WordStat]:
+        stats = await store.run(refreshed, word_errors.most_missed, target_lang, limit, word)
+        return [WordStat(**stat) for stat in stats]
+
+    @app.post("/api/attempts/rescore", response_model=List[RescoreResult])
+    async def rescore_attempts(payload: RescoreRequest) -> List[RescoreResult]:
+        pairs = [(item.reference, item.asr_text) for item in payload.items]
+        # Reads no store: only needs one of the shared worker threads.
+        results = await anyio.to_thread.run_sync(profiled(align_many), pairs, limiter=limiter)
+        return [
+            RescoreResult(
+                score=result.score,
+                accuracy=result.accuracy,
+                words_total=result.words_total,
+                words_correct=result.words_correct,
+                diff_json=result.diff,
+            )
+            for result in results
+        ]
+
+    # Sync ------------------------------------------------------------------
+
+    @app.get("/api/sync/sentences")
+    async def sync_sentences(
+        since: int = Query(0, ge=0),
+        epoch: Optional[str] = Query(None),
+        target_lang: Optional[str] = Query(None),
+        store: AsyncStore = Depends(get_sentence_store),
+    ) -> Response:
+        # ``since``/``epoch`` come from the client's previous response; the
+        # whole bank is sent again (``reset``) when they cannot be honoured.
+        delta = await store.run(
+            sentence_changes.changes, store.store, since, epoch, target_lang or None
+        )
+        return sync_response(delta)
+
+    # Monitoring ------------------------------------------------------------
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics() -> Response:
+        # Values are per worker process.
+        return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
     return app
 
 
+def csv_download(
+    name: str, fieldnames: List[str], batches: AsyncIterator[List[dict]]
+) -> StreamingResponse:
+    filename = f"{name}_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(
+        iter_csv_chunks(fieldnames, batches),
+        media_type="text/csv",
+        headers=headers,
+    )
+
+
+async def iter_csv_chunks(
+    fieldnames: List[str], batches: AsyncIterator[List[dict]]
+) -> AsyncIterator[str]:
+    """Encode rows as CSV text, yielding a chunk per batch of rows."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+    writer.writeheader()
+    async for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+async def batches_until(
+    batches: AsyncIterator[List[dict]], keep: Callable[[dict], bool]
+) -> AsyncIterator[List[dict]]:
+    """The rows of ``batches`` up to the first one failing ``keep``."""
+    async for batch in batches:
+        kept = list(takewhile(keep, batch))
+        if kept:
+            yield kept
+        if len(kept) < len(batch):
+            return
+
+
+def cache_validators(version: Tuple[str, float]) -> Dict[str, str]:
+    """ETag/Last-Modified for a response built from rows at ``Store.version()``.
+
+    The ETag is weak so that it stays valid for the gzip-encoded variant.
+    """
+    token, modified = version
+    return {
+        "ETag": f'W/"{token}"',
+        "Last-Modified": formatdate(modified, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+
+
+def is_not_modified(request: Request, validators: Dict[str, str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison: W/"x" and "x" name the same version.
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or validators["ETag"].removeprefix("W/") in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since:
+        return False
+    try:
+        return parsedate_to_datetime(validators["Last-Modified"]) <= parsedate_to_datetime(
+            if_modified_since
+        )
+    except (TypeError, ValueError):
+        return False
+
+
+def cursor_values(row: dict) -> List[str]:
+    return [row.get(field) or "" for field in ORDER_FIELDS]
+
+
+def encode_cursor(row: dict) -> str:
+    payload = json.dumps(cursor_values(row)).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[List[str]]:
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+    if (
+        not isinstance(values, list)
+        or len(values) != len(ORDER_FIELDS)
+        or not all(isinstance(value, str) for value in values)
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def select_page(
+    store: Store,
+    where: Dict[str, str],
+    offset: int,
+    limit: int,
+    after: Optional[List[str]],
+    total: bool,
+    descending: bool = False,
+) -> Tuple[List[dict], Optional[int]]:
+    """One page of rows plus, when ``total`` is set, the number of matches."""
+    rows = store.select(where, offset=offset, limit=limit, after=after, descending=descending)
+    return rows, store.count(where) if total else None
+
+
+def set_pagination_headers(
+    response: Response, rows: List[dict], limit: int, total: Optional[int]
+) -> None:
+    if rows and len(rows) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1])
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+
+
 def sentence_from_row(row: dict) -> Sentence:
     data = {
         "id": row.get("id") or str(uuid.uuid4()),
@@ -248,6 +911,115 @@ def sentence_from_row(row: dict) -> Sentence:
     return Sentence(**data)
 
 
+def screen_duplicates(
+    rows: List[dict],
+    bank: Optional[Callable[[dict], List[str]]],
+    skip: bool,
+    flagged: List[dict],
+    imported: Optional[DuplicateIndex] = None,
+) -> List[dict]:
+    """Check imported rows against the bank (``bank(row)`` lists its copies) and each other.
+
+    Each duplicate is appended to ``flagged`` as ``{id, duplicate_of}``, and
+    left out of the returned rows when ``skip`` is set. ``imported`` collects
+    the rows kept, to check the next batch of the same import against them.
+    """
+    if imported is None:
+        imported = DuplicateIndex()
+    kept = []
+    for row in rows:
+        found = bank(row) if bank is not None else []
+        found += [row_id for row_id, _ in imported.matches(row) if row_id not in found]
+        if found:
+            flagged.append({"id": row["id"], "duplicate_of": found})
+            if skip:
+                continue
+        imported.add([row])
+        kept.append(row)
+    return kept
+
+
+def plan_bulk(
+    store: Store, operations: List[BulkOperation]
+) -> Tuple[List[dict], List[str], List[BulkResult]]:
+    """Resolve bulk operations in order into ``(puts, deletes, results)``.
+
+    Each operation sees the sentences created, edited or deleted by the ones
+    before it; ``where`` filters are matched against the stored rows, so they
+    skip sentences created in the same batch. Failed operations carry an
+    ``error`` and change nothing.
+    """
+    pending: Dict[str, Optional[dict]] = {}  # None for a deletion.
+
+    def current(row_id: str) -> Optional[dict]:
+        return pending[row_id] if row_id in pending else store.get(row_id)
+
+    results = []
+    for index, operation in enumerate(operations):
+        result = BulkResult(index=index, op=operation.op)
+        results.append(result)
+        try:
+            result.ids = resolve_bulk_operation(store, operation, current, pending)
+        except ValueError as exc:
+            result.error = str(exc)
+    puts = [row for row in pending.values() if row is not None]
+    deletes = [row_id for row_id, row in pending.items() if row is None]
+    return puts, deletes, results
+
+
+def resolve_bulk_operation(
+    store: Store,
+    operation: BulkOperation,
+    current: Callable[[str], Optional[dict]],
+    pending: Dict[str, Optional[dict]],
+) -> List[str]:
+    now = now_iso()
+    if operation.op == "create":
+        if operation.sentence is None or operation.where is not None:
+            raise ValueError("create needs a sentence and no where")
+        sentence = Sentence(
+            id=operation.id or str(uuid.uuid4()),
+            created_at=now,
+            updated_at=now,
+            **operation.sentence.model_dump(),
+        )
+        if current(sentence.id) is not None:
+            raise ValueError("Sentence already exists")
+        pending[sentence.id] = sentence_to_row(sentence)
+        return [sentence.id]
+    if operation.op == "update" and operation.changes is None:
+        raise ValueError("update needs changes")
+    if (operation.id is None) == (operation.where is None):
+        raise ValueError(f"{operation.op} needs either an id or a where filter")
+    if operation.id is not None:
+        if current(operation.id) is None:
+            raise ValueError("Sentence not found")
+        targets = [operation.id]
+    else:
+        filters = operation.where.model_dump()
+        filters["search"] = (filters["search"] or "").strip()
+        where = {name: value for name, value in filters.items() if value}
+        if not where:
+            raise ValueError("where needs at least one filter")
+        targets = [
+            row["id"] for row in store.select(where) if current(row["id"]) is not None
+        ]
+    updates = {}
+    for row_id in targets:
+        if operation.op == "delete":
+            updates[row_id] = None
+            continue
+        data = sentence_from_row(current(row_id)).model_dump()
+        data.update(operation.changes.model_dump(exclude_unset=True))
+        data["updated_at"] = now
+        try:
+            updates[row_id] = sentence_to_row(Sentence(**data))
+        except ValidationError as exc:
+            raise ValueError(f"{row_id}: {exc.errors()[0]['msg']}") from None
+    pending.update(updates)
+    return targets
+
+
 def sentence_to_row(sentence: Sentence) -> dict:
     data = sentence.model_dump()
     return {
@@ -263,28 +1035,6 @@ def sentence_to_row(sentence: Sentence) -> dict:
     }
 
 
-def attempt_from_row(row: dict) -> Attempt:
-    diff_raw = row.get("diff_json") or "[]"
-    try:
-        diff = [DiffToken(**item) for item in json.loads(diff_raw)]
-    except json.JSONDecodeError:
-        diff = []
-    data = {
-        "id": row.get("id") or str(uuid.uuid4()),
-        "sentence_id": row.get("sentence_id") or "",
-        "target_lang": row.get("target_lang") or "fr-FR",
-        "asr_lang": row.get("asr_lang") or row.get("target_lang") or "fr-FR",
-        "asr_text": row.get("asr_text") or "",
-        "score": float(row.get("score") or 0),
-        "words_total": int(row.get("words_total") or 0),
-        "words_correct": int(row.get("words_correct") or 0),
-        "diff_json": diff,
-        "duration_ms": int(row.get("duration_ms") or 0),
-        "created_at": row.get("created_at") or now_iso(),
-    }
-    return Attempt(**data)
-
-
 def attempt_to_row(attempt: Attempt) -> dict:
     data = attempt.model_dump()
     diff_entries = []
@@ -302,7 +1052,9 @@ def attempt_to_row(attempt: Attempt) -> dict:
         "score": f"{data['score']}",
         "words_total": str(data["words_total"]),
         "words_correct": str(data["words_correct"]),
-        "diff_json": json.dumps(diff_entries),
+        # Listings splice this into their JSON as is (see backend.responses):
+        # it is encoded strictly here, on the way in, and not re-read there.
+        "diff_json": json.dumps(diff_entries, allow_nan=False),
         "duration_ms": str(data["duration_ms"]),
         "created_at": data["created_at"],
     }
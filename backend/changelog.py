@@ -0,0 +1,270 @@
+"""Versioned log of the changes made to a store, for delta sync.
+
+Every sentence that is created, edited or deleted gets a ``put`` or ``del``
+record with the next version number, so a client holding a copy of the bank
+as of version ``n`` only needs the rows changed after ``n``.
+
+The log is kept next to the store rather than by it: the engines have no
+change feed finer than their :meth:`~backend.storage.Store.subscribe`
+listeners, so the log is derived from what they report, which catches every
+writer, including imports, scripts and other worker processes. Rows appended
+to a :meth:`ChangeLog.watch`-ed store are logged from the listener's rows
+alone; any other change (reported as ``None``) costs one pass comparing every
+row with the state the log describes (a digest per row), at the next sync
+after it.
+"""
+
+import csv
+import hashlib
+import io
+import os
+import threading
+import uuid
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from filelock import FileLock
+
+from .storage import Store
+
+PUT = "put"
+DELETE = "del"
+EPOCH = "epoch"
+FIELDS = ["version", "op", "id", "partition", "digest"]
+# Rewrite the log once it holds this many records per live (id, partition).
+COMPACT_RATIO = 2
+COMPACT_SLACK = 1000
+
+Record = Tuple[int, str, str]  # (version, op, digest)
+
+
+@dataclass
+class Delta:
+    epoch: str
+    version: int
+    reset: bool
+    upserts: List[Dict[str, str]] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+
+
+class ChangeLog:
+    """Append-only CSV log of ``(version, op, id, partition, digest)`` records.
+
+    ``partition`` is the row's ``partition_field`` value (the sentence's
+    language): a row moving from one value to another is logged as a ``del``
+    under the old one and a ``put`` under the new one, so clients filtering on
+    it see it leave. The first record names the log's epoch, a random id
+    that changes only if the log is lost and started over; a client that
+    synced against another epoch gets everything again (``reset``).
+
+    Records are appended under a file lock after reading what other
+    processes appended, so every change is logged once. Only the latest
+    record per ``(id, partition)`` matters, and the log is rewritten with
+    just those once it grows past ``COMPACT_RATIO`` times their number.
+    """
+
+    def __init__(self, path: Path, partition_field: str, partition_default: str = ""):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.partition_field = partition_field
+        self.partition_default = partition_default
+        self.lock = FileLock(str(self.path) + ".lock")
+        self._thread_lock = threading.Lock()
+        self.epoch = ""
+        self.version = 0
+        self._records: Dict[Tuple[str, str], Record] = {}
+        # (version, id, partition) in version order; superseded ones are skipped.
+        self._order: List[Tuple[int, str, str]] = []
+        # id -> (partition, digest) of the rows the log says are live.
+        self._state: Dict[str, Tuple[str, str]] = {}
+        self._lines = 0
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._store_token: Optional[str] = None
+        # Fed by the store's listener once watched: rows appended since the
+        # last sync, or None when only a full pass can tell what changed.
+        self._watched = False
+        self._appended: Optional[List[Dict[str, str]]] = None
+        self._appended_lock = threading.Lock()
+
+    def watch(self, store: Store) -> None:
+        """Follow ``store``'s listener, so that appends alone are logged without a full pass."""
+        store.subscribe(self._observe)
+        self._watched = True
+
+    def _observe(self, rows: Optional[List[Dict[str, str]]]) -> None:
+        with self._appended_lock:
+            if rows is None or self._appended is None:
+                self._appended = None
+            else:
+                self._appended.extend(rows)
+
+    def changes(
+        self,
+        store: Store,
+        since: int = 0,
+        epoch: Optional[str] = None,
+        partition: Optional[str] = None,
+    ) -> Delta:
+        """The rows changed after version ``since`` (all rows when it cannot tell)."""
+        self.sync(store)
+        with self._thread_lock:
+            current_epoch, version = self.epoch, self.version
+            reset = not since or (epoch or current_epoch) != current_epoch or since > version
+            latest: Dict[str, Tuple[int, str]] = {}
+            if not reset:
+                start = bisect_right(self._order, (since, "\U0010ffff", ""))
+                for record_version, row_id, value in self._order[start:]:
+                    record = self._records.get((row_id, value))
+                    if record is None or record[0] != record_version:
+                        continue
+                    if partition is not None and value != partition:
+                        continue
+                    if record_version > latest.get(row_id, (0, ""))[0]:
+                        latest[row_id] = (record_version, record[1])
+        where = {self.partition_field: partition} if partition is not None else None
+        if reset:
+            return Delta(current_epoch, version, True, list(store.iter_rows(where)))
+        delta = Delta(current_epoch, version, False)
+        for row_id, (_, op) in latest.items():
+            row = store.get(row_id) if op == PUT else None
+            if row is not None and (partition is None or self._partition(row) == partition):
+                delta.upserts.append(row)
+            else:
+                delta.deleted.append(row_id)
+        return delta
+
+    def sync(self, store: Store) -> None:
+        """Log whatever changed in ``store`` since the last look."""
+        token = store.version()[0]
+        if token == self._store_token:
+            return
+        with self._thread_lock, self.lock:
+            with self._appended_lock:
+                appended = self._appended if self._watched else None
+                self._appended = []
+            try:
+                self._catch_up_locked()
+                rows = store.iter_rows() if appended is None else appended
+                current = {
+                    row[store.id_field]: (self._partition(row), _digest(store.fieldnames, row))
+                    for row in rows
+                    if row.get(store.id_field)
+                }
+                changes: List[Tuple[str, str, str, str]] = []
+                for row_id, (value, digest) in current.items():
+                    known = self._state.get(row_id)
+                    if known == (value, digest):
+                        continue
+                    if known is not None and known[0] != value:
+                        changes.append((DELETE, row_id, known[0], ""))
+                    changes.append((PUT, row_id, value, digest))
+                if appended is None:
+                    for row_id, (value, _) in self._state.items():
+                        if row_id not in current:
+                            changes.append((DELETE, row_id, value, ""))
+                if changes:
+                    self._append_locked(changes)
+            except BaseException:
+                self._observe(None)
+                raise
+            self._store_token = token
+            if self._lines > COMPACT_RATIO * len(self._records) + COMPACT_SLACK:
+                self._compact_locked()
+
+    def _partition(self, row: Dict[str, str]) -> str:
+        return row.get(self.partition_field) or self.partition_default
+
+    def _catch_up_locked(self) -> None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._reset_state()
+            self._write_locked([(0, EPOCH, uuid.uuid4().hex, "", "")])
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            # Compacted (or replaced) by another process: read it all again.
+            self._reset_state()
+            self._inode = stat.st_ino
+        if stat.st_size == self._offset:
+            return
+        with self.path.open("rb") as fp:
+            fp.seek(self._offset)
+            raw = fp.read()
+        # Only complete lines; a torn last record is overwritten by the next append.
+        complete = raw[: raw.rfind(b"\n") + 1]
+        reader = csv.reader(io.StringIO(complete.decode("utf-8"), newline=""))
+        if not self._offset:
+            next(reader, None)
+        for values in reader:
+            if len(values) == len(FIELDS):
+                version, op, row_id, value, digest = values
+                self._apply(int(version), op, row_id, value, digest)
+        self._offset += len(complete)
+
+    def _apply(self, version: int, op: str, row_id: str, value: str, digest: str) -> None:
+        self._lines += 1
+        self.version = max(self.version, version)
+        if op == EPOCH:
+            self.epoch = row_id
+            return
+        self._records[(row_id, value)] = (version, op, digest)
+        self._order.append((version, row_id, value))
+        if op == PUT:
+            self._state[row_id] = (value, digest)
+        elif row_id in self._state and self._state[row_id][0] == value:
+            del self._state[row_id]
+
+    def _append_locked(self, changes: List[Tuple[str, str, str, str]]) -> None:
+        with self.path.open("r+b") as fp:
+            fp.truncate(self._offset)
+        records = [
+            (self.version + number, op, row_id, value, digest)
+            for number, (op, row_id, value, digest) in enumerate(changes, 1)
+        ]
+        self._write_locked(records, append=True)
+
+    def _compact_locked(self) -> None:
+        live = sorted(
+            (record[0], record[1], row_id, value, record[2])
+            for (row_id, value), record in self._records.items()
+        )
+        epoch, version = self.epoch, self.version
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with tmp_path.open("w", newline="", encoding="utf-8") as fp:
+            writer = csv.writer(fp)
+            writer.writerow(FIELDS)
+            # The epoch record keeps the latest version, so numbering carries on.
+            writer.writerow([version, EPOCH, epoch, "", ""])
+            for record_version, op, row_id, value, digest in live:
+                writer.writerow([record_version, op, row_id, value, digest])
+        os.replace(tmp_path, self.path)
+        self._reset_state()
+        self._catch_up_locked()
+
+    def _write_locked(self, records: List[Tuple[int, str, str, str, str]], append=False) -> None:
+        with self.path.open("a" if append else "w", newline="", encoding="utf-8") as fp:
+            writer = csv.writer(fp)
+            if not append:
+                writer.writerow(FIELDS)
+            writer.writerows(records)
+            fp.flush()
+            os.fsync(fp.fileno())
+        self._catch_up_locked()
+
+    def _reset_state(self) -> None:
+        self.epoch = ""
+        self.version = 0
+        self._records = {}
+        self._order = []
+        self._state = {}
+        self._lines = 0
+        self._offset = 0
+        self._inode = None
+
+
+def _digest(fieldnames: List[str], row: Dict[str, str]) -> str:
+    data = "\x1f".join(row.get(name) or "" for name in fieldnames).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
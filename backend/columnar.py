@@ -0,0 +1,392 @@
+"""Column-wise copies of store rows, in memory or as memory-mapped snapshots.
+
+A :class:`Columns` block holds every field of a batch of rows as text and,
+for the fields given a kind, a decoded form the in-memory views can consume
+without building a dict per row or parsing anything again:
+
+* ``code``: dictionary-encoded (distinct values + one small int per row),
+* ``float``/``int``: a numeric array (unparsable cells read as 0),
+* ``time``: ISO timestamps as POSIX seconds (NaN when unparsable),
+* ``diff``: a ``diff_json`` cell's tokens as arrays of op codes and
+  dictionary-encoded ``ref``/``hyp`` words, with an offset table per row.
+
+:meth:`Columns.write` stores a block as one binary file (a JSON header, then
+8-byte aligned arrays in native byte order) and :meth:`Columns.open` maps it
+back without reading it: arrays are ``memoryview`` casts of the mapping and
+text is decoded cell by cell on access.
+"""
+
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime
+from itertools import accumulate, chain
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+TEXT = "text"
+CODE = "code"
+FLOAT = "float"
+INT = "int"
+TIME = "time"
+DIFF = "diff"
+KINDS = (TEXT, CODE, FLOAT, INT, TIME, DIFF)
+
+# Diff token ops, by code; anything else is OTHER.
+OPS = ("match", "sub", "del", "ins")
+OTHER = len(OPS)
+
+MAGIC = b"ECOLS001"
+_HEADER = struct.Struct("<8sQ")
+_ALIGN = 8
+
+Numbers = Union[array, memoryview]
+
+
+class CorruptSnapshot(Exception):
+    """Raised when a snapshot file cannot be used (truncated, foreign, ...)."""
+
+
+class TextColumn(Sequence[str]):
+    """UTF-8 cells stored back to back, located by an offset table (n + 1 entries)."""
+
+    def __init__(self, offsets: Sequence[int], blob: Union[bytes, memoryview]):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return str(self.blob[self.offsets[index] : self.offsets[index + 1]], "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        blob, offsets = self.blob, self.offsets
+        for start, end in zip(offsets, offsets[1:]):
+            yield str(blob[start:end], "utf-8")
+
+    @classmethod
+    def build(cls, values: Iterable[str]) -> "TextColumn":
+        encoded = [value.encode("utf-8") for value in values]
+        offsets = array("Q", chain((0,), accumulate(map(len, encoded))))
+        return cls(offsets, b"".join(encoded))
+
+
+class CodeColumn(Sequence[str]):
+    """Dictionary-encoded cells: ``values[codes[i]]``."""
+
+    def __init__(self, values: Sequence[str], codes: Sequence[int]):
+        self.values = values
+        self.codes = codes
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self.values[code] for code in self.codes[index]]
+        return self.values[self.codes[index]]
+
+    def __iter__(self) -> Iterator[str]:
+        return map(self.values.__getitem__, self.codes)
+
+    @classmethod
+    def build(cls, cells: Iterable[str]) -> "CodeColumn":
+        found: Dict[str, int] = {}
+        codes = array("I", (found.setdefault(cell, len(found)) for cell in cells))
+        return cls(list(found), codes)
+
+
+class DiffTokens:
+    """The tokens of a ``diff`` column, flattened.
+
+    Token ``t`` belongs to row ``rows[t]`` (tokens of row ``i`` are
+    ``offsets[i]:offsets[i + 1]``); ``ops[t]`` indexes :data:`OPS` and
+    ``refs[t]``/``hyps[t]`` index ``words``, where code 0 is a missing word.
+    ``tally`` counts the distinct ``(op, ref, hyp)`` codes over the block.
+    """
+
+    def __init__(
+        self,
+        offsets: Sequence[int],
+        rows: Sequence[int],
+        ops: Sequence[int],
+        refs: Sequence[int],
+        hyps: Sequence[int],
+        words: Sequence[str],
+        tally: Sequence[Tuple[int, int, int, int]],
+    ):
+        self.offsets = offsets
+        self.rows = rows
+        self.ops = ops
+        self.refs = refs
+        self.hyps = hyps
+        self.words = words
+        self.tally = tally
+
+    @classmethod
+    def build(cls, cells: Iterable[str]) -> "DiffTokens":
+        words: Dict[str, int] = {"": 0}
+        offsets, rows = array("Q", [0]), array("I")
+        ops, refs, hyps = array("B"), array("I"), array("I")
+        tally: Dict[Tuple[int, int, int], int] = {}
+        for row, cell in enumerate(cells):
+            for token in _diff_tokens(cell):
+                op = token.get("op")
+                key = (
+                    OPS.index(op) if op in OPS else OTHER,
+                    words.setdefault(_word(token.get("ref")), len(words)),
+                    words.setdefault(_word(token.get("hyp")), len(words)),
+                )
+                ops.append(key[0])
+                refs.append(key[1])
+                hyps.append(key[2])
+                rows.append(row)
+                tally[key] = tally.get(key, 0) + 1
+            offsets.append(len(ops))
+        counts = [(*key, count) for key, count in tally.items()]
+        return cls(offsets, rows, ops, refs, hyps, list(words), counts)
+
+
+class Columns:
+    """A block of rows stored column by column (see the module docstring)."""
+
+    def __init__(
+        self,
+        length: int,
+        fieldnames: Sequence[str],
+        kinds: Dict[str, str],
+        text: Dict[str, Sequence[str]],
+        numbers: Optional[Dict[str, Numbers]] = None,
+        tokens: Optional[Dict[str, DiffTokens]] = None,
+    ):
+        self.length = length
+        self.fieldnames = list(fieldnames)
+        self.kinds = dict(kinds)
+        self._text = text
+        self._numbers = numbers or {}
+        self._tokens = tokens or {}
+        self.meta: Dict[str, object] = {}
+        self._mapping: Optional[mmap.mmap] = None
+
+    def __len__(self) -> int:
+        return self.length
+
+    def text(self, field: str) -> Sequence[str]:
+        return self._text[field]
+
+    def codes(self, field: str) -> CodeColumn:
+        column = self._text[field]
+        if not isinstance(column, CodeColumn):
+            raise KeyError(f"{field!r} is not a code column")
+        return column
+
+    def numbers(self, field: str) -> Numbers:
+        return self._numbers[field]
+
+    def tokens(self, field: str) -> DiffTokens:
+        return self._tokens[field]
+
+    def rows(self) -> Iterator[Dict[str, str]]:
+        fieldnames = self.fieldnames
+        for values in zip(*(self._text[field] for field in fieldnames)):
+            yield dict(zip(fieldnames, values))
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[Dict[str, str]],
+        kinds: Dict[str, str],
+        fieldnames: Optional[Sequence[str]] = None,
+    ) -> "Columns":
+        """Decode ``rows`` (every field in ``fieldnames``, plus those in ``kinds``)."""
+        rows = list(rows)
+        fieldnames = list(fieldnames or kinds)
+        fieldnames += [field for field in kinds if field not in fieldnames]
+        text: Dict[str, Sequence[str]] = {}
+        numbers: Dict[str, Numbers] = {}
+        tokens: Dict[str, DiffTokens] = {}
+        for field in fieldnames:
+            cells = [row.get(field) or "" for row in rows]
+            kind = kinds.get(field, TEXT)
+            if kind not in KINDS:
+                raise ValueError(f"Unknown column kind for {field!r}: {kind!r}")
+            text[field] = CodeColumn.build(cells) if kind == CODE else cells
+            if kind == FLOAT:
+                numbers[field] = array("d", map(_float, cells))
+            elif kind == INT:
+                numbers[field] = array("q", map(_int, cells))
+            elif kind == TIME:
+                numbers[field] = array("d", map(_timestamp, cells))
+            elif kind == DIFF:
+                tokens[field] = DiffTokens.build(cells)
+        return cls(len(rows), fieldnames, kinds, text, numbers, tokens)
+
+    # Snapshots -------------------------------------------------------------
+
+    def write(self, path: Path, meta: Optional[Dict[str, object]] = None) -> None:
+        """Write the block to ``path`` (atomically, via a temporary file)."""
+        sections: List[Tuple[str, str, bytes]] = []
+
+        def add(name: str, values: Union[array, Sequence[int]], typecode: str) -> None:
+            if not isinstance(values, array) or values.typecode != typecode:
+                values = array(typecode, values)
+            sections.append((name, typecode, values.tobytes()))
+
+        def add_text(name: str, column: Sequence[str]) -> None:
+            if not isinstance(column, TextColumn):
+                column = TextColumn.build(column)
+            add(f"{name}.offsets", column.offsets, "Q")
+            sections.append((f"{name}.blob", "B", bytes(column.blob)))
+
+        for field in self.fieldnames:
+            column = self._text[field]
+            if isinstance(column, CodeColumn):
+                add_text(f"{field}.values", column.values)
+                add(f"{field}.codes", column.codes, "I")
+            else:
+                add_text(field, column)
+        for field, values in self._numbers.items():
+            add(f"{field}.numbers", values, "q" if self.kinds[field] == INT else "d")
+        for field, diff in self._tokens.items():
+            add(f"{field}.tokens.offsets", diff.offsets, "Q")
+            add(f"{field}.tokens.rows", diff.rows, "I")
+            add(f"{field}.tokens.ops", diff.ops, "B")
+            add(f"{field}.tokens.refs", diff.refs, "I")
+            add(f"{field}.tokens.hyps", diff.hyps, "I")
+            add(f"{field}.tokens.tally", [code for item in diff.tally for code in item], "Q")
+            add_text(f"{field}.tokens.words", diff.words)
+
+        header: Dict[str, object] = {
+            "byteorder": sys.byteorder,
+            "rows": self.length,
+            "fieldnames": self.fieldnames,
+            "kinds": self.kinds,
+            "meta": meta or {},
+            "sections": {},
+        }
+        offset = 0
+        for name, typecode, data in sections:
+            header["sections"][name] = {"typecode": typecode, "offset": offset, "size": len(data)}
+            offset += _padded(len(data))
+        encoded = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        start = _padded(_HEADER.size + len(encoded))
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("wb") as fp:
+            fp.write(_HEADER.pack(MAGIC, len(encoded)) + encoded)
+            fp.write(b"\0" * (start - _HEADER.size - len(encoded)))
+            for _, _, data in sections:
+                fp.write(data + b"\0" * (_padded(len(data)) - len(data)))
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open(cls, path: Path) -> "Columns":
+        """Map a snapshot written by :meth:`write`; raises :class:`CorruptSnapshot`."""
+        with open(path, "rb") as fp:
+            try:
+                mapping = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as exc:  # Empty file.
+                raise CorruptSnapshot(f"{path}: {exc}") from None
+        try:
+            magic, header_size = _HEADER.unpack_from(mapping)
+            if magic != MAGIC:
+                raise CorruptSnapshot(f"{path}: not a column snapshot")
+            header = json.loads(bytes(mapping[_HEADER.size : _HEADER.size + header_size]))
+            if header["byteorder"] != sys.byteorder:
+                raise CorruptSnapshot(f"{path}: written on a {header['byteorder']}-endian host")
+            start = _padded(_HEADER.size + header_size)
+            view = memoryview(mapping)
+            sections = header["sections"]
+            if start + sum(_padded(item["size"]) for item in sections.values()) > len(mapping):
+                raise CorruptSnapshot(f"{path}: truncated")
+
+            def section(name: str) -> memoryview:
+                item = sections[name]
+                data = view[start + item["offset"] : start + item["offset"] + item["size"]]
+                return data if item["typecode"] == "B" else data.cast(item["typecode"])
+
+            def text(name: str) -> TextColumn:
+                return TextColumn(section(f"{name}.offsets"), section(f"{name}.blob"))
+
+            kinds: Dict[str, str] = header["kinds"]
+            columns: Dict[str, Sequence[str]] = {}
+            numbers: Dict[str, Numbers] = {}
+            tokens: Dict[str, DiffTokens] = {}
+            for field in header["fieldnames"]:
+                kind = kinds.get(field, TEXT)
+                if kind == CODE:
+                    values = list(text(f"{field}.values"))
+                    columns[field] = CodeColumn(values, section(f"{field}.codes"))
+                else:
+                    columns[field] = text(field)
+                if kind in (FLOAT, INT, TIME):
+                    numbers[field] = section(f"{field}.numbers")
+                elif kind == DIFF:
+                    name = f"{field}.tokens"
+                    tokens[field] = DiffTokens(
+                        section(f"{name}.offsets"),
+                        section(f"{name}.rows"),
+                        section(f"{name}.ops"),
+                        section(f"{name}.refs"),
+                        section(f"{name}.hyps"),
+                        list(text(f"{name}.words")),
+                        list(zip(*[iter(section(f"{name}.tally"))] * 4)),
+                    )
+        except (KeyError, ValueError, TypeError, struct.error) as exc:
+            # The mapping is released with the views taken of it.
+            raise CorruptSnapshot(f"{path}: {exc}") from None
+        columns_ = cls(header["rows"], header["fieldnames"], kinds, columns, numbers, tokens)
+        columns_.meta = header["meta"]
+        # The arrays are views of the mapping, which stays open as long as they do.
+        columns_._mapping = mapping
+        return columns_
+
+
+def _padded(size: int) -> int:
+    return -(-size // _ALIGN) * _ALIGN
+
+
+def _float(cell: str) -> float:
+    try:
+        return float(cell or 0)
+    except ValueError:
+        return 0.0
+
+
+def _int(cell: str) -> int:
+    try:
+        return int(cell or 0)
+    except ValueError:
+        return 0
+
+
+def _timestamp(cell: str) -> float:
+    try:
+        return datetime.fromisoformat(cell).timestamp()
+    except ValueError:
+        return math.nan
+
+
+def _diff_tokens(cell: str) -> List[dict]:
+    try:
+        tokens = json.loads(cell or "[]")
+    except json.JSONDecodeError:
+        return []
+    if not isinstance(tokens, list):
+        return []
+    return [token for token in tokens if isinstance(token, dict)]
+
+
+def _word(value: object) -> str:
+    return value if isinstance(value, str) else ""
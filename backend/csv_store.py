@@ -1,73 +1,635 @@
 import csv
+import hashlib
+import io
+import itertools
+import mmap
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import (
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
 from filelock import FileLock
 
+from .indexes import RowIndex
+from .metrics import StoreMetrics
+from .storage import Plan, Store
 
-class CSVStore:
-    """Simple CSV-backed persistence with advisory file locking."""
+JOURNAL_PUT = "put"
+JOURNAL_DELETE = "del"
+DEFAULT_COMPACT_THRESHOLD = 1 << 20
 
-    def __init__(self, path: Path, fieldnames: List[str], id_field: str = "id"):
+_CHECKSUM_MASK = (1 << 64) - 1
+
+# Sorts after any id, so ``cursor + (_MAX_KEY,)`` sorts after every entry of that cursor.
+_MAX_KEY = "\U0010ffff"
+
+FileSignature = Tuple[int, int, int]
+Signature = Tuple[Optional[FileSignature], Optional[FileSignature]]
+Listener = Callable[[Optional[List[Dict[str, str]]]], None]
+SortEntry = Tuple[Union[str, int], ...]
+
+
+class CSVStore(Store):
+    """CSV-backed persistence with advisory file locking and an in-memory cache.
+
+    Parsed rows are kept in memory, keyed by id, and the file is only re-read
+    when another process wrote to it. Writes made through the store update the
+    cache in place and bump a generation counter kept in ``<path>.gen``, which
+    every instance maps into memory: checking it before serving from the cache
+    costs no system call, so several worker processes can share the files
+    without losing read-your-writes. Rows appended by another process are read
+    from where this instance left off; anything else reloads the files. The
+    files are also stat'ed at most every ``stat_interval`` seconds (on every
+    read by default) to notice edits made without the store. Rows handed out
+    by the read methods are shared with the cache and must be treated as
+    read-only.
+
+    With ``journal=True`` updates and deletes are appended as ``put``/``del``
+    records to ``<path>.journal`` instead of rewriting the whole file. Loading
+    replays the journal on top of the base file, and once the journal grows
+    past ``compact_threshold`` bytes it is folded back into the base file in a
+    background thread.
+
+    The cache also keeps a checksum of its contents (the sum of a stable
+    64-bit digest per row), maintained on every change, which
+    :meth:`version` hands out as an ETag-style token.
+
+    ``indexes`` are kept in sync with the cache on every write and reload, and
+    :meth:`select` uses them to answer filtered queries without scanning.
+    Results come back ordered by the ``order_by`` columns (insertion order when
+    unset); the store keeps a sorted list of keys so that keyset pagination
+    (``after=<sort values of the last row>``) costs the same on every page.
+
+    With ``group_commit_window`` > 0, concurrent :meth:`append` calls are
+    coalesced: the first caller waits that many seconds for others to join,
+    then writes and fsyncs the whole group under one lock acquisition. Every
+    caller returns only once its row is on disk.
+
+    :meth:`subscribe` listeners are called, under the lock, with the rows
+    appended by any process once this instance has them, or with ``None``
+    when rows changed in another way.
+
+    Lock waits, parsing and writes are timed, and rows and bytes counted, in
+    the ``ecoute_store_*`` metrics under ``name`` (the file's name by
+    default; see :mod:`backend.metrics`).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        fieldnames: List[str],
+        id_field: str = "id",
+        journal: bool = False,
+        compact_threshold: int = DEFAULT_COMPACT_THRESHOLD,
+        indexes: Sequence[RowIndex] = (),
+        order_by: Sequence[str] = (),
+        group_commit_window: float = 0.0,
+        stat_interval: float = 0.0,
+        name: Optional[str] = None,
+    ):
         self.path = Path(path)
         self.fieldnames = fieldnames
         self.id_field = id_field
         self.lock = FileLock(str(self.path) + ".lock")
+        # Threads of this process queue here instead of polling the file lock.
+        self._process_lock = threading.RLock()
+        self._metrics = StoreMetrics(name or self.path.name)
+        self.journal_path = Path(str(self.path) + ".journal")
+        self.generation_path = Path(str(self.path) + ".gen")
+        self.stat_interval = stat_interval
+        self.journal = journal
+        self.compact_threshold = compact_threshold
+        self._journal_fields = ["op"] + list(fieldnames)
+        self.indexes: Dict[str, RowIndex] = {index.name: index for index in indexes}
+        self._rows: Dict[str, Dict[str, str]] = {}
+        self._checksum = 0
+        self.order_by = tuple(order_by)
+        self._positions: Dict[str, int] = {}
+        self._next_position = itertools.count()
+        self._ordered: List[SortEntry] = []
+        self._journaled_ids: Set[str] = set()
+        self._signature: Optional[Signature] = None
+        self._seen_generation = 0
+        self._checked_at = 0.0
+        self._listeners: List[Listener] = []
+        self._cache_lock = threading.RLock()
+        self._anonymous_keys = itertools.count()
+        self._compacting = False
+        self._group_commit = (
+            _GroupCommit(self.append_many, group_commit_window) if group_commit_window > 0 else None
+        )
         self._ensure_file()
 
     def _ensure_file(self) -> None:
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        if not self.path.exists():
-            with self.lock:
+        with self._locked():
+            if not self.path.exists():
                 with self.path.open("w", newline="", encoding="utf-8") as fp:
                     writer = csv.DictWriter(fp, fieldnames=self.fieldnames)
                     writer.writeheader()
+            self._generation = Generation(self.generation_path)
 
     def read_all(self) -> List[Dict[str, str]]:
-        with self.lock:
-            return self._read_all_locked()
+        self._refresh()
+        with self._cache_lock:
+            return list(self._rows.values())
 
     def append(self, row: Dict[str, str]) -> None:
-        with self.lock:
-            with self.path.open("a", newline="", encoding="utf-8") as fp:
-                writer = csv.DictWriter(fp, fieldnames=self.fieldnames)
-                writer.writerow(row)
+        if self._group_commit is not None:
+            self._group_commit.submit([row])
+        else:
+            self.append_many([row])
+
+    def append_many(self, rows: Sequence[Dict[str, str]]) -> None:
+        """Append rows with a single locked, fsynced write."""
+        if not rows:
+            return
+        with self._locked():
+            self._sync_locked()
+            base_rows = []
+            journal_records = []
+            for row in rows:
+                if (row.get(self.id_field) or "") in self._journaled_ids:
+                    # A journal record for this id would be replayed over the
+                    # base file, so the new row has to go to the journal too.
+                    journal_records.append((JOURNAL_PUT, row))
+                else:
+                    base_rows.append(row)
+            if base_rows:
+                with self._metrics.write_append.time():
+                    with self.path.open("a", newline="", encoding="utf-8") as fp:
+                        start = fp.tell()
+                        writer = csv.DictWriter(fp, fieldnames=self.fieldnames)
+                        writer.writerows(base_rows)
+                        fp.flush()
+                        os.fsync(fp.fileno())
+                        self._metrics.bytes_written.inc(fp.tell() - start)
+            if journal_records:
+                self._journal_locked(journal_records)
+            with self._cache_lock:
+                added = [dict(row) for row in rows]
+                for row in added:
+                    self._cache_put(self._key_for(row, self._rows), row)
+                self._written_locked()
+                self._notify(added)
 
     def replace_all(self, rows: Iterable[Dict[str, str]]) -> None:
-        with self.lock:
-            self._write_all_locked(list(rows))
+        """Swap the whole table for ``rows``.
+
+        ``rows`` is fully consumed before anything is written, so an exception
+        raised while iterating leaves the store untouched; the new file is
+        written next to the old one and atomically renamed over it. A repeated
+        id replaces the earlier row in its position, as an upsert would.
+        """
+        with self._locked():
+            new_rows: Dict[str, Dict[str, str]] = {}
+            for row in rows:
+                row_id = row.get(self.id_field) or self._key_for(row, new_rows)
+                new_rows[row_id] = dict(row)
+            with self._cache_lock:
+                self._cache_reset(new_rows)
+                self._write_all_locked()
+                self._notify(None)
+
+    def upsert_many(self, rows: Iterable[Dict[str, str]]) -> Tuple[int, int]:
+        """Insert or replace rows by id in one locked write.
+
+        Returns ``(created, updated)``. Existing rows keep their position; in
+        journaled mode every row becomes a single ``put`` record.
+        """
+        rows = [dict(row) for row in rows]
+        if not rows:
+            return 0, 0
+        if not all(row.get(self.id_field) for row in rows):
+            raise ValueError("upsert_many needs an id on every row")
+        created = updated = 0
+        with self._locked():
+            self._sync_locked()
+            with self._cache_lock:
+                for row in rows:
+                    row_id = row[self.id_field]
+                    if row_id in self._rows:
+                        updated += 1
+                    else:
+                        created += 1
+                    self._cache_put(row_id, row)
+                if self.journal:
+                    self._journal_locked([(JOURNAL_PUT, row) for row in rows])
+                else:
+                    self._write_all_locked()
+                self._notify(None)
+        return created, updated
 
     def update(self, row_id: str, new_row: Dict[str, str]) -> bool:
-        with self.lock:
-            rows = self._read_all_locked()
-            replaced = False
-            for idx, row in enumerate(rows):
-                if row.get(self.id_field) == row_id:
-                    rows[idx] = new_row
-                    replaced = True
-                    break
-            if replaced:
-                self._write_all_locked(rows)
-            return replaced
+        with self._locked():
+            self._sync_locked()
+            with self._cache_lock:
+                if row_id not in self._rows:
+                    return False
+                new_key = new_row.get(self.id_field) or row_id
+                if new_key != row_id:
+                    self._cache_pop(row_id)
+                self._cache_put(new_key, dict(new_row))
+                if self.journal:
+                    records = [(JOURNAL_PUT, new_row)]
+                    if new_key != row_id:
+                        records.insert(0, (JOURNAL_DELETE, {self.id_field: row_id}))
+                    self._journal_locked(records)
+                else:
+                    self._write_all_locked()
+                self._notify(None)
+                return True
+
+    def apply(self, plan: Plan) -> None:
+        with self._locked():
+            self._sync_locked()
+            puts, deletes = plan()
+            # Checked before the cache is touched, so that a bad plan changes nothing.
+            if not all(row.get(self.id_field) for row in puts):
+                raise ValueError("apply needs an id on every row")
+            with self._cache_lock:
+                records = [
+                    (JOURNAL_DELETE, {self.id_field: row_id})
+                    for row_id in deletes
+                    if self._cache_pop(row_id) is not None
+                ]
+                for row in puts:
+                    self._cache_put(row[self.id_field], dict(row))
+                    records.append((JOURNAL_PUT, row))
+                if not records:
+                    return
+                if self.journal:
+                    self._journal_locked(records)
+                else:
+                    self._write_all_locked()
+                self._notify(None)
 
     def delete(self, row_id: str) -> bool:
-        with self.lock:
-            rows = self._read_all_locked()
-            new_rows = [row for row in rows if row.get(self.id_field) != row_id]
-            if len(new_rows) == len(rows):
-                return False
-            self._write_all_locked(new_rows)
-            return True
+        with self._locked():
+            self._sync_locked()
+            with self._cache_lock:
+                if self._cache_pop(row_id) is None:
+                    return False
+                if self.journal:
+                    self._journal_locked([(JOURNAL_DELETE, {self.id_field: row_id})])
+                else:
+                    self._write_all_locked()
+                self._notify(None)
+                return True
 
     def get(self, row_id: str) -> Optional[Dict[str, str]]:
-        with self.lock:
-            for row in self._read_all_locked():
-                if row.get(self.id_field) == row_id:
-                    return row
-        return None
+        self._refresh()
+        with self._cache_lock:
+            return self._rows.get(row_id)
+
+    def select(
+        self,
+        where: Optional[Dict[str, str]] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        after: Optional[Sequence[str]] = None,
+        descending: bool = False,
+        since: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, str]]:
+        """Return rows matching every ``name=value`` filter, in store order.
+
+        Names that match an index are answered by intersecting its posting
+        sets; any other name is compared against the raw column value.
+        ``after`` holds the ``order_by`` values of the last row of the previous
+        page (or a prefix of them, as a lower bound); only rows strictly after
+        it in the requested direction are returned. ``since`` is an inclusive
+        lower bound in either direction: rows sorting at or after it.
+        """
+        if (after is not None or since is not None) and not self.order_by:
+            raise ValueError("Keyset pagination requires order_by columns")
+        self._refresh()
+        with self._cache_lock:
+            matched = self._match_keys(where or {})
+            sorted_matches = self._sorted_matches(matched)
+            if sorted_matches is not None:
+                entries, matched = sorted_matches, None
+            else:
+                entries = self._ordered
+            start, stop = 0, len(entries)
+            if after is not None:
+                if descending:
+                    stop = bisect_left(entries, tuple(after))
+                else:
+                    start = bisect_right(entries, tuple(after) + (_MAX_KEY,))
+            if since is not None:
+                start = max(start, bisect_left(entries, tuple(since)))
+            positions: Iterable[int] = (
+                range(stop - 1, start - 1, -1) if descending else range(start, stop)
+            )
+            if matched is not None:
+                positions = (i for i in positions if entries[i][-1] in matched)
+            end = None if limit is None else offset + limit
+            return [self._rows[entries[i][-1]] for i in itertools.islice(positions, offset, end)]
+
+    def iter_rows(
+        self,
+        where: Optional[Dict[str, str]] = None,
+        after: Optional[Sequence[str]] = None,
+        batch_size: int = 500,
+        since: Optional[Sequence[str]] = None,
+    ) -> Iterator[Dict[str, str]]:
+        """Yield matching rows in store order, one page at a time.
+
+        A selective filter is sorted once for the whole scan instead of once
+        per page; rows deleted or moved in the sort order since then are
+        skipped, and rows added are not seen.
+        """
+        if not self.order_by:
+            yield from super().iter_rows(where, after, batch_size, since)
+            return
+        self._refresh()
+        with self._cache_lock:
+            entries = self._sorted_matches(self._match_keys(where or {}))
+        if entries is None:
+            yield from super().iter_rows(where, after, batch_size, since)
+            return
+        start = 0
+        if after is not None:
+            start = bisect_right(entries, tuple(after) + (_MAX_KEY,))
+        if since is not None:
+            start = max(start, bisect_left(entries, tuple(since)))
+        for page_start in range(start, len(entries), batch_size):
+            self._refresh()
+            page = []
+            with self._cache_lock:
+                for entry in entries[page_start : page_start + batch_size]:
+                    row = self._rows.get(entry[-1])
+                    if row is not None and self._sort_entry(entry[-1], row) == entry:
+                        page.append(row)
+            yield from page
+
+    def count(self, where: Optional[Dict[str, str]] = None) -> int:
+        self._refresh()
+        with self._cache_lock:
+            matched = self._match_keys(where or {})
+            return len(self._rows) if matched is None else len(matched)
+
+    def version(self) -> Tuple[str, float]:
+        self._refresh()
+        with self._cache_lock:
+            mtimes = [stat[0] for stat in self._signature or () if stat is not None]
+            return f"{self._checksum:016x}", max(mtimes, default=0) / 1e9
+
+    def subscribe(self, listener: Listener) -> None:
+        self._listeners.append(listener)
+
+    def refresh(self) -> None:
+        self._refresh()
+
+    def locked(self) -> ContextManager[None]:
+        """Hold the write lock, e.g. across writes to several stores.
+
+        It is reentrant: writes made meanwhile by the same thread go through.
+        """
+        return self._locked()
+
+    def compact(self) -> None:
+        """Fold the journal back into the base file."""
+        with self._locked():
+            self._sync_locked()
+            with self._cache_lock:
+                if self._journal_size() > 0:
+                    self._write_all_locked()
 
     # Internal helpers -----------------------------------------------------
 
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the file lock, which is only contended by other processes."""
+        started = time.perf_counter()
+        with self._process_lock, self.lock:
+            self._metrics.lock_wait.observe(time.perf_counter() - started)
+            yield
+
+    def _stat(self) -> Signature:
+        return _file_signature(self.path), _file_signature(self.journal_path)
+
+    def _journal_size(self) -> int:
+        signature = _file_signature(self.journal_path)
+        return signature[1] if signature else 0
+
+    def _refresh(self) -> None:
+        """Catch up with the files if they changed behind our back."""
+        if self._signature is not None and self._generation.read() == self._seen_generation:
+            if time.monotonic() - self._checked_at < self.stat_interval:
+                return
+            if self._stat() == self._signature:
+                self._checked_at = time.monotonic()
+                return
+        with self._locked():
+            self._sync_locked()
+
+    def _sync_locked(self) -> None:
+        generation = self._generation.read()
+        signature = self._stat()
+        with self._cache_lock:
+            if self._signature is not None and signature == self._signature:
+                self._seen_generation = generation
+                self._checked_at = time.monotonic()
+                return
+            with self._metrics.parse.time():
+                tail = self._read_tail_locked(signature) if self._signature is not None else None
+                if tail is None:
+                    self._reload_locked()
+                    added = None
+                else:
+                    added = self._apply_tail_locked(*tail)
+            self._metrics.rows.set(len(self._rows))
+            self._signature = signature
+            self._seen_generation = generation
+            self._checked_at = time.monotonic()
+            self._notify(added)
+
+    def _reload_locked(self) -> None:
+        rows: Dict[str, Dict[str, str]] = {}
+        for row in self._read_all_locked():
+            rows[self._key_for(row, rows)] = row
+        self._journaled_ids = set()
+        for op, row in self._read_journal_locked():
+            row_id = row.get(self.id_field) or ""
+            self._journaled_ids.add(row_id)
+            if op == JOURNAL_DELETE:
+                rows.pop(row_id, None)
+            elif op == JOURNAL_PUT:
+                rows[row_id] = row
+        self._cache_reset(rows)
+
+    def _read_tail_locked(
+        self, signature: Signature
+    ) -> Optional[Tuple[List[Dict[str, str]], List[Tuple[str, Dict[str, str]]]]]:
+        """Read what other processes appended since our last look.
+
+        Returns ``None`` when the files were rewritten instead (a new inode or
+        a shorter file), which calls for a full reload.
+        """
+        (old_base, old_journal), (base, journal) = self._signature, signature
+        if not _grew(old_base, base):
+            return None
+        if old_journal is not None and not _grew(old_journal, journal):
+            return None
+        with self.path.open("rb") as fp:
+            fp.seek(old_base[1])
+            raw = fp.read()
+        reader = csv.DictReader(
+            io.StringIO(raw.decode("utf-8"), newline=""), fieldnames=self.fieldnames
+        )
+        rows = [dict(row) for row in reader]
+        self._metrics.bytes_read.inc(len(raw))
+        self._metrics.rows_parsed.inc(len(rows))
+        return rows, self._read_journal_locked(old_journal[1] if old_journal else 0)
+
+    def _apply_tail_locked(
+        self, rows: List[Dict[str, str]], records: List[Tuple[str, Dict[str, str]]]
+    ) -> Optional[List[Dict[str, str]]]:
+        """Apply appended rows and journal records; return the new rows.
+
+        Returns ``None`` if existing rows were replaced or deleted.
+        """
+        added: Optional[List[Dict[str, str]]] = []
+        for row in rows:
+            self._cache_put(self._key_for(row, self._rows), row)
+            added.append(row)
+        for op, row in records:
+            row_id = row.get(self.id_field) or ""
+            self._journaled_ids.add(row_id)
+            if op == JOURNAL_PUT:
+                if row_id in self._rows:
+                    added = None
+                elif added is not None:
+                    added.append(row)
+                self._cache_put(row_id, row)
+            elif op == JOURNAL_DELETE and self._cache_pop(row_id) is not None:
+                added = None
+        return added
+
+    def _written_locked(self) -> None:
+        """Record a write of ours and tell the other processes about it."""
+        self._signature = self._stat()
+        self._seen_generation = self._generation.bump()
+        self._metrics.rows.set(len(self._rows))
+
+    def _notify(self, rows: Optional[List[Dict[str, str]]]) -> None:
+        if rows is None or rows:
+            for listener in self._listeners:
+                listener(rows)
+
+    def _cache_put(self, key: str, row: Dict[str, str]) -> None:
+        old = self._rows.get(key)
+        for index in self.indexes.values():
+            if old is not None:
+                index.remove(key, old)
+            index.add(key, row)
+        if old is None:
+            self._positions[key] = next(self._next_position)
+        else:
+            self._discard_entry(self._sort_entry(key, old))
+            self._checksum -= self._digest(old)
+        self._checksum = (self._checksum + self._digest(row)) & _CHECKSUM_MASK
+        self._rows[key] = row
+        insort(self._ordered, self._sort_entry(key, row))
+
+    def _cache_pop(self, key: str) -> Optional[Dict[str, str]]:
+        row = self._rows.get(key)
+        if row is not None:
+            self._discard_entry(self._sort_entry(key, row))
+            del self._rows[key]
+            del self._positions[key]
+            self._checksum = (self._checksum - self._digest(row)) & _CHECKSUM_MASK
+            for index in self.indexes.values():
+                index.remove(key, row)
+        return row
+
+    def _cache_reset(self, rows: Dict[str, Dict[str, str]]) -> None:
+        self._rows = rows
+        self._positions = {key: next(self._next_position) for key in rows}
+        self._checksum = sum(map(self._digest, rows.values())) & _CHECKSUM_MASK
+        self._ordered = sorted(self._sort_entry(key, row) for key, row in rows.items())
+        for index in self.indexes.values():
+            index.clear()
+            for key, row in rows.items():
+                index.add(key, row)
+
+    def _digest(self, row: Dict[str, str]) -> int:
+        data = "\x1f".join(row.get(field) or "" for field in self.fieldnames).encode("utf-8")
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+    def _sort_entry(self, key: str, row: Dict[str, str]) -> SortEntry:
+        if not self.order_by:
+            return (self._positions[key], key)
+        return tuple(row.get(field) or "" for field in self.order_by) + (key,)
+
+    def _discard_entry(self, entry: SortEntry) -> None:
+        position = bisect_left(self._ordered, entry)
+        if position < len(self._ordered) and self._ordered[position] == entry:
+            del self._ordered[position]
+
+    def _sorted_matches(self, matched: Optional[Set[str]]) -> Optional[List[SortEntry]]:
+        """Sort entries of ``matched`` when there are few enough of them.
+
+        Sorting a selective filter's matches beats walking every row; returns
+        None when the full ordering should be walked instead.
+        """
+        if matched is None or len(matched) * 8 >= len(self._ordered):
+            return None
+        return sorted(self._sort_entry(key, self._rows[key]) for key in matched)
+
+    def _match_keys(self, where: Dict[str, str]) -> Optional[Set[str]]:
+        """Keys matching ``where``, or None for "every row"."""
+        postings = []
+        residual = {}
+        for name, value in where.items():
+            index = self.indexes.get(name)
+            if index is None:
+                residual[name] = value
+            else:
+                postings.append(index.lookup(value))
+        if not postings and not residual:
+            return None
+        # The posting sets are shared with the indexes: callers only read the
+        # result while holding the cache lock.
+        if postings:
+            postings.sort(key=len)
+            matched = postings[0]
+            if len(postings) > 1:
+                matched = matched.intersection(*postings[1:])
+        else:
+            matched = set(self._rows)
+        if residual:
+            matched = {
+                key
+                for key in matched
+                if all(self._rows[key].get(name) == value for name, value in residual.items())
+            }
+        return matched
+
+    def _key_for(self, row: Dict[str, str], rows: Dict[str, Dict[str, str]]) -> str:
+        # Rows without an id (or repeating one) get a private key so they are
+        # still listed and written back; lookups by id return the first one.
+        key = row.get(self.id_field) or ""
+        if not key or key in rows:
+            key = f"\0{next(self._anonymous_keys)}"
+        return key
+
     def _read_all_locked(self) -> List[Dict[str, str]]:
         if not self.path.exists():
             return []
@@ -75,10 +637,192 @@ class CSVStore:
             reader = csv.DictReader(fp, fieldnames=self.fieldnames)
             # Consume header
             next(reader, None)
-            return [dict(row) for row in reader]
+            rows = [dict(row) for row in reader]
+            self._metrics.bytes_read.inc(os.fstat(fp.fileno()).st_size)
+        self._metrics.rows_parsed.inc(len(rows))
+        return rows
+
+    def _read_journal_locked(self, offset: int = 0) -> List[Tuple[str, Dict[str, str]]]:
+        try:
+            with self.journal_path.open("rb") as fp:
+                fp.seek(offset)
+                raw = fp.read()
+        except FileNotFoundError:
+            return []
+        # A crash can leave a torn record at the end; only replay complete
+        # records and drop the tail so the next append starts on a fresh line.
+        complete = raw[: _complete_records_length(raw)]
+        if len(complete) != len(raw):
+            with self.journal_path.open("r+b") as fp:
+                fp.truncate(offset + len(complete))
+        reader = csv.reader(io.StringIO(complete.decode("utf-8"), newline=""))
+        if not offset:
+            next(reader, None)
+        records = []
+        for values in reader:
+            if len(values) != len(self._journal_fields):
+                continue
+            records.append((values[0], dict(zip(self.fieldnames, values[1:]))))
+        self._metrics.bytes_read.inc(len(raw))
+        self._metrics.rows_parsed.inc(len(records))
+        return records
+
+    def _journal_locked(self, records: List[Tuple[str, Dict[str, str]]]) -> None:
+        new_file = self._journal_size() == 0
+        with self._metrics.write_journal.time():
+            with self.journal_path.open("a", newline="", encoding="utf-8") as fp:
+                start = fp.tell()
+                writer = csv.writer(fp)
+                if new_file:
+                    writer.writerow(self._journal_fields)
+                for op, row in records:
+                    writer.writerow([op] + [row.get(field) or "" for field in self.fieldnames])
+                    self._journaled_ids.add(row.get(self.id_field) or "")
+                fp.flush()
+                os.fsync(fp.fileno())
+                self._metrics.bytes_written.inc(fp.tell() - start)
+        self._written_locked()
+        if self._journal_size() >= self.compact_threshold and not self._compacting:
+            self._compacting = True
+            threading.Thread(target=self._compact_in_background, daemon=True).start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        finally:
+            self._compacting = False
+
+    def _write_all_locked(self) -> None:
+        # Write the new base file next to the old one and swap it in, then drop
+        # the journal: replaying it again over the new base would be harmless.
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with self._metrics.write_rewrite.time():
+                with tmp_path.open("w", newline="", encoding="utf-8") as fp:
+                    writer = csv.DictWriter(fp, fieldnames=self.fieldnames)
+                    writer.writeheader()
+                    writer.writerows(self._rows.values())
+                    self._metrics.bytes_written.inc(fp.tell())
+                os.replace(tmp_path, self.path)
+            if self.journal_path.exists():
+                self.journal_path.unlink()
+            self._journaled_ids = set()
+        except BaseException:
+            # The cache may be ahead of the file now; force a reload on next
+            # access, here and in every other process.
+            self._signature = None
+            self._generation.bump()
+            tmp_path.unlink(missing_ok=True)
+            raise
+        self._written_locked()
+
+
+class _Ticket:
+    __slots__ = ("done", "error")
+
+    def __init__(self) -> None:
+        self.done = False
+        self.error: Optional[BaseException] = None
+
+
+class _GroupCommit:
+    """Leader/follower group commit for appends.
+
+    The first caller to find no write in progress becomes the leader: it
+    sleeps for ``window`` seconds, takes every row queued so far and writes
+    them in one go. Callers arriving meanwhile wait on their ticket; those
+    that queued after the leader took its batch elect the next leader.
+    """
+
+    def __init__(self, write: Callable[[List[Dict[str, str]]], None], window: float):
+        self._write = write
+        self._window = window
+        self._cond = threading.Condition()
+        self._queue: List[Tuple[List[Dict[str, str]], _Ticket]] = []
+        self._leader_active = False
+
+    def submit(self, rows: List[Dict[str, str]]) -> None:
+        ticket = _Ticket()
+        with self._cond:
+            self._queue.append((rows, ticket))
+            while self._leader_active and not ticket.done:
+                self._cond.wait()
+            if not ticket.done:
+                self._leader_active = True
+        if not ticket.done:
+            self._lead()
+        if ticket.error is not None:
+            raise ticket.error
+
+    def _lead(self) -> None:
+        try:
+            time.sleep(self._window)
+            with self._cond:
+                batch, self._queue = self._queue, []
+            error: Optional[BaseException] = None
+            try:
+                self._write([row for rows, _ in batch for row in rows])
+            except BaseException as exc:
+                error = exc
+            for _, ticket in batch:
+                ticket.error = error
+                ticket.done = True
+        finally:
+            with self._cond:
+                self._leader_active = False
+                self._cond.notify_all()
+
+
+class Generation:
+    """A write counter shared by every process, in an 8-byte mapped file.
+
+    Bumped under the file lock. A reader racing a bump may see a torn value,
+    which only sends it down the locked path where it reads it again.
+    """
+
+    def __init__(self, path: Path):
+        with path.open("a+b") as fp:
+            if os.fstat(fp.fileno()).st_size < 8:
+                fp.truncate(8)
+            self._map = mmap.mmap(fp.fileno(), 8)
+
+    def read(self) -> int:
+        return int.from_bytes(self._map[:8], "little")
+
+    def bump(self) -> int:
+        value = (self.read() + 1) & _CHECKSUM_MASK
+        self._map[:8] = value.to_bytes(8, "little")
+        return value
+
+
+def _complete_records_length(raw: bytes) -> int:
+    """Length of the leading complete CSV records of ``raw``.
+
+    A record ends at a newline outside quotes: quoted fields may hold
+    newlines, and quotes inside them are doubled, so the parity of the
+    quotes seen so far says whether a newline is inside one. (A quote byte
+    never occurs within a multi-byte UTF-8 character.)
+    """
+    complete = start = 0
+    quoted = False
+    while True:
+        newline = raw.find(b"\n", start)
+        if newline < 0:
+            return complete
+        quoted ^= raw.count(b'"', start, newline) % 2 == 1
+        if not quoted:
+            complete = newline + 1
+        start = newline + 1
+
+
+def _file_signature(path: Path) -> Optional[FileSignature]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
 
-    def _write_all_locked(self, rows: List[Dict[str, str]]) -> None:
-        with self.path.open("w", newline="", encoding="utf-8") as fp:
-            writer = csv.DictWriter(fp, fieldnames=self.fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
+def _grew(old: Optional[FileSignature], new: Optional[FileSignature]) -> bool:
+    """Whether ``new`` is the same file as ``old``, only appended to."""
+    return old is not None and new is not None and new[2] == old[2] and new[1] >= old[1]
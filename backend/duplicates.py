@@ -0,0 +1,243 @@
+"""Duplicate detection over the sentence bank, kept in memory.
+
+Sentences are compared on their tokens (``text.tokenize``, the scoring
+tokenizer, same as ``align.ts``), so copies that differ only in case,
+punctuation or elided apostrophes share an exact key. Near-duplicates (a
+word added, dropped or changed) are found with MinHash signatures over word
+bigrams, bucketed by locality-sensitive hashing: only sentences that share a
+bucket are ever compared, never every pair.
+"""
+
+import hashlib
+import struct
+import threading
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from .text import tokenize
+
+SHINGLE_SIZE = 2
+# 20 bands of 3 hashes: pairs with a Jaccard similarity of 0.5 share a bucket
+# 93% of the time (99% at 0.6), pairs at 0.2 only 15% of the time (and are
+# then told apart by the exact similarity). One word inserted into or
+# substituted in a six-word sentence leaves it at 0.5.
+LSH_BANDS = 20
+BAND_ROWS = 3
+DEFAULT_THRESHOLD = 0.5
+
+# One SHAKE-128 digest per shingle gives its id (8 bytes) and one 32-bit
+# value per MinHash function, so signing a sentence is a few C calls.
+_SHINGLE_HASHES = struct.Struct(f"<Q{LSH_BANDS * BAND_ROWS}I")
+
+
+@dataclass
+class Cluster:
+    partition: str
+    ids: List[str]
+    exact: bool
+    # Lowest similarity among the matches that joined the cluster.
+    similarity: float
+
+
+@dataclass
+class _Entry:
+    text: str
+    partition: str
+    key: bytes
+    shingles: FrozenSet[int]
+    bands: Tuple[int, ...]
+
+
+class DuplicateIndex:
+    """Exact and near-duplicate lookups over rows, per partition (language).
+
+    Fed like the attempt views: ``add`` with new rows, ``rebuild`` with all
+    of them after other changes. ``rebuild`` only re-signs rows whose text
+    or partition changed, so it is cheap after the first one. Near matches
+    are confirmed on the exact Jaccard similarity of the word bigrams, which
+    must reach ``threshold``.
+    """
+
+    def __init__(
+        self,
+        field: str = "sentence_text",
+        partition_field: str = "target_lang",
+        partition_default: str = "fr-FR",
+        id_field: str = "id",
+        threshold: float = DEFAULT_THRESHOLD,
+    ):
+        self.field = field
+        self.partition_field = partition_field
+        self.partition_default = partition_default
+        self.id_field = id_field
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+        self._exact: Dict[Tuple[str, bytes], Set[str]] = {}
+        self._buckets: Dict[Tuple[str, int, int], Set[str]] = {}
+
+    def rebuild(self, rows: Iterable[Dict[str, str]]) -> None:
+        with self._lock:
+            seen = set()
+            for row in rows:
+                seen.add(self._put(row))
+            for row_id in set(self._entries) - seen:
+                self._drop(row_id)
+
+    def add(self, rows: Iterable[Dict[str, str]]) -> None:
+        with self._lock:
+            for row in rows:
+                self._put(row)
+
+    def matches(self, row: Dict[str, str]) -> List[Tuple[str, float]]:
+        """``(id, similarity)`` of the other rows duplicating ``row``, closest first."""
+        entry = self._entry(row)
+        row_id = row.get(self.id_field) or ""
+        found: Dict[str, float] = {}
+        with self._lock:
+            for other in self._exact.get((entry.partition, entry.key), ()):
+                found[other] = 1.0
+            for other in self._candidates(entry):
+                if other not in found:
+                    similarity = _jaccard(entry.shingles, self._entries[other].shingles)
+                    if similarity >= self.threshold:
+                        found[other] = similarity
+        found.pop(row_id, None)
+        return sorted(found.items(), key=lambda item: (-item[1], item[0]))
+
+    def clusters(self, partition: Optional[str] = None, near: bool = True) -> List[Cluster]:
+        """Groups of duplicates, largest first; ``near=False`` keeps exact copies only."""
+        parent: Dict[str, str] = {}
+        weakest: Dict[str, float] = {}
+
+        def find(row_id: str) -> str:
+            root = parent.setdefault(row_id, row_id)
+            while root != parent[root]:
+                parent[root] = parent[parent[root]]
+                root = parent[root]
+            return root
+
+        def union(first: str, second: str, similarity: float) -> None:
+            first, second = find(first), find(second)
+            low = min(weakest.get(first, 1.0), weakest.get(second, 1.0), similarity)
+            parent[second] = first
+            weakest[first] = low
+
+        with self._lock:
+            for (value, _), ids in self._exact.items():
+                if len(ids) > 1 and partition in (None, value):
+                    first, *others = sorted(ids)
+                    for other in others:
+                        union(first, other, 1.0)
+            if near:
+                compared: Set[Tuple[str, str]] = set()
+                for (value, _, _), ids in self._buckets.items():
+                    if len(ids) < 2 or partition not in (None, value):
+                        continue
+                    members = sorted(ids)
+                    for position, first in enumerate(members):
+                        for second in members[position + 1 :]:
+                            if (first, second) in compared or find(first) == find(second):
+                                continue
+                            compared.add((first, second))
+                            similarity = _jaccard(
+                                self._entries[first].shingles, self._entries[second].shingles
+                            )
+                            if similarity >= self.threshold:
+                                union(first, second, similarity)
+            groups: Dict[str, List[str]] = {}
+            for row_id in parent:
+                groups.setdefault(find(row_id), []).append(row_id)
+            clusters = []
+            for root, ids in groups.items():
+                if len(ids) < 2:
+                    continue
+                entries = [self._entries[row_id] for row_id in ids]
+                clusters.append(
+                    Cluster(
+                        partition=entries[0].partition,
+                        ids=sorted(ids),
+                        exact=len({entry.key for entry in entries}) == 1,
+                        similarity=weakest.get(root, 1.0),
+                    )
+                )
+        clusters.sort(key=lambda cluster: (-len(cluster.ids), cluster.partition, cluster.ids))
+        return clusters
+
+    def _put(self, row: Dict[str, str]) -> str:
+        row_id = row.get(self.id_field) or ""
+        text = row.get(self.field) or ""
+        partition = row.get(self.partition_field) or self.partition_default
+        current = self._entries.get(row_id)
+        if current is not None:
+            if current.text == text and current.partition == partition:
+                return row_id
+            self._drop(row_id)
+        entry = self._entry(row)
+        self._entries[row_id] = entry
+        if entry.shingles:
+            self._exact.setdefault((partition, entry.key), set()).add(row_id)
+        for band, value in enumerate(entry.bands):
+            self._buckets.setdefault((partition, band, value), set()).add(row_id)
+        return row_id
+
+    def _drop(self, row_id: str) -> None:
+        entry = self._entries.pop(row_id)
+        _discard(self._exact, (entry.partition, entry.key), row_id)
+        for band, value in enumerate(entry.bands):
+            _discard(self._buckets, (entry.partition, band, value), row_id)
+
+    def _candidates(self, entry: _Entry) -> Set[str]:
+        found: Set[str] = set()
+        for band, value in enumerate(entry.bands):
+            found |= self._buckets.get((entry.partition, band, value), set())
+        return found
+
+    def _entry(self, row: Dict[str, str]) -> _Entry:
+        text = row.get(self.field) or ""
+        tokens = tokenize(text)
+        key = hashlib.blake2b(" ".join(tokens).encode("utf-8"), digest_size=16).digest()
+        hashed = [
+            _SHINGLE_HASHES.unpack(
+                hashlib.shake_128(" ".join(gram).encode("utf-8")).digest(_SHINGLE_HASHES.size)
+            )
+            for gram in _shingles(tokens)
+        ]
+        return _Entry(
+            text=text,
+            partition=row.get(self.partition_field) or self.partition_default,
+            key=key,
+            shingles=frozenset(values[0] for values in hashed),
+            bands=_bands(hashed),
+        )
+
+
+def _shingles(tokens: List[str]) -> List[Tuple[str, ...]]:
+    if len(tokens) <= SHINGLE_SIZE:
+        return [tuple(tokens)] if tokens else []
+    return [tuple(tokens[i : i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+
+
+def _bands(hashed: List[Tuple[int, ...]]) -> Tuple[int, ...]:
+    if not hashed:
+        return ()
+    signature = list(map(min, zip(*hashed)))[1:]
+    return tuple(
+        hash(tuple(signature[band * BAND_ROWS : (band + 1) * BAND_ROWS]))
+        for band in range(LSH_BANDS)
+    )
+
+
+def _jaccard(first: FrozenSet[int], second: FrozenSet[int]) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def _discard(postings: Dict, key: object, row_id: str) -> None:
+    ids = postings.get(key)
+    if ids is None:
+        return
+    ids.discard(row_id)
+    if not ids:
+        del postings[key]
@@ -0,0 +1,102 @@
+"""In-process fan-out of new rows to live subscribers (the SSE streams).
+
+Handlers publish the rows they wrote; every subscriber whose filters match
+gets them in its own bounded queue. Subscribers are indexed by their filter
+values, so publishing a row costs a few dict lookups plus one append per
+matching subscriber, whatever else is subscribed, and nothing at all when
+nobody is. A subscriber that lets its queue fill up is dropped rather than
+slowing down the others or holding rows without bound; it is expected to
+reconnect and catch up from the store.
+
+Everything runs on the event loop: ``publish`` is not thread-safe.
+"""
+
+from collections import deque
+from itertools import product
+from typing import Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+import anyio
+
+from .metrics import FEED_DROPPED, FEED_EVENTS, FEED_SUBSCRIBERS
+
+DEFAULT_QUEUE_SIZE = 256
+
+Key = Tuple[Optional[str], ...]
+
+
+class Subscription:
+    """One subscriber's queue of rows; ``overflowed`` once it fell too far behind."""
+
+    def __init__(self, key: Key, queue_size: int):
+        self.key = key
+        self.queue_size = queue_size
+        self.overflowed = False
+        self._rows: Deque[Dict[str, str]] = deque()
+        self._wakeup: Optional[anyio.Event] = None
+
+    async def next(self, timeout: float) -> List[Dict[str, str]]:
+        """The rows queued so far, waiting up to ``timeout`` seconds for one."""
+        if not self._rows and not self.overflowed:
+            self._wakeup = anyio.Event()
+            with anyio.move_on_after(timeout):
+                await self._wakeup.wait()
+            self._wakeup = None
+        rows = list(self._rows)
+        self._rows.clear()
+        return rows
+
+    def _push(self, row: Dict[str, str]) -> bool:
+        if len(self._rows) >= self.queue_size:
+            self.overflowed = True
+            self._rows.clear()
+        else:
+            self._rows.append(row)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return not self.overflowed
+
+
+class Feed:
+    """Rows published to the subscribers filtering on ``fields`` (any subset of them)."""
+
+    def __init__(self, fields: Sequence[str], name: str, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.fields = tuple(fields)
+        self.queue_size = queue_size
+        self._subscriptions: Dict[Key, Set[Subscription]] = {}
+        self._subscribers = FEED_SUBSCRIBERS.labels(name)
+        self._events = FEED_EVENTS.labels(name)
+        self._dropped = FEED_DROPPED.labels(name)
+
+    def subscribe(self, filters: Optional[Dict[str, str]] = None) -> Subscription:
+        """Subscribe to the rows matching every ``field=value`` of ``filters``."""
+        filters = filters or {}
+        unknown = set(filters) - set(self.fields)
+        if unknown:
+            raise ValueError(f"Cannot filter a feed on {sorted(unknown)}")
+        key = tuple(filters.get(field) for field in self.fields)
+        subscription = Subscription(key, self.queue_size)
+        self._subscriptions.setdefault(key, set()).add(subscription)
+        self._subscribers.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.key)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.key]
+        self._subscribers.dec()
+
+    def publish(self, rows: Sequence[Dict[str, str]]) -> None:
+        if not self._subscriptions:
+            return
+        for row in rows:
+            values = [(row.get(field) or "", None) for field in self.fields]
+            # The row's values or "any", per field: 2 ** len(fields) lookups.
+            for key in product(*values):
+                for subscription in list(self._subscriptions.get(key, ())):
+                    self._events.inc()
+                    if not subscription._push(row):
+                        self._dropped.inc()
+                        self.unsubscribe(subscription)
@@ -0,0 +1,118 @@
+import codecs
+import csv
+import io
+import uuid
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional
+
+from pydantic import ValidationError
+
+from .models import Sentence, now_iso
+
+REQUIRED_COLUMNS = {"sentence_text", "target_lang"}
+MAX_REPORTED_ERRORS = 100
+# Bytes decoded at a time when checking that an upload is UTF-8.
+CHECK_CHUNK_SIZE = 1 << 16
+
+
+class CSVImportError(ValueError):
+    """The upload as a whole is unusable (encoding, header, no valid rows)."""
+
+
+@dataclass
+class ImportReport:
+    valid: int = 0
+    error_count: int = 0
+    errors: List[Dict[str, object]] = field(default_factory=list)
+
+    def add_error(self, line: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+
+def iter_sentences(
+    fp: BinaryIO,
+    report: ImportReport,
+    existing: Optional[Callable[[str], Optional[Dict[str, str]]]] = None,
+    fresh_ids: bool = False,
+) -> Iterator[Sentence]:
+    """Parse and validate an uploaded sentence CSV incrementally.
+
+    The file is decoded and parsed in buffered chunks; invalid rows are
+    recorded in ``report`` and skipped. ``existing`` looks up a stored row by
+    id so that upserts keep the original ``created_at``; with ``fresh_ids``
+    rows whose id is already taken get a new one instead. Raises
+    :class:`CSVImportError` when the upload cannot be used at all: before
+    the first row for a bad encoding or header (``fp`` is read through once
+    to check it is UTF-8, so it must be seekable), after the last one when
+    none was valid.
+    """
+    _check_utf8(fp)
+    text = io.TextIOWrapper(fp, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text)
+        if reader.fieldnames is None:
+            raise CSVImportError("CSV missing header row")
+        missing = REQUIRED_COLUMNS - set(reader.fieldnames)
+        if missing:
+            raise CSVImportError(f"CSV missing required columns: {', '.join(sorted(missing))}")
+        seen = set()
+        for raw_row in reader:
+            row = {name: (value or "").strip() for name, value in raw_row.items() if name}
+            sentence = _validate(row, reader.line_num, report, existing, fresh_ids, seen)
+            if sentence is not None:
+                seen.add(sentence.id)
+                report.valid += 1
+                yield sentence
+        if not report.valid:
+            raise CSVImportError("No valid sentences found in CSV")
+    finally:
+        text.detach()
+
+
+def _check_utf8(fp: BinaryIO) -> None:
+    """Decode all of ``fp`` a chunk at a time, then rewind it."""
+    start = fp.tell()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for chunk in iter(lambda: fp.read(CHECK_CHUNK_SIZE), b""):
+            decoder.decode(chunk)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError as exc:
+        raise CSVImportError("File must be UTF-8 encoded") from exc
+    finally:
+        fp.seek(start)
+
+
+def _validate(
+    row: Dict[str, str],
+    line: int,
+    report: ImportReport,
+    existing: Optional[Callable[[str], Optional[Dict[str, str]]]],
+    fresh_ids: bool,
+    seen: set,
+) -> Optional[Sentence]:
+    if not row.get("sentence_text"):
+        report.add_error(line, "sentence_text is required")
+        return None
+    row_id = row.get("id") or ""
+    current = existing(row_id) if existing and row_id else None
+    if fresh_ids and (current is not None or row_id in seen):
+        row_id, current = "", None
+    try:
+        return Sentence(
+            id=row_id or str(uuid.uuid4()),
+            sentence_text=row["sentence_text"],
+            target_lang=row.get("target_lang") or "fr-FR",
+            translation_text=row.get("translation_text") or None,
+            translation_lang=row.get("translation_lang") or "zh-CN",
+            difficulty=row.get("difficulty") or "medium",
+            tags=row.get("tags") or "",
+            created_at=row.get("created_at") or (current or {}).get("created_at") or now_iso(),
+            updated_at=row.get("updated_at") or now_iso(),
+        )
+    except ValidationError as exc:
+        messages = [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in exc.errors()]
+        report.add_error(line, "; ".join(messages))
+        return None
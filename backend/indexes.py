@@ -0,0 +1,182 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Sequence, Set
+
+from .text import cjk_ngrams, search_pieces
+
+
+class RowIndex(ABC):
+    """Incrementally maintained view over the rows of a store.
+
+    The store calls :meth:`add`/:meth:`remove` for every row it caches or drops
+    (keyed by the row's cache key) and :meth:`clear` before a full reload.
+    Indexes that answer queries also implement :meth:`lookup`, and are found by
+    the store under :attr:`name`.
+    """
+
+    name: str = ""
+
+    @abstractmethod
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def add(self, key: str, row: Dict[str, str]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def remove(self, key: str, row: Dict[str, str]) -> None:
+        raise NotImplementedError
+
+    def lookup(self, value: str) -> Set[str]:
+        raise NotImplementedError(f"{type(self).__name__} does not answer queries")
+
+
+class HashIndex(RowIndex):
+    """Exact-match index on one column: value -> set of row keys.
+
+    Empty cells are indexed under ``default`` so lookups agree with the API
+    models, which fill the same defaults in.
+    """
+
+    def __init__(self, field: str, default: str = "", name: Optional[str] = None):
+        self.field = field
+        self.default = default
+        self.name = name or field
+        self._postings: Dict[str, Set[str]] = {}
+
+    def clear(self) -> None:
+        self._postings = {}
+
+    def add(self, key: str, row: Dict[str, str]) -> None:
+        self._postings.setdefault(self._value(row), set()).add(key)
+
+    def remove(self, key: str, row: Dict[str, str]) -> None:
+        value = self._value(row)
+        postings = self._postings.get(value)
+        if postings is None:
+            return
+        postings.discard(key)
+        if not postings:
+            del self._postings[value]
+
+    def lookup(self, value: str) -> Set[str]:
+        return self._postings.get(value, set())
+
+    def _value(self, row: Dict[str, str]) -> str:
+        return row.get(self.field) or self.default
+
+
+class TagIndex(RowIndex):
+    """Inverted index over a comma-separated column (case-insensitive)."""
+
+    def __init__(self, field: str = "tags", name: str = "tag"):
+        self.field = field
+        self.name = name
+        self._postings: Dict[str, Set[str]] = {}
+
+    def clear(self) -> None:
+        self._postings = {}
+
+    def add(self, key: str, row: Dict[str, str]) -> None:
+        for tag in split_tags(row.get(self.field)):
+            self._postings.setdefault(tag, set()).add(key)
+
+    def remove(self, key: str, row: Dict[str, str]) -> None:
+        for tag in split_tags(row.get(self.field)):
+            postings = self._postings.get(tag)
+            if postings is None:
+                continue
+            postings.discard(key)
+            if not postings:
+                del self._postings[tag]
+
+    def lookup(self, value: str) -> Set[str]:
+        return self._postings.get(value.strip().casefold(), set())
+
+
+class TextIndex(RowIndex):
+    """Token inverted index for full-text search over a few columns.
+
+    Text goes through the same normalization as the scoring tokenizer, plus
+    accent folding, so ``ete`` finds ``été``. CJK runs are indexed as
+    character unigrams and bigrams. A query matches rows containing every
+    query word: Latin words match as prefixes (via a sorted vocabulary), CJK
+    words must contain all of their bigrams.
+    """
+
+    def __init__(
+        self,
+        fields: Sequence[str] = ("sentence_text", "translation_text"),
+        name: str = "search",
+    ):
+        self.fields = tuple(fields)
+        self.name = name
+        self._postings: Dict[str, Set[str]] = {}
+        self._vocabulary: List[str] = []
+
+    def clear(self) -> None:
+        self._postings = {}
+        self._vocabulary = []
+
+    def add(self, key: str, row: Dict[str, str]) -> None:
+        for term in self.terms(row):
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = set()
+                insort(self._vocabulary, term)
+            postings.add(key)
+
+    def remove(self, key: str, row: Dict[str, str]) -> None:
+        for term in self.terms(row):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.discard(key)
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect_left(self._vocabulary, term)]
+
+    def lookup(self, value: str) -> Set[str]:
+        matched: Optional[Set[str]] = None
+        for piece, is_cjk in search_pieces(value):
+            if is_cjk:
+                found = self._intersect(cjk_ngrams(piece, unigrams=False))
+            else:
+                found = self._prefix(piece)
+            matched = found if matched is None else matched & found
+            if not matched:
+                return set()
+        return matched or set()
+
+    def terms(self, row: Dict[str, str]) -> Set[str]:
+        text = " ".join(row.get(field) or "" for field in self.fields)
+        terms: Set[str] = set()
+        for piece, is_cjk in search_pieces(text):
+            if is_cjk:
+                terms.update(cjk_ngrams(piece))
+            else:
+                terms.add(piece)
+        return terms
+
+    def _intersect(self, terms: List[str]) -> Set[str]:
+        postings = sorted((self._postings.get(term, set()) for term in terms), key=len)
+        found = set(postings[0])
+        for other in postings[1:]:
+            found &= other
+        return found
+
+    def _prefix(self, prefix: str) -> Set[str]:
+        found: Set[str] = set()
+        position = bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary):
+            term = self._vocabulary[position]
+            if not term.startswith(prefix):
+                break
+            found |= self._postings[term]
+            position += 1
+        return found
+
+
+def split_tags(value: Optional[str]) -> Set[str]:
+    return {tag.strip().casefold() for tag in (value or "").split(",") if tag.strip()}
@@ -0,0 +1,325 @@
+"""Process-local metrics, exposed in the Prometheus text format at ``/metrics``.
+
+A small stand-in for ``prometheus_client``: counters, gauges and histograms
+with labels, registered in :data:`REGISTRY` and rendered by
+:meth:`Registry.render`. Each worker process keeps its own values. Counter
+names end in ``_total``, which the HELP and TYPE lines carry as well: that is
+how the 0.0.4 text format recognises a counter's samples.
+"""
+
+import bisect
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Finer at the low end: cached reads and appends take well under a millisecond.
+STORE_BUCKETS = (0.0001, 0.00025, 0.0005) + HTTP_BUCKETS
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List["Metric"] = []
+
+    def register(self, metric: "Metric") -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Metric(ABC):
+    kind = ""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        registry: Registry = REGISTRY,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+        registry.register(self)
+
+    def labels(self, *values: str) -> Any:
+        """The child holding the value for these label values (created on first use)."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            yield from self._child_samples(_label_pairs(self.labelnames, values), child)
+
+    @abstractmethod
+    def _new_child(self) -> object:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _child_samples(self, labels: List[str], child: object) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        registry: Registry = REGISTRY,
+    ):
+        if not name.endswith("_total"):
+            raise ValueError(f"Counter names end in _total, not {name!r}")
+        super().__init__(name, help, labelnames, registry)
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def _child_samples(self, labels: List[str], child: _Value) -> Iterator[str]:
+        yield f"{self.name}{_braces(labels)} {_number(child.value)}"
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def _child_samples(self, labels: List[str], child: _Value) -> Iterator[str]:
+        yield f"{self.name}{_braces(labels)} {_number(child.value)}"
+
+
+class _Buckets:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        slot = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[slot] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = HTTP_BUCKETS,
+        registry: Registry = REGISTRY,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames, registry)
+
+    def _new_child(self) -> _Buckets:
+        return _Buckets(self.buckets)
+
+    def _child_samples(self, labels: List[str], child: _Buckets) -> Iterator[str]:
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            le = "+Inf" if bound == math.inf else _number(bound)
+            bucket_labels = labels + _label_pairs(["le"], [le])
+            yield f"{self.name}_bucket{_braces(bucket_labels)} {cumulative}"
+        yield f"{self.name}_sum{_braces(labels)} {_number(total)}"
+        yield f"{self.name}_count{_braces(labels)} {cumulative}"
+
+
+def _label_pairs(names: Sequence[str], values: Sequence[str]) -> List[str]:
+    return [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+
+
+def _braces(labels: List[str]) -> str:
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+# HTTP --------------------------------------------------------------------------
+
+HTTP_REQUESTS = Counter(
+    "ecoute_http_requests_total",
+    "HTTP requests by route and status.",
+    ("method", "route", "status"),
+)
+HTTP_DURATION = Histogram(
+    "ecoute_http_request_duration_seconds",
+    "Time from request to the last byte of the response.",
+    ("method", "route"),
+)
+HTTP_IN_FLIGHT = Gauge(
+    "ecoute_http_requests_in_flight", "Requests being handled.", ("method", "route")
+)
+
+# Stores ------------------------------------------------------------------------
+
+STORE_LOCK_WAIT = Histogram(
+    "ecoute_store_lock_wait_seconds",
+    "Time spent waiting for a store's lock (threads, then other processes).",
+    ("store",),
+    buckets=STORE_BUCKETS,
+)
+STORE_PARSE = Histogram(
+    "ecoute_store_parse_seconds",
+    "Time spent reading and parsing store files (full loads and appended tails).",
+    ("store",),
+    buckets=STORE_BUCKETS,
+)
+STORE_WRITE = Histogram(
+    "ecoute_store_write_seconds",
+    "Time spent writing (and syncing) store files, by kind of write.",
+    ("store", "op"),
+    buckets=STORE_BUCKETS,
+)
+STORE_ROWS_PARSED = Counter(
+    "ecoute_store_rows_parsed_total", "Rows parsed from files.", ("store",)
+)
+STORE_BYTES_READ = Counter("ecoute_store_bytes_read_total", "Bytes read from files.", ("store",))
+STORE_BYTES_WRITTEN = Counter(
+    "ecoute_store_bytes_written_total", "Bytes written to files.", ("store",)
+)
+STORE_ROWS = Gauge("ecoute_store_rows", "Rows held in a store's cache.", ("store",))
+
+
+# Live feeds --------------------------------------------------------------------
+
+FEED_SUBSCRIBERS = Gauge("ecoute_feed_subscribers", "Live subscribers of a feed.", ("feed",))
+FEED_EVENTS = Counter(
+    "ecoute_feed_events_total", "Rows queued for feed subscribers.", ("feed",)
+)
+FEED_DROPPED = Counter(
+    "ecoute_feed_dropped_total", "Subscribers dropped for falling too far behind.", ("feed",)
+)
+
+
+class StoreMetrics:
+    """The metric children of one store, looked up once."""
+
+    def __init__(self, store: str):
+        self.lock_wait = STORE_LOCK_WAIT.labels(store)
+        self.parse = STORE_PARSE.labels(store)
+        self.write_append = STORE_WRITE.labels(store, "append")
+        self.write_journal = STORE_WRITE.labels(store, "journal")
+        self.write_rewrite = STORE_WRITE.labels(store, "rewrite")
+        self.rows_parsed = STORE_ROWS_PARSED.labels(store)
+        self.bytes_read = STORE_BYTES_READ.labels(store)
+        self.bytes_written = STORE_BYTES_WRITTEN.labels(store)
+        self.rows = STORE_ROWS.labels(store)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status counts and requests in flight.
+
+    Routes are labelled by their path template (``/api/sentences/{sentence_id}``),
+    so the label set stays small; unmatched paths share one label. The route
+    is matched before the request is handled, the way the router will match
+    it, so that requests in flight are counted per route too.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        route = _route_template(scope)
+        in_flight = HTTP_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec()
+            HTTP_DURATION.labels(method, route).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+
+
+def _route_template(scope: Scope) -> str:
+    """The path template of the route the app's router will pick for ``scope``."""
+    partial = None
+    for route in getattr(getattr(scope.get("app"), "router", None), "routes", ()):
+        match, _ = route.matches(scope)
+        if match is Match.FULL:
+            return route.path
+        if match is Match.PARTIAL and partial is None:
+            partial = route
+    return partial.path if partial is not None else "unmatched"
@@ -35,12 +35,57 @@ class SentenceUpdate(BaseModel):
     tags: Optional[str] = None
 
 
+class SentenceFilter(BaseModel):
+    difficulty: Optional[Difficulty] = None
+    target_lang: Optional[str] = None
+    translation_lang: Optional[str] = None
+    tag: Optional[str] = None
+    search: Optional[str] = None
+
+
+class BulkOperation(BaseModel):
+    """One step of ``POST /api/sentences/bulk``.
+
+    ``create`` takes ``sentence`` (and an optional ``id``); ``update`` takes
+    ``changes`` and ``delete`` nothing more, both aimed at one sentence by
+    ``id`` or at every sentence matching ``where``.
+    """
+
+    op: Literal["create", "update", "delete"]
+    id: Optional[str] = None
+    where: Optional[SentenceFilter] = None
+    sentence: Optional[SentenceCreate] = None
+    changes: Optional[SentenceUpdate] = None
+
+
+class BulkResult(BaseModel):
+    index: int
+    op: Literal["create", "update", "delete"]
+    ids: List[str] = Field(default_factory=list)
+    error: Optional[str] = None
+
+
+class BulkReport(BaseModel):
+    applied: bool
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+    results: List[BulkResult]
+
+
 class Sentence(SentenceBase):
     id: str
     created_at: str = Field(default_factory=now_iso)
     updated_at: str = Field(default_factory=now_iso)
 
 
+class DuplicateCluster(BaseModel):
+    target_lang: str
+    exact: bool
+    similarity: float
+    sentences: List[Sentence]
+
+
 class DiffToken(BaseModel):
     op: Literal["match", "sub", "del", "ins"]
     ref: Optional[str] = None
@@ -78,3 +123,57 @@ class AttemptCreate(AttemptBase):
 class Attempt(AttemptBase):
     id: str
     created_at: str = Field(default_factory=now_iso)
+
+
+class RescorePair(BaseModel):
+    reference: str
+    asr_text: str
+
+
+class RescoreRequest(BaseModel):
+    items: List[RescorePair] = Field(..., max_length=10000)
+
+
+class RescoreResult(BaseModel):
+    score: float
+    accuracy: float
+    words_total: int
+    words_correct: int
+    diff_json: List[DiffToken]
+
+
+class StatsGroup(BaseModel):
+    key: str
+    attempts: int
+    mean_score: float
+    best_score: float
+    word_accuracy: float
+    mean_duration_ms: float
+
+
+class StatsReport(BaseModel):
+    group_by: Literal["sentence", "target_lang", "difficulty", "day"]
+    totals: StatsGroup
+    groups: List[StatsGroup]
+
+
+class Substitution(BaseModel):
+    hyp: str
+    count: int
+
+
+class WordStat(BaseModel):
+    word: str
+    misses: int
+    seen: int
+    miss_rate: float
+    substitutions: List[Substitution]
+    sentence_ids: List[str]
+
+
+class PracticeItem(BaseModel):
+    sentence: Sentence
+    new: bool
+    due_at: Optional[str] = None
+    interval_days: float = 0.0
+    repetitions: int = 0
@@ -0,0 +1,117 @@
+"""Opt-in cProfile dumps of slow requests.
+
+With ``ECOUTE_PROFILE_SLOW_MS`` set, :class:`SlowRequestProfiler` profiles
+every request and keeps those slower than the threshold: the stats go to
+``<dir>/<time>-<method>-<path>-<ms>ms.prof`` (open with ``pstats`` or
+snakeviz) next to a ``.txt`` summary of the top functions by cumulative
+time. Store calls offloaded to worker threads by :mod:`backend.aio` are
+profiled and merged in too. Requests are served one at a time while it is
+enabled, since a thread can only run one profiler; it is a debugging aid,
+not something to leave on in production. Long-lived responses (event
+streams) are left out, or they would hold up every other request.
+"""
+
+import cProfile
+import functools
+import io
+import pstats
+import re
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Collection, List, Optional, TypeVar
+
+import anyio
+import anyio.to_thread
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+PROFILE_ENV = "ECOUTE_PROFILE_SLOW_MS"
+PROFILE_DIR_ENV = "ECOUTE_PROFILE_DIR"
+SUMMARY_LINES = 40
+
+T = TypeVar("T")
+
+
+class RequestProfile:
+    """Profiles gathered from the threads that worked on one request."""
+
+    def __init__(self) -> None:
+        self.profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def run(self, func: Callable[..., T], *args: object) -> T:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+: the request's profiler already sees every thread.
+            return func(*args)
+        try:
+            return func(*args)
+        finally:
+            profile.disable()
+            with self._lock:
+                self.profiles.append(profile)
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+def profiled(func: Callable[..., T]) -> Callable[..., T]:
+    """``func``, profiled as part of the current request when it is being profiled."""
+    profile = _current.get()
+    if profile is None:
+        return func
+    return functools.partial(profile.run, func)
+
+
+class SlowRequestProfiler:
+    def __init__(
+        self,
+        app: ASGIApp,
+        threshold_ms: float,
+        directory: Path,
+        exclude: Collection[str] = (),
+    ):
+        self.app = app
+        self.threshold = threshold_ms / 1000
+        self.directory = Path(directory)
+        self.exclude = frozenset(exclude)
+        self._serial = anyio.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+        async with self._serial:
+            request = RequestProfile()
+            token = _current.set(request)
+            main = cProfile.Profile()
+            started = time.perf_counter()
+            main.enable()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                main.disable()
+                _current.reset(token)
+                elapsed = time.perf_counter() - started
+                if elapsed >= self.threshold:
+                    profiles = [main] + request.profiles
+                    await anyio.to_thread.run_sync(self._dump, scope, elapsed, profiles)
+
+    def _dump(self, scope: Scope, elapsed: float, profiles: List[cProfile.Profile]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+        stem = f"{datetime.now():%Y%m%d-%H%M%S}-{scope['method']}-{slug}-{elapsed * 1000:.0f}ms"
+        summary = io.StringIO()
+        stats = pstats.Stats(profiles[0], stream=summary)
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(self.directory / f"{stem}.prof")
+        query = scope.get("query_string", b"").decode("latin-1")
+        summary.write(f"{scope['method']} {scope['path']}{'?' + query if query else ''}")
+        summary.write(f" took {elapsed * 1000:.1f} ms\n")
+        stats.sort_stats("cumulative").print_stats(SUMMARY_LINES)
+        (self.directory / f"{stem}.txt").write_text(summary.getvalue(), encoding="utf-8")
@@ -0,0 +1,158 @@
+"""Fast-path JSON encoding of stored rows for the listing endpoints.
+
+Rows read back from a store were validated when they were written, so the
+listings skip the pydantic models: each row becomes a small ``__slots__``
+record that is encoded straight to JSON bytes (with ``orjson`` when it is
+installed). An attempt's ``diff_json`` column already holds the JSON array,
+encoded when the attempt was written, and is spliced into the output as is
+unless parsed tokens are requested.
+"""
+
+import json
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import Response
+
+from .changelog import Delta
+from .models import now_iso
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+
+def dumps(value: object) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class JSONBytesResponse(Response):
+    """A response whose body is JSON that has already been encoded."""
+
+    media_type = "application/json"
+
+
+class SentenceRecord:
+    __slots__ = (
+        "id",
+        "target_lang",
+        "sentence_text",
+        "translation_lang",
+        "translation_text",
+        "difficulty",
+        "tags",
+        "created_at",
+        "updated_at",
+    )
+
+    def __init__(self, row: Dict[str, str]):
+        self.id = row.get("id") or str(uuid.uuid4())
+        self.target_lang = row.get("target_lang") or "fr-FR"
+        self.sentence_text = row.get("sentence_text") or ""
+        self.translation_lang = row.get("translation_lang") or "zh-CN"
+        self.translation_text = row.get("translation_text") or None
+        self.difficulty = row.get("difficulty") or "medium"
+        self.tags = row.get("tags") or ""
+        self.created_at = row.get("created_at") or now_iso()
+        self.updated_at = row.get("updated_at") or now_iso()
+
+    def to_json(self) -> bytes:
+        return dumps({name: getattr(self, name) for name in self.__slots__})
+
+    def values(self) -> List[Optional[str]]:
+        return [getattr(self, name) for name in self.__slots__]
+
+
+class AttemptRecord:
+    __slots__ = (
+        "id",
+        "sentence_id",
+        "target_lang",
+        "asr_lang",
+        "asr_text",
+        "score",
+        "words_total",
+        "words_correct",
+        "duration_ms",
+        "created_at",
+        "diff_json",
+    )
+
+    def __init__(self, row: Dict[str, str]):
+        self.id = row.get("id") or str(uuid.uuid4())
+        self.sentence_id = row.get("sentence_id") or ""
+        self.target_lang = row.get("target_lang") or "fr-FR"
+        self.asr_lang = row.get("asr_lang") or self.target_lang
+        self.asr_text = row.get("asr_text") or ""
+        self.score = float(row.get("score") or 0)
+        self.words_total = int(row.get("words_total") or 0)
+        self.words_correct = int(row.get("words_correct") or 0)
+        self.duration_ms = int(row.get("duration_ms") or 0)
+        self.created_at = row.get("created_at") or now_iso()
+        self.diff_json = (row.get("diff_json") or "").strip()
+
+    def to_json(self, parse_diff: bool = False) -> bytes:
+        fields = {name: getattr(self, name) for name in self.__slots__[:-1]}
+        if parse_diff:
+            fields["diff_json"] = parse_diff_tokens(self.diff_json)
+            return dumps(fields)
+        diff = self.diff_json
+        # Written by the API as a JSON array; anything else reads as no diff.
+        if not (diff.startswith("[") and diff.endswith("]")):
+            diff = "[]"
+        return dumps(fields)[:-1] + b',"diff_json":' + diff.encode("utf-8") + b"}"
+
+
+def parse_diff_tokens(raw: str) -> List[Dict[str, Optional[str]]]:
+    try:
+        tokens = json.loads(raw or "[]")
+    except json.JSONDecodeError:
+        return []
+    if not isinstance(tokens, list):
+        return []
+    return [
+        {"op": token.get("op"), "ref": token.get("ref"), "hyp": token.get("hyp")}
+        for token in tokens
+        if isinstance(token, dict)
+    ]
+
+
+def encode_list(items: Iterable[bytes]) -> bytes:
+    return b"[" + b",".join(items) + b"]"
+
+
+def sentences_response(rows: Iterable[Dict[str, str]]) -> JSONBytesResponse:
+    return JSONBytesResponse(encode_list(SentenceRecord(row).to_json() for row in rows))
+
+
+def attempts_response(
+    rows: Iterable[Dict[str, str]], parse_diff: bool = False
+) -> JSONBytesResponse:
+    return JSONBytesResponse(
+        encode_list(AttemptRecord(row).to_json(parse_diff) for row in rows)
+    )
+
+
+def sync_response(delta: Delta) -> JSONBytesResponse:
+    """A sentence delta, each upsert as an array of values in ``fields`` order."""
+    return JSONBytesResponse(
+        dumps(
+            {
+                "epoch": delta.epoch,
+                "version": delta.version,
+                "reset": delta.reset,
+                "fields": list(SentenceRecord.__slots__),
+                "upserts": [SentenceRecord(row).values() for row in delta.upserts],
+                "deleted": delta.deleted,
+            }
+        )
+    )
+
+
+def sse_event(event_id: str, event: str, data: bytes) -> bytes:
+    """One Server-Sent Events message (``data`` split over lines as the format wants)."""
+    head = f"id: {event_id}\nevent: {event}\n".encode("utf-8")
+    return head + b"".join(b"data: " + line + b"\n" for line in data.split(b"\n")) + b"\n"
@@ -0,0 +1,139 @@
+"""SM-2 style review scheduling of sentences, derived from the attempt history."""
+
+import heapq
+import threading
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .columnar import CODE, FLOAT, TIME, Columns
+
+DAY_SECONDS = 86400.0
+START_EASE = 2.5
+MIN_EASE = 1.3
+# A failed sentence comes back within the same session rather than tomorrow.
+RELEARN_INTERVAL_DAYS = 10 / (24 * 60)
+# The attempt fields read, for Columns.from_rows.
+COLUMNS = {"sentence_id": CODE, "target_lang": CODE, "score": FLOAT, "created_at": TIME}
+
+
+@dataclass
+class Card:
+    repetitions: int = 0
+    interval_days: float = 0.0
+    ease: float = START_EASE
+    due: float = 0.0
+
+    def review(self, score: float, at: float) -> None:
+        """Apply one attempt (``score`` in [0, 1]) made at epoch time ``at``."""
+        quality = round(5 * score)
+        if quality < 3:
+            self.repetitions = 0
+            self.interval_days = RELEARN_INTERVAL_DAYS
+        else:
+            self.repetitions += 1
+            if self.repetitions == 1:
+                self.interval_days = 1.0
+            elif self.repetitions == 2:
+                self.interval_days = 6.0
+            else:
+                self.interval_days *= self.ease
+        self.ease = max(MIN_EASE, self.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        self.due = at + self.interval_days * DAY_SECONDS
+
+
+class ReviewScheduler:
+    """Per-language heaps of ``(due, sentence_id)`` over the practised sentences.
+
+    Each attempt updates its sentence's :class:`Card` and pushes a fresh heap
+    entry (O(log N)); the entry it supersedes stays in the heap and is
+    skipped when it surfaces, and a heap is rebuilt once stale entries
+    outnumber live ones.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._cards: Dict[str, Dict[str, Card]] = {}
+        self._heaps: Dict[str, List[Tuple[float, str]]] = {}
+
+    def rebuild(self, rows: Iterable[Dict[str, str]]) -> None:
+        self.rebuild_columns([Columns.from_rows(rows, COLUMNS)])
+
+    def add(self, rows: Iterable[Dict[str, str]]) -> None:
+        """Apply attempt rows, oldest first."""
+        self.add_columns(Columns.from_rows(rows, COLUMNS))
+
+    def rebuild_columns(self, blocks: Iterable[Columns]) -> None:
+        """Start over from column blocks holding each sentence's attempts oldest first."""
+        with self._lock:
+            self._cards, self._heaps = {}, {}
+            for columns in blocks:
+                self._add(columns)
+
+    def add_columns(self, columns: Columns) -> None:
+        with self._lock:
+            self._add(columns)
+
+    def next_due(
+        self,
+        target_lang: str,
+        n: int,
+        is_live: Callable[[str], bool],
+        new_ids: Iterable[str],
+        now: Optional[float] = None,
+    ) -> List[Tuple[str, Optional[Card]]]:
+        """Pick the next ``n`` sentences to practise in ``target_lang``.
+
+        Overdue sentences come first (most overdue first), then never
+        practised ones taken from ``new_ids``, then the soonest upcoming
+        reviews. Scheduled sentences for which ``is_live`` is false (deleted,
+        or moved to another language) are forgotten.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            cards = self._cards.get(target_lang, {})
+            heap = self._heaps.get(target_lang, [])
+            scheduled: Dict[str, Card] = {}
+            popped: List[Tuple[float, str]] = []
+            while heap and len(scheduled) < n:
+                due, sentence_id = heapq.heappop(heap)
+                card = cards.get(sentence_id)
+                if card is None or card.due != due or sentence_id in scheduled:
+                    continue
+                if not is_live(sentence_id):
+                    del cards[sentence_id]
+                    continue
+                scheduled[sentence_id] = card
+                popped.append((due, sentence_id))
+            for entry in popped:
+                heapq.heappush(heap, entry)
+
+            overdue = [(key, card) for key, card in scheduled.items() if card.due <= now]
+            upcoming = [(key, card) for key, card in scheduled.items() if card.due > now]
+            fresh = (sentence_id for sentence_id in new_ids if sentence_id not in cards)
+            picked: List[Tuple[str, Optional[Card]]] = list(overdue)
+            picked += [(sentence_id, None) for sentence_id in islice(fresh, n - len(picked))]
+            return picked + upcoming[: n - len(picked)]
+
+    def _add(self, columns: Columns) -> None:
+        languages = columns.codes("target_lang")
+        rows = zip(
+            languages.codes,
+            columns.text("sentence_id"),
+            columns.numbers("score"),
+            columns.numbers("created_at"),
+        )
+        for language, sentence_id, score, at in rows:
+            target_lang = languages.values[language] or "fr-FR"
+            cards = self._cards.setdefault(target_lang, {})
+            card = cards.get(sentence_id)
+            if card is None:
+                card = cards[sentence_id] = Card()
+            # NaN when the timestamp could not be parsed.
+            card.review(score, at if at == at else time.time())
+            heap = self._heaps.setdefault(target_lang, [])
+            heapq.heappush(heap, (card.due, sentence_id))
+            if len(heap) > 2 * len(cards) + 64:
+                self._heaps[target_lang] = heap = [(card.due, key) for key, card in cards.items()]
+                heapq.heapify(heap)
@@ -0,0 +1,687 @@
+import heapq
+import itertools
+import json
+import math
+import os
+import re
+import threading
+from contextlib import ExitStack, contextmanager
+from operator import itemgetter
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from filelock import FileLock
+
+from .columnar import Columns, CorruptSnapshot
+from .csv_store import CSVStore, Generation
+from .indexes import RowIndex
+from .storage import Plan, Store
+
+MANIFEST = "manifest.json"
+# Month of rows whose date is missing or malformed; sorts before real months.
+UNDATED = "0000-00"
+
+_MONTH = re.compile(r"\d{4}-\d{2}")
+_CHECKSUM_MASK = (1 << 64) - 1
+
+Listener = Callable[[Optional[List[Dict[str, str]]]], None]
+Entry = Dict[str, object]
+
+
+class ShardedStore(Store):
+    """Rows split into one :class:`CSVStore` shard per (partition value, month).
+
+    A row goes to ``<directory>/<value>/<YYYY-MM>.csv`` according to its
+    ``partition_field`` (``partition_default`` when empty) and the month of
+    its ``date_field``; ``manifest.json`` lists the shards. ``order_by`` must
+    start with ``date_field``, so shards of different months never
+    interleave: reads only query the shards whose value and months can match
+    ``where`` and ``after``, and merge them a month at a time. ``iter_rows``
+    moves on to the next month only once the previous one is exhausted.
+
+    When a newer month appears, older shards are sealed: their journal is
+    folded into the base file, their row count and date range are recorded in
+    the manifest, and they are no longer stat'ed for outside edits. Writing
+    to a sealed shard (a late or edited row) unseals it first. A write
+    spanning several shards is not atomic across them; :meth:`apply` keeps
+    other writers out until all of its shards are written.
+
+    With ``columns`` (field kinds, see :mod:`backend.columnar`), sealing a
+    shard also writes a column snapshot of it next to its file. A sealed
+    shard with a current snapshot is not parsed when the store is first
+    read: :meth:`iter_columns`, unfiltered counts and full scans are served
+    from the memory-mapped snapshot, and the shard itself is only loaded
+    by the first query that needs its indexes (or a lookup by id, which
+    loads every shard). Other shards are loaded the first time the store is
+    read, as the single file used to be; after that a query only pays for
+    the shards it matches.
+
+    ``indexes`` is called once per shard for its own index instances. With
+    ``legacy`` set, a directory without a manifest is first filled from that
+    single-file store, which is left in place and no longer read.
+
+    :meth:`subscribe` listeners get the rows appended to any shard. A shard
+    rewritten by another process, or a write that was not an append, is
+    reported as ``None`` once the call that noticed it is done rather than
+    from inside the shard's lock, so the listener can read the store. Rows
+    that arrive while that ``None`` is being handled lead to another one.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        fieldnames: List[str],
+        id_field: str = "id",
+        partition_field: str = "target_lang",
+        partition_default: str = "",
+        date_field: str = "created_at",
+        indexes: Callable[[], Sequence[RowIndex]] = tuple,
+        order_by: Sequence[str] = ("created_at", "id"),
+        group_commit_window: float = 0.0,
+        stat_interval: float = 0.0,
+        legacy: Optional[Path] = None,
+        columns: Optional[Dict[str, str]] = None,
+    ):
+        if tuple(order_by)[:1] != (date_field,):
+            raise ValueError(f"order_by must start with {date_field!r}")
+        self.directory = Path(directory)
+        self.fieldnames = fieldnames
+        self.id_field = id_field
+        self.partition_field = partition_field
+        self.partition_default = partition_default
+        self.date_field = date_field
+        self.order_by = tuple(order_by)
+        # Rows are stored with every field filled in, so no value is ever None.
+        self._sort_key = itemgetter(*self.order_by)
+        self.stat_interval = stat_interval
+        self._make_indexes = indexes
+        self.columns = dict(columns) if columns is not None else None
+        self._group_commit_window = group_commit_window
+        self.manifest_path = self.directory / MANIFEST
+        self._file_lock = FileLock(str(self.manifest_path) + ".lock")
+        # Guards the shard table below; never held while waiting for a shard's
+        # lock from inside that shard (listeners do not take it).
+        self._lock = threading.RLock()
+        self._entries: Dict[str, Entry] = {}
+        self._shards: Dict[str, CSVStore] = {}
+        self._snapshots: Dict[str, Columns] = {}
+        # Sealed shards not loaded yet, whose rows their snapshot stands for.
+        self._covered: Set[str] = set()
+        self._names: Dict[Tuple[str, str], str] = {}
+        self._seen_generation: Optional[int] = None
+        self._listeners: List[Listener] = []
+        self._deliver_lock = threading.Lock()
+        self._resetting = threading.Lock()
+        self._reset_pending = True
+        self._rebuilding = False
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._generation = Generation(Path(str(self.manifest_path) + ".gen"))
+        with self._file_lock:
+            if not self.manifest_path.exists():
+                self._write_manifest({})
+                if legacy is not None and Path(legacy).exists():
+                    source = CSVStore(legacy, fieldnames, id_field, journal=True)
+                    self.replace_all(source.iter_rows())
+
+    # Reads -----------------------------------------------------------------
+
+    def read_all(self) -> List[Dict[str, str]]:
+        return self.select()
+
+    def get(self, row_id: str) -> Optional[Dict[str, str]]:
+        self._sync()
+        for shard in self._all_shards():
+            row = shard.get(row_id)
+            if row is not None:
+                return row
+        return None
+
+    def select(
+        self,
+        where: Optional[Dict[str, str]] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        after: Optional[Sequence[str]] = None,
+        descending: bool = False,
+        since: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, str]]:
+        self._sync()
+        end = None if limit is None else offset + limit
+        rows: List[Dict[str, str]] = []
+        for shards in self._months(where, after, descending, since):
+            wanted = None if end is None else end - len(rows)
+            pages = [
+                shard.select(where, 0, wanted, after, descending, since) for shard in shards
+            ]
+            if wanted is None:
+                rows.extend(sorted(itertools.chain(*pages), key=self._sort_key, reverse=descending))
+            else:
+                rows.extend(itertools.islice(self._merge(pages, descending), wanted))
+            if end is not None and len(rows) >= end:
+                break
+        return rows[offset:end]
+
+    def count(self, where: Optional[Dict[str, str]] = None) -> int:
+        self._sync()
+        total = 0
+        for names in self._month_names(where):
+            for name in names:
+                snapshot = self._unloaded_snapshot(name, where)
+                total += len(snapshot) if snapshot is not None else self._shards[name].count(where)
+        return total
+
+    def iter_rows(
+        self,
+        where: Optional[Dict[str, str]] = None,
+        after: Optional[Sequence[str]] = None,
+        batch_size: int = 500,
+        since: Optional[Sequence[str]] = None,
+    ) -> Iterator[Dict[str, str]]:
+        self._sync()
+        # Snapshots are not ordered for bisecting: the month holding a bound
+        # is read from its shard.
+        bounds = {bound[0][:7] for bound in (after, since) if bound}
+        for names in self._month_names(where, after, since=since):
+            sources = []
+            for name in names:
+                snapshot = self._unloaded_snapshot(name, where)
+                if snapshot is not None and self._month(name) not in bounds:
+                    sources.append(snapshot.rows())
+                else:
+                    shard = self._shards[name]
+                    sources.append(shard.iter_rows(where, after, batch_size, since))
+            yield from self._merge(sources)
+
+    def iter_columns(self, kinds: Dict[str, str], batch_size: int = 1000) -> Iterator[Columns]:
+        """All rows as column blocks, a month at a time, one shard after another.
+
+        Sealed shards come from their snapshot when it holds ``kinds``.
+        """
+        self._sync()
+        for names in self._month_names():
+            for name in names:
+                snapshot = self._snapshot(name) if kinds == self.columns else None
+                if snapshot is not None:
+                    yield snapshot
+                else:
+                    yield from self._shards[name].iter_columns(kinds, batch_size)
+
+    def version(self) -> Tuple[str, float]:
+        self._sync()
+        checksum, modified = 0, 0.0
+        with self._lock:
+            shards = list(self._shards.items())
+        for name, shard in shards:
+            snapshot = self._unloaded_snapshot(name)
+            if snapshot is not None:
+                token, mtime = str(snapshot.meta["checksum"]), float(snapshot.meta["modified"])
+            else:
+                token, mtime = shard.version()
+            checksum = (checksum + int(token, 16)) & _CHECKSUM_MASK
+            modified = max(modified, mtime)
+        return f"{checksum:016x}", modified
+
+    def subscribe(self, listener: Listener) -> None:
+        self._listeners.append(listener)
+
+    def refresh(self) -> None:
+        self._sync()
+        with self._lock:
+            shards = [shard for name, shard in self._shards.items() if name not in self._covered]
+        for shard in shards:
+            shard.refresh()
+        self._deliver()
+
+    def manifest(self) -> Dict[str, Entry]:
+        """The manifest's shard entries, by shard name (``<value>/<month>``)."""
+        self._sync()
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._entries.items()}
+
+    # Writes ----------------------------------------------------------------
+
+    def append_many(self, rows: Sequence[Dict[str, str]]) -> None:
+        if not rows:
+            return
+        self._sync()
+        for name, group in self._group(rows).items():
+            shard = self._writable(name)
+            if len(group) == 1:
+                # Goes through the shard's group commit, if any.
+                shard.append(group[0])
+            else:
+                shard.append_many(group)
+        self._deliver()
+
+    def upsert_many(self, rows: Iterable[Dict[str, str]]) -> Tuple[int, int]:
+        """Insert or replace rows by id, with one write per shard touched."""
+        rows = list(rows)
+        if not all(row.get(self.id_field) for row in rows):
+            raise ValueError("upsert_many needs an id on every row")
+        if not rows:
+            return 0, 0
+        self._sync()
+        counts = self._upsert(rows)
+        self._deliver()
+        return counts
+
+    def replace_all(self, rows: Iterable[Dict[str, str]]) -> None:
+        """Swap every shard's rows for ``rows``; shards left empty are kept."""
+        self._sync()
+        groups = self._group(rows)
+        for name in sorted(self._all_names()):
+            self._writable(name).replace_all(groups.get(name, ()))
+        self._seal_old()
+        self._deliver()
+
+    def update(self, row_id: str, new_row: Dict[str, str]) -> bool:
+        self._sync()
+        name = self._find(row_id)
+        if name is None:
+            return False
+        target = next(iter(self._group([new_row])))
+        if target == name:
+            self._writable(name).update(row_id, new_row)
+        else:
+            # Moved to another language or month.
+            self._writable(name).delete(row_id)
+            self._writable(target).append_many([new_row])
+        self._deliver()
+        return True
+
+    def apply(self, plan: Plan) -> None:
+        """Run ``plan()`` and write its changes with every shard locked.
+
+        Other writers, in any process, wait until the changes are written, but
+        the shards are still written one after the other: a reader can see
+        one shard's changes before another's.
+        """
+        self._sync()
+        with self._writing():
+            puts, deletes = plan()
+            if not all(row.get(self.id_field) for row in puts):
+                raise ValueError("apply needs an id on every row")
+            for row_id in deletes:
+                self._delete(row_id)
+            if puts:
+                self._upsert(puts)
+        self._deliver()
+
+    def delete(self, row_id: str) -> bool:
+        self._sync()
+        deleted = self._delete(row_id)
+        self._deliver()
+        return deleted
+
+    # Internal helpers -----------------------------------------------------
+
+    def _sync(self) -> None:
+        """Catch up with shards added, sealed or unsealed by any process."""
+        self._sync_manifest()
+        self._deliver()
+
+    def _sync_manifest(self) -> None:
+        if self._generation.read() != self._seen_generation:
+            with self._lock:
+                generation = self._generation.read()
+                if generation != self._seen_generation:
+                    self._apply_manifest(self._read_manifest())
+                    self._seen_generation = generation
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Hold the directory lock and the lock of every shard, in name order.
+
+        Shards are locked after the directory, the order :meth:`_seal_old`
+        takes them in too; writes made meanwhile by this thread take the same
+        locks again. Listeners are not called: :meth:`_deliver` afterwards.
+        """
+        with self._lock, self._file_lock, ExitStack() as stack:
+            self._sync_manifest()
+            for name in sorted(self._shards):
+                stack.enter_context(self._shards[name].locked())
+            yield
+
+    def _upsert(self, rows: List[Dict[str, str]]) -> Tuple[int, int]:
+        groups = self._group(rows)
+        moved = 0
+        for name, group in groups.items():
+            for row in group:
+                current = self._find(row[self.id_field])
+                if current is not None and current != name:
+                    # Moved to another language or month.
+                    self._writable(current).delete(row[self.id_field])
+                    moved += 1
+        created = updated = 0
+        for name, group in groups.items():
+            shard_created, shard_updated = self._writable(name).upsert_many(group)
+            created += shard_created
+            updated += shard_updated
+        return created - moved, updated + moved
+
+    def _delete(self, row_id: str) -> bool:
+        name = self._find(row_id)
+        return name is not None and self._writable(name).delete(row_id)
+
+    def _apply_manifest(self, entries: Dict[str, Entry]) -> None:
+        # Shards present on the first read are covered by the initial ``None``;
+        # later ones are announced to listeners with all their rows.
+        announce = self._seen_generation is not None
+        self._entries = entries
+        for name, entry in entries.items():
+            self._names[(str(entry["partition"]), str(entry["month"]))] = name
+            shard = self._shards.get(name)
+            if shard is None:
+                shard = self._open(name, entry, announce)
+            shard.stat_interval = math.inf if entry.get("sealed") else self.stat_interval
+            snapshot = self._snapshots.get(name)
+            if snapshot is None:
+                continue
+            current = snapshot.meta.get("source") == _source(shard)
+            if entry.get("sealed") and current:
+                continue
+            del self._snapshots[name]
+            if name in self._covered:
+                if not current:
+                    # Rewritten before we loaded it: the views saw stale rows.
+                    self._covered.discard(name)
+                shard.refresh()
+
+    def _open(self, name: str, entry: Entry, announce: bool) -> CSVStore:
+        shard = CSVStore(
+            self.directory / str(entry["file"]),
+            self.fieldnames,
+            self.id_field,
+            journal=True,
+            indexes=self._make_indexes(),
+            order_by=self.order_by,
+            group_commit_window=self._group_commit_window,
+            stat_interval=self.stat_interval,
+            name=f"{self.directory.name}/{name}",
+        )
+        self._shards[name] = shard
+        if announce:
+            shard.subscribe(self._forwarder(name, shard, loaded=False))
+            shard.refresh()
+        elif entry.get("sealed") and self._snapshot(name, build=False) is not None:
+            self._covered.add(name)
+            shard.subscribe(self._forwarder(name, shard, loaded=True))
+        else:
+            shard.refresh()
+            shard.subscribe(self._forwarder(name, shard, loaded=True))
+        return shard
+
+    def _forwarder(self, name: str, shard: CSVStore, loaded: bool) -> Listener:
+        def forward(rows: Optional[List[Dict[str, str]]]) -> None:
+            nonlocal loaded
+            if rows is None and name in self._covered:
+                # Loaded at last: its rows were in the snapshot all along.
+                self._covered.discard(name)
+                return
+            if not loaded:
+                loaded = True
+                if rows is None:
+                    # First load of a shard that appeared after the first read.
+                    rows = shard.read_all()
+            with self._deliver_lock:
+                if rows is None or self._rebuilding:
+                    self._reset_pending = True
+                elif rows:
+                    for listener in self._listeners:
+                        listener(rows)
+
+        return forward
+
+    def _deliver(self) -> None:
+        """Report a pending ``None``, outside of any shard's lock."""
+        # Without listeners yet, keep it for the first one.
+        while (
+            self._listeners and self._reset_pending and self._resetting.acquire(blocking=False)
+        ):
+            try:
+                with self._deliver_lock:
+                    self._reset_pending = False
+                    self._rebuilding = True
+                try:
+                    for listener in self._listeners:
+                        listener(None)
+                finally:
+                    with self._deliver_lock:
+                        self._rebuilding = False
+            finally:
+                self._resetting.release()
+
+    def _months(
+        self,
+        where: Optional[Dict[str, str]] = None,
+        after: Optional[Sequence[str]] = None,
+        descending: bool = False,
+        since: Optional[Sequence[str]] = None,
+    ) -> List[List[CSVStore]]:
+        """The shards that can hold matching rows, grouped by month in scan order."""
+        names = self._month_names(where, after, descending, since)
+        return [[self._shards[name] for name in month] for month in names]
+
+    def _month_names(
+        self,
+        where: Optional[Dict[str, str]] = None,
+        after: Optional[Sequence[str]] = None,
+        descending: bool = False,
+        since: Optional[Sequence[str]] = None,
+    ) -> List[List[str]]:
+        value = (where or {}).get(self.partition_field)
+        bound = after[0][:7] if after else None
+        lowest = since[0][:7] if since else None
+        months: Dict[str, List[str]] = {}
+        with self._lock:
+            for name, entry in self._entries.items():
+                month = str(entry["month"])
+                if value is not None and entry["partition"] != value:
+                    continue
+                if bound is not None and (month > bound if descending else month < bound):
+                    continue
+                if lowest is not None and month < lowest:
+                    continue
+                months.setdefault(month, []).append(name)
+        return [months[month] for month in sorted(months, reverse=descending)]
+
+    def _merge(
+        self, sources: List[Iterable[Dict[str, str]]], descending: bool = False
+    ) -> Iterable[Dict[str, str]]:
+        if len(sources) == 1:
+            return sources[0]
+        return heapq.merge(*sources, key=self._sort_key, reverse=descending)
+
+    def _all_names(self) -> List[str]:
+        with self._lock:
+            return list(self._shards)
+
+    def _all_shards(self) -> List[CSVStore]:
+        with self._lock:
+            return list(self._shards.values())
+
+    def _find(self, row_id: str) -> Optional[str]:
+        with self._lock:
+            shards = list(self._shards.items())
+        for name, shard in shards:
+            if shard.get(row_id) is not None:
+                return name
+        return None
+
+    def _shard_of(self, row: Dict[str, str]) -> Tuple[str, str]:
+        date = (row.get(self.date_field) or "")[:7]
+        month = date if _MONTH.fullmatch(date) else UNDATED
+        return row.get(self.partition_field) or self.partition_default, month
+
+    def _group(self, rows: Iterable[Dict[str, str]]) -> Dict[str, List[Dict[str, str]]]:
+        """Split rows by shard name, adding the shards that do not exist yet."""
+        by_key: Dict[Tuple[str, str], List[Dict[str, str]]] = {}
+        for row in rows:
+            row = {field: row.get(field) or "" for field in self.fieldnames}
+            by_key.setdefault(self._shard_of(row), []).append(row)
+        missing = [key for key in by_key if key not in self._names]
+        if missing:
+            with self._editing_manifest() as entries:
+                taken = {entry["file"] for entry in entries.values()}
+                for partition, month in missing:
+                    if any(
+                        (entry["partition"], entry["month"]) == (partition, month)
+                        for entry in entries.values()
+                    ):
+                        continue  # Added by another process meanwhile.
+                    name = f"{_slug(partition)}/{month}"
+                    copy = 1
+                    while f"{name}.csv" in taken:
+                        copy += 1
+                        name = f"{_slug(partition)}-{copy}/{month}"
+                    taken.add(f"{name}.csv")
+                    entries[name] = {
+                        "partition": partition,
+                        "month": month,
+                        "file": f"{name}.csv",
+                        "sealed": False,
+                    }
+            self._seal_old()
+        return {self._names[key]: group for key, group in by_key.items()}
+
+    def _writable(self, name: str) -> CSVStore:
+        with self._lock:
+            sealed = self._entries[name].get("sealed")
+        if sealed:
+            with self._editing_manifest() as entries:
+                entry = entries[name]
+                entries[name] = {
+                    "partition": entry["partition"],
+                    "month": entry["month"],
+                    "file": entry["file"],
+                    "sealed": False,
+                }
+            self._snapshot_path(name).unlink(missing_ok=True)
+        return self._shards[name]
+
+    def _seal_old(self) -> None:
+        """Seal the shards of every month before the latest one."""
+        with self._lock:
+            latest = max((str(entry["month"]) for entry in self._entries.values()), default="")
+            stale = [
+                name
+                for name, entry in self._entries.items()
+                if not entry.get("sealed") and str(entry["month"]) < latest
+            ]
+        if not stale:
+            return
+        with self._editing_manifest() as entries:
+            for name in stale:
+                shard = self._shards[name]
+                shard.compact()
+                first = shard.select(limit=1)
+                last = shard.select(limit=1, descending=True)
+                entries[name].update(
+                    sealed=True,
+                    rows=shard.count(),
+                    first=first[0].get(self.date_field, "") if first else "",
+                    last=last[0].get(self.date_field, "") if last else "",
+                )
+                if self.columns is not None:
+                    self._write_snapshot(name)
+
+    def _month(self, name: str) -> str:
+        with self._lock:
+            return str(self._entries[name]["month"])
+
+    def _snapshot_path(self, name: str) -> Path:
+        with self._lock:
+            file = str(self._entries[name]["file"])
+        return self.directory / (file[: -len(".csv")] + ".cols")
+
+    def _snapshot(self, name: str, build: bool = True) -> Optional[Columns]:
+        """The column snapshot of sealed shard ``name``, if it is current.
+
+        With ``build``, a missing or stale one is written from the shard
+        (shards sealed before snapshots existed, or a damaged file).
+        """
+        with self._lock:
+            if self.columns is None or not self._entries[name].get("sealed"):
+                return None
+            snapshot = self._snapshots.get(name)
+        if snapshot is not None:
+            return snapshot
+        shard = self._shards[name]
+        try:
+            snapshot = Columns.open(self._snapshot_path(name))
+        except (OSError, CorruptSnapshot):
+            snapshot = None
+        if snapshot is not None and (
+            snapshot.kinds != self.columns
+            or snapshot.fieldnames != self.fieldnames
+            or snapshot.meta.get("source") != _source(shard)
+        ):
+            snapshot = None
+        if snapshot is None:
+            if not build:
+                return None
+            snapshot = self._write_snapshot(name)
+        with self._lock:
+            self._snapshots[name] = snapshot
+        return snapshot
+
+    def _write_snapshot(self, name: str) -> Columns:
+        shard = self._shards[name]
+        token, modified = shard.version()
+        columns = Columns.from_rows(shard.iter_rows(), self.columns or {}, self.fieldnames)
+        meta = {"source": _source(shard), "checksum": token, "modified": modified}
+        columns.write(self._snapshot_path(name), meta)
+        columns.meta = meta
+        with self._lock:
+            self._snapshots[name] = columns
+        return columns
+
+    def _unloaded_snapshot(
+        self, name: str, where: Optional[Dict[str, str]] = None
+    ) -> Optional[Columns]:
+        """The snapshot standing for a shard not loaded yet, when ``where`` needs no index."""
+        if name not in self._covered or set(where or ()) - {self.partition_field}:
+            return None
+        return self._snapshot(name, build=False)
+
+    @contextmanager
+    def _editing_manifest(self) -> Iterator[Dict[str, Entry]]:
+        """Edit the manifest under the directory lock, then apply and announce it."""
+        with self._lock, self._file_lock:
+            entries = self._read_manifest()
+            yield entries
+            self._write_manifest(entries)
+            self._apply_manifest(entries)
+            self._seen_generation = self._generation.bump()
+
+    def _read_manifest(self) -> Dict[str, Entry]:
+        with self.manifest_path.open("r", encoding="utf-8") as fp:
+            return json.load(fp)["shards"]
+
+    def _write_manifest(self, entries: Dict[str, Entry]) -> None:
+        manifest = {
+            "partition_field": self.partition_field,
+            "date_field": self.date_field,
+            "shards": dict(sorted(entries.items())),
+        }
+        tmp_path = self.manifest_path.with_name(MANIFEST + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as fp:
+            json.dump(manifest, fp, ensure_ascii=False, indent=2)
+            fp.write("\n")
+        os.replace(tmp_path, self.manifest_path)
+
+
+def _source(shard: CSVStore) -> Optional[List[int]]:
+    """Size and mtime of a compacted shard's file (``None`` while it has a journal)."""
+    if shard.journal_path.exists():
+        return None
+    try:
+        stat = os.stat(shard.path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", value) or "_"
@@ -0,0 +1,455 @@
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .indexes import HashIndex, RowIndex, TagIndex, TextIndex, split_tags
+from .metrics import StoreMetrics
+from .storage import Plan, Store
+from .text import cjk_ngrams, search_pieces
+
+Listener = Callable[[Optional[List[Dict[str, str]]]], None]
+
+
+class SQLiteStore(Store):
+    """Store backed by one table of an SQLite database (WAL mode).
+
+    It takes the same index specs as :class:`CSVStore` and turns them into
+    SQL: a :class:`HashIndex` becomes a B-tree index on its column (on the
+    defaulted expression when it has a default), a :class:`TagIndex` a side
+    table of ``(tag, rowid)`` pairs and a :class:`TextIndex` an FTS5 table
+    (keyed by rowid) over the same normalized terms, so ``where`` filters mean
+    the same thing on both engines. Columns listed in ``order_by`` get a
+    composite index for keyset pagination. A ``<table>_meta`` row holds a
+    write counter, bumped in every write transaction, for :meth:`version`,
+    and a count of the writes that did more than append rows: when only the
+    former moved, :meth:`refresh` hands :meth:`subscribe` listeners the rows
+    other processes appended (by rowid), otherwise ``None``.
+
+    Waits for the write lock (``BEGIN IMMEDIATE``) and write transactions
+    are timed in the ``ecoute_store_*`` metrics under the table's name, as
+    ``append`` or ``rewrite`` writes.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        table: str,
+        fieldnames: List[str],
+        id_field: str = "id",
+        indexes: Sequence[RowIndex] = (),
+        order_by: Sequence[str] = (),
+    ):
+        self.path = Path(path)
+        self.table = table
+        self.fieldnames = fieldnames
+        self.id_field = id_field
+        self.order_by = tuple(order_by)
+        self.indexes: Dict[str, RowIndex] = {index.name: index for index in indexes}
+        self._local = threading.local()
+        self._columns = ", ".join(_quote(field) for field in fieldnames)
+        self._listeners: List[Listener] = []
+        self._metrics = StoreMetrics(table)
+        # (counter, rewrites, last rowid) as of the last write seen here; the
+        # first refresh always reports a reset.
+        self._seen: Tuple[int, int, int] = (-1, -1, 0)
+        self._ensure_schema()
+
+    # Reads -----------------------------------------------------------------
+
+    def read_all(self) -> List[Dict[str, str]]:
+        return self.select()
+
+    def get(self, row_id: str) -> Optional[Dict[str, str]]:
+        row = (
+            self._connection()
+            .execute(
+                f"SELECT {self._columns} FROM {_quote(self.table)} "
+                f"WHERE {_quote(self.id_field)} = ?",
+                (row_id,),
+            )
+            .fetchone()
+        )
+        return self._to_dict(row) if row else None
+
+    def select(
+        self,
+        where: Optional[Dict[str, str]] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        after: Optional[Sequence[str]] = None,
+        descending: bool = False,
+        since: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, str]]:
+        clauses, params = self._where(where or {})
+        bounds = ((after, "<" if descending else ">"), (since, ">="))
+        for bound, operator in bounds:
+            if bound is None:
+                continue
+            if not self.order_by:
+                raise ValueError("Keyset pagination requires order_by columns")
+            columns = ", ".join(_quote(field) for field in self.order_by[: len(bound)])
+            placeholders = ", ".join("?" for _ in bound)
+            clauses.append(f"({columns}) {operator} ({placeholders})")
+            params.extend(bound)
+        direction = "DESC" if descending else "ASC"
+        order = ", ".join(
+            f"{_quote(field)} {direction}" for field in (self.order_by or ("rowid",))
+        )
+        sql = (
+            f"SELECT {self._columns} FROM {_quote(self.table)}"
+            f"{_where_sql(clauses)} ORDER BY {order} LIMIT ? OFFSET ?"
+        )
+        params.extend([-1 if limit is None else limit, offset])
+        return [self._to_dict(row) for row in self._connection().execute(sql, params)]
+
+    def count(self, where: Optional[Dict[str, str]] = None) -> int:
+        clauses, params = self._where(where or {})
+        sql = f"SELECT COUNT(*) FROM {_quote(self.table)}{_where_sql(clauses)}"
+        return self._connection().execute(sql, params).fetchone()[0]
+
+    def version(self) -> Tuple[str, float]:
+        epoch, counter, modified = (
+            self._connection()
+            .execute(f"SELECT epoch, counter, modified FROM {self._meta}")
+            .fetchone()
+        )
+        return f"{epoch}-{counter}", modified
+
+    def subscribe(self, listener: Listener) -> None:
+        self._listeners.append(listener)
+
+    def refresh(self) -> None:
+        counter = self._connection().execute(f"SELECT counter FROM {self._meta}").fetchone()[0]
+        if counter == self._seen[0]:
+            return
+        with self._transaction(bump=False) as conn:
+            self._catch_up(conn)
+
+    # Writes ----------------------------------------------------------------
+
+    def append_many(self, rows: Sequence[Dict[str, str]]) -> None:
+        with self._transaction(appends_only=True) as conn:
+            for row in rows:
+                self._insert(conn, row)
+            self._notify([dict(row) for row in rows])
+
+    def upsert_many(self, rows: Iterable[Dict[str, str]]) -> Tuple[int, int]:
+        created = updated = 0
+        with self._transaction() as conn:
+            for row in rows:
+                if self._put(conn, row):
+                    updated += 1
+                else:
+                    created += 1
+            self._notify(None)
+        return created, updated
+
+    def replace_all(self, rows: Iterable[Dict[str, str]]) -> None:
+        with self._transaction() as conn:
+            conn.execute(f"DELETE FROM {_quote(self.table)}")
+            for table in self._side_tables():
+                conn.execute(f"DELETE FROM {_quote(table)}")
+            # A repeated id updates the row in place, as on CSV: the last one wins.
+            for row in rows:
+                self._put(conn, row)
+            self._notify(None)
+
+    def update(self, row_id: str, new_row: Dict[str, str]) -> bool:
+        with self._transaction() as conn:
+            if not self._update(conn, row_id, new_row):
+                return False
+            self._notify(None)
+            return True
+
+    def apply(self, plan: Plan) -> None:
+        with self._transaction() as conn:
+            # Reads made by ``plan`` go through this thread's connection, so
+            # they happen inside the transaction.
+            puts, deletes = plan()
+            for row_id in deletes:
+                self._delete(conn, row_id)
+            for row in puts:
+                self._put(conn, row)
+            self._notify(None)
+
+    def delete(self, row_id: str) -> bool:
+        with self._transaction() as conn:
+            if not self._delete(conn, row_id):
+                return False
+            self._notify(None)
+            return True
+
+    # Internal helpers -----------------------------------------------------
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(
+        self, bump: bool = True, appends_only: bool = False
+    ) -> Iterator[sqlite3.Connection]:
+        conn = self._connection()
+        started = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        locked = time.perf_counter()
+        self._metrics.lock_wait.observe(locked - started)
+        try:
+            if bump:
+                self._catch_up(conn)
+            yield conn
+            if bump:
+                rewrites = 0 if appends_only else 1
+                conn.execute(
+                    f"UPDATE {self._meta} "
+                    "SET counter = counter + 1, rewrites = rewrites + ?, modified = ?",
+                    (rewrites, time.time()),
+                )
+                counter, seen_rewrites, _ = self._seen
+                last = conn.execute(f"SELECT MAX(rowid) FROM {_quote(self.table)}").fetchone()[0]
+                self._seen = (counter + 1, seen_rewrites + rewrites, last or 0)
+            conn.execute("COMMIT")
+            if bump:
+                write = self._metrics.write_append if appends_only else self._metrics.write_rewrite
+                write.observe(time.perf_counter() - locked)
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            if bump:
+                # Listeners may have been told about rows that were rolled back.
+                self._seen = (-1, -1, 0)
+            raise
+
+    def _catch_up(self, conn: sqlite3.Connection) -> None:
+        """Report the writes other processes committed since our last look."""
+        counter, rewrites = conn.execute(f"SELECT counter, rewrites FROM {self._meta}").fetchone()
+        seen_counter, seen_rewrites, last = self._seen
+        if counter == seen_counter:
+            return
+        added: Optional[List[Dict[str, str]]] = None
+        if rewrites == seen_rewrites:
+            found = conn.execute(
+                f"SELECT rowid, {self._columns} FROM {_quote(self.table)} "
+                "WHERE rowid > ? ORDER BY rowid",
+                (last,),
+            ).fetchall()
+            added = [self._to_dict(row[1:]) for row in found]
+            if found:
+                last = found[-1][0]
+        else:
+            last = conn.execute(f"SELECT MAX(rowid) FROM {_quote(self.table)}").fetchone()[0]
+        self._seen = (counter, rewrites, last or 0)
+        self._notify(added)
+
+    def _notify(self, rows: Optional[List[Dict[str, str]]]) -> None:
+        if rows is None or rows:
+            for listener in self._listeners:
+                listener(rows)
+
+    @property
+    def _meta(self) -> str:
+        return _quote(f"{self.table}_meta")
+
+    def _ensure_schema(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        table = self.table
+        columns = ", ".join(
+            f"{_quote(field)} TEXT NOT NULL DEFAULT ''"
+            + (" PRIMARY KEY" if field == self.id_field else "")
+            for field in self.fieldnames
+        )
+        with self._transaction(bump=False) as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table)} ({columns})")
+            meta = self._meta
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {meta} (epoch TEXT NOT NULL, "
+                "counter INTEGER NOT NULL, modified REAL NOT NULL, "
+                "rewrites INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = [info[1] for info in conn.execute(f"PRAGMA table_info({meta})")]
+            if "rewrites" not in columns:
+                conn.execute(f"ALTER TABLE {meta} ADD COLUMN rewrites INTEGER NOT NULL DEFAULT 0")
+            # The epoch keeps versions distinct if the database is recreated.
+            if conn.execute(f"SELECT COUNT(*) FROM {meta}").fetchone()[0] == 0:
+                conn.execute(
+                    f"INSERT INTO {meta} (epoch, counter, modified) VALUES (?, 0, ?)",
+                    (uuid.uuid4().hex[:8], time.time()),
+                )
+            if self.order_by:
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {_quote(f'{table}_order')} ON {_quote(table)} "
+                    f"({', '.join(_quote(field) for field in self.order_by)})"
+                )
+            for index in self.indexes.values():
+                if isinstance(index, HashIndex):
+                    conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS {_quote(f'{table}_{index.name}')} "
+                        f"ON {_quote(table)} ({_hash_expression(index)})"
+                    )
+                elif isinstance(index, TagIndex):
+                    tags = _quote(f"{table}_tags")
+                    conn.execute(
+                        f"CREATE TABLE IF NOT EXISTS {tags} "
+                        "(tag TEXT NOT NULL, row INTEGER NOT NULL)"
+                    )
+                    conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS {_quote(f'{table}_tags_tag')} "
+                        f"ON {tags} (tag, row)"
+                    )
+                    conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS {_quote(f'{table}_tags_row')} "
+                        f"ON {tags} (row)"
+                    )
+                elif isinstance(index, TextIndex):
+                    conn.execute(
+                        f"CREATE VIRTUAL TABLE IF NOT EXISTS {_quote(f'{table}_fts')} USING "
+                        "fts5(terms, tokenize='unicode61 remove_diacritics 0')"
+                    )
+
+    def _side_tables(self) -> List[str]:
+        tables = []
+        for index in self.indexes.values():
+            if isinstance(index, TagIndex):
+                tables.append(f"{self.table}_tags")
+            elif isinstance(index, TextIndex):
+                tables.append(f"{self.table}_fts")
+        return tables
+
+    def _insert(self, conn: sqlite3.Connection, row: Dict[str, str]) -> None:
+        values = [row.get(field) or "" for field in self.fieldnames]
+        placeholders = ", ".join("?" for _ in self.fieldnames)
+        cursor = conn.execute(
+            f"INSERT INTO {_quote(self.table)} ({self._columns}) VALUES ({placeholders})", values
+        )
+        self._index(conn, cursor.lastrowid, row)
+
+    def _put(self, conn: sqlite3.Connection, row: Dict[str, str]) -> bool:
+        """Update the row with ``row``'s id, or insert it; True if it existed."""
+        if self._update(conn, row.get(self.id_field) or "", row):
+            return True
+        self._insert(conn, row)
+        return False
+
+    def _update(self, conn: sqlite3.Connection, row_id: str, row: Dict[str, str]) -> bool:
+        # Updating in place keeps the rowid, and with it the row's position
+        # when there is no order_by.
+        rowid = self._rowid(conn, row_id)
+        if rowid is None:
+            return False
+        assignments = ", ".join(f"{_quote(field)} = ?" for field in self.fieldnames)
+        values = [row.get(field) or "" for field in self.fieldnames]
+        conn.execute(
+            f"UPDATE {_quote(self.table)} SET {assignments} WHERE rowid = ?", values + [rowid]
+        )
+        self._unindex(conn, rowid)
+        self._index(conn, rowid, row)
+        return True
+
+    def _delete(self, conn: sqlite3.Connection, row_id: str) -> bool:
+        rowid = self._rowid(conn, row_id)
+        if rowid is None:
+            return False
+        conn.execute(f"DELETE FROM {_quote(self.table)} WHERE rowid = ?", (rowid,))
+        self._unindex(conn, rowid)
+        return True
+
+    def _rowid(self, conn: sqlite3.Connection, row_id: str) -> Optional[int]:
+        found = conn.execute(
+            f"SELECT rowid FROM {_quote(self.table)} WHERE {_quote(self.id_field)} = ?",
+            (row_id,),
+        ).fetchone()
+        return found[0] if found else None
+
+    def _index(self, conn: sqlite3.Connection, rowid: int, row: Dict[str, str]) -> None:
+        for index in self.indexes.values():
+            if isinstance(index, TagIndex):
+                conn.executemany(
+                    f"INSERT INTO {_quote(f'{self.table}_tags')} (tag, row) VALUES (?, ?)",
+                    [(tag, rowid) for tag in split_tags(row.get(index.field))],
+                )
+            elif isinstance(index, TextIndex):
+                conn.execute(
+                    f"INSERT INTO {_quote(f'{self.table}_fts')} (rowid, terms) VALUES (?, ?)",
+                    (rowid, " ".join(sorted(index.terms(row)))),
+                )
+
+    def _unindex(self, conn: sqlite3.Connection, rowid: int) -> None:
+        for index in self.indexes.values():
+            if isinstance(index, TagIndex):
+                conn.execute(f"DELETE FROM {_quote(f'{self.table}_tags')} WHERE row = ?", (rowid,))
+            elif isinstance(index, TextIndex):
+                conn.execute(f"DELETE FROM {_quote(f'{self.table}_fts')} WHERE rowid = ?", (rowid,))
+
+    def _where(self, where: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        clauses: List[str] = []
+        params: List[str] = []
+        for name, value in where.items():
+            index = self.indexes.get(name)
+            if isinstance(index, HashIndex):
+                clauses.append(f"{_hash_expression(index)} = ?")
+                params.append(value)
+            elif isinstance(index, TagIndex):
+                clauses.append(
+                    f"rowid IN (SELECT row FROM {_quote(f'{self.table}_tags')} WHERE tag = ?)"
+                )
+                params.append(value.strip().casefold())
+            elif isinstance(index, TextIndex):
+                query = _fts_query(value)
+                if query is None:
+                    clauses.append("0")
+                    continue
+                fts = _quote(f"{self.table}_fts")
+                clauses.append(f"rowid IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)")
+                params.append(query)
+            elif name in self.fieldnames:
+                clauses.append(f"{_quote(name)} = ?")
+                params.append(value)
+            else:
+                clauses.append("0")
+        return clauses, params
+
+    def _to_dict(self, row: Sequence[str]) -> Dict[str, str]:
+        return dict(zip(self.fieldnames, row))
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _where_sql(clauses: List[str]) -> str:
+    return f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+
+def _hash_expression(index: HashIndex) -> str:
+    column = _quote(index.field)
+    if not index.default:
+        return column
+    return f"COALESCE(NULLIF({column}, ''), {_literal(index.default)})"
+
+
+def _fts_query(value: str) -> Optional[str]:
+    """Build an FTS5 MATCH expression with the semantics of TextIndex.lookup."""
+    terms = []
+    for piece, is_cjk in search_pieces(value):
+        if is_cjk:
+            terms.extend(_fts_string(gram) for gram in cjk_ngrams(piece, unigrams=False))
+        else:
+            terms.append(_fts_string(piece) + "*")
+    return " AND ".join(terms) if terms else None
+
+
+def _fts_string(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
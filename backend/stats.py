@@ -0,0 +1,164 @@
+"""Running aggregates over the attempt history, kept in memory for ``/api/stats``."""
+
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from .columnar import CODE, FLOAT, INT, TIME, CodeColumn, Columns
+
+GROUPINGS = ("sentence", "target_lang", "difficulty", "day")
+# The attempt fields read, for Columns.from_rows.
+COLUMNS = {
+    "sentence_id": CODE,
+    "target_lang": CODE,
+    "score": FLOAT,
+    "words_total": INT,
+    "words_correct": INT,
+    "duration_ms": INT,
+    "created_at": TIME,
+}
+
+
+@dataclass
+class Rollup:
+    attempts: int = 0
+    score_sum: float = 0.0
+    best_score: float = 0.0
+    words_total: int = 0
+    words_correct: int = 0
+    duration_sum: int = 0
+
+    def add(self, score: float, words_total: int, words_correct: int, duration_ms: int) -> None:
+        self.attempts += 1
+        self.score_sum += score
+        self.best_score = max(self.best_score, score)
+        self.words_total += words_total
+        self.words_correct += words_correct
+        self.duration_sum += duration_ms
+
+    def merge(self, other: "Rollup") -> None:
+        self.attempts += other.attempts
+        self.score_sum += other.score_sum
+        self.best_score = max(self.best_score, other.best_score)
+        self.words_total += other.words_total
+        self.words_correct += other.words_correct
+        self.duration_sum += other.duration_sum
+
+    def summary(self, key: str) -> Dict[str, object]:
+        attempts = self.attempts or 1
+        return {
+            "key": key,
+            "attempts": self.attempts,
+            "mean_score": self.score_sum / attempts,
+            "best_score": self.best_score,
+            "word_accuracy": self.words_correct / self.words_total if self.words_total else 0.0,
+            "mean_duration_ms": self.duration_sum / attempts,
+        }
+
+
+class AttemptStats:
+    """Attempt rollups per sentence, target language and day.
+
+    Fed every stored attempt row (``rebuild`` at startup, ``add`` after each
+    write, or the ``*_columns`` variants with column blocks), so a report
+    costs O(groups) rather than a pass over the history.
+    Per-difficulty figures merge the per-sentence rollups at report time
+    because difficulty belongs to the sentence and can change after the
+    attempts were made.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._groups: Dict[str, Dict[str, Rollup]] = {}
+        self._reset()
+
+    def rebuild(self, rows: Iterable[Dict[str, str]]) -> None:
+        self.rebuild_columns([Columns.from_rows(rows, COLUMNS)])
+
+    def add(self, rows: Iterable[Dict[str, str]]) -> None:
+        self.add_columns(Columns.from_rows(rows, COLUMNS))
+
+    def rebuild_columns(self, blocks: Iterable[Columns]) -> None:
+        with self._lock:
+            self._reset()
+            for columns in blocks:
+                self._add(columns)
+
+    def add_columns(self, columns: Columns) -> None:
+        with self._lock:
+            self._add(columns)
+
+    def report(
+        self, group_by: str, difficulty_of: Callable[[str], Optional[str]]
+    ) -> Dict[str, object]:
+        """Summarise ``group_by`` (one of :data:`GROUPINGS`) plus overall totals.
+
+        ``difficulty_of`` maps a sentence id to its current difficulty, or
+        ``None`` when the sentence no longer exists.
+        """
+        with self._lock:
+            by_sentence = list(self._groups["sentence"].items())
+            if group_by == "difficulty":
+                groups: Dict[str, Rollup] = {}
+                for sentence_id, rollup in by_sentence:
+                    key = difficulty_of(sentence_id) or "unknown"
+                    groups.setdefault(key, Rollup()).merge(rollup)
+            else:
+                groups = dict(self._groups[group_by])
+            totals = Rollup()
+            for _, rollup in by_sentence:
+                totals.merge(rollup)
+            return {
+                "group_by": group_by,
+                "totals": totals.summary("all"),
+                "groups": summaries(groups),
+            }
+
+    def _reset(self) -> None:
+        self._groups = {name: {} for name in GROUPINGS if name != "difficulty"}
+
+    def _add(self, columns: Columns) -> None:
+        values = [
+            columns.numbers(field)
+            for field in ("score", "words_total", "words_correct", "duration_ms")
+        ]
+        keys = {
+            "sentence": columns.codes("sentence_id"),
+            "target_lang": columns.codes("target_lang"),
+            "day": CodeColumn.build(value[:10] for value in columns.text("created_at")),
+        }
+        for name, column in keys.items():
+            group = self._groups[name]
+            rollups = _rollups(len(column.values), column.codes, *values)
+            for key, rollup in zip(column.values, rollups):
+                if name == "target_lang":
+                    key = key or "fr-FR"
+                if key not in group:
+                    group[key] = Rollup()
+                group[key].merge(rollup)
+
+
+def _rollups(
+    size: int,
+    codes: Sequence[int],
+    scores: Sequence[float],
+    words_total: Sequence[int],
+    words_correct: Sequence[int],
+    durations: Sequence[int],
+) -> List[Rollup]:
+    """One rollup per code (``0 <= code < size``), from columns of attempt values."""
+    attempts, best, score_sum = [0] * size, [0.0] * size, [0.0] * size
+    total, correct, duration = [0] * size, [0] * size, [0] * size
+    for code, score, words, right, ms in zip(codes, scores, words_total, words_correct, durations):
+        attempts[code] += 1
+        score_sum[code] += score
+        if score > best[code]:
+            best[code] = score
+        total[code] += words
+        correct[code] += right
+        duration[code] += ms
+    return [Rollup(*values) for values in zip(attempts, score_sum, best, total, correct, duration)]
+
+
+def summaries(rollups: Dict[str, Rollup]) -> List[Dict[str, object]]:
+    return [rollups[key].summary(key) for key in sorted(rollups)]
@@ -0,0 +1,144 @@
+from abc import ABC, abstractmethod
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .columnar import Columns
+
+# Builds a batch of changes for Store.apply: (rows to put, ids to delete).
+Plan = Callable[[], Tuple[Sequence[Dict[str, str]], Sequence[str]]]
+
+
+class Store(ABC):
+    """Row storage interface shared by the CSV and SQLite engines.
+
+    Rows are flat ``str -> str`` dicts keyed by ``id_field``. ``where`` filters
+    map a column or index name to a value (see the ``indexes`` each engine is
+    built with); results are ordered by ``order_by`` and can be paged with a
+    keyset cursor (``after`` = the ``order_by`` values of the last row seen).
+    ``since`` is an inclusive lower bound for ranges, whatever the direction:
+    rows whose ``order_by`` values sort at or after it.
+    """
+
+    fieldnames: List[str]
+    id_field: str
+    order_by: Tuple[str, ...]
+
+    @abstractmethod
+    def read_all(self) -> List[Dict[str, str]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, row_id: str) -> Optional[Dict[str, str]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def select(
+        self,
+        where: Optional[Dict[str, str]] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        after: Optional[Sequence[str]] = None,
+        descending: bool = False,
+        since: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, str]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def count(self, where: Optional[Dict[str, str]] = None) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def version(self) -> Tuple[str, float]:
+        """Return a token that changes whenever the rows do, and when they last changed.
+
+        Cheap enough to call on every request: it never reads the rows.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def subscribe(self, listener: Callable[[Optional[List[Dict[str, str]]]], None]) -> None:
+        """Have ``listener`` called with the rows appended by any process.
+
+        It is called with ``None`` when rows changed in another way (updated,
+        deleted, replaced, or the first time the store is read), in which case
+        it should read the store again. Calls happen inside the store's lock,
+        in whichever thread noticed the change.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def refresh(self) -> None:
+        """Pick up (and report to listeners) writes made by other processes."""
+        raise NotImplementedError
+
+    def append(self, row: Dict[str, str]) -> None:
+        self.append_many([row])
+
+    @abstractmethod
+    def append_many(self, rows: Sequence[Dict[str, str]]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def upsert_many(self, rows: Iterable[Dict[str, str]]) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def replace_all(self, rows: Iterable[Dict[str, str]]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def update(self, row_id: str, new_row: Dict[str, str]) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def apply(self, plan: Plan) -> None:
+        """Run ``plan()`` under the write lock and write the changes it returns at once.
+
+        ``plan`` may read the store and sees every committed write; it returns
+        ``(puts, deletes)``: rows to insert or replace by id and ids to
+        remove (deletes go first). No other writer gets in between, and if
+        ``plan`` raises nothing is written.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, row_id: str) -> bool:
+        raise NotImplementedError
+
+    def iter_rows(
+        self,
+        where: Optional[Dict[str, str]] = None,
+        after: Optional[Sequence[str]] = None,
+        batch_size: int = 500,
+        since: Optional[Sequence[str]] = None,
+    ) -> Iterator[Dict[str, str]]:
+        """Yield matching rows in store order, one page at a time.
+
+        Only a page is materialized at once and no lock is held between
+        pages, so a long export neither copies the table nor blocks writers.
+        """
+        offset = 0
+        while True:
+            if self.order_by:
+                page = self.select(where, limit=batch_size, after=after, since=since)
+                since = None
+            else:
+                page = self.select(where, offset=offset, limit=batch_size)
+                offset += len(page)
+            yield from page
+            if len(page) < batch_size:
+                return
+            after = [page[-1].get(field) or "" for field in self.order_by]
+
+    def iter_columns(self, kinds: Dict[str, str], batch_size: int = 1000) -> Iterator[Columns]:
+        """Yield every row as :class:`~backend.columnar.Columns` blocks, in store order.
+
+        ``kinds`` says which fields to decode (see :mod:`backend.columnar`).
+        Engines that keep column snapshots serve them as they are.
+        """
+        rows = self.iter_rows()
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield Columns.from_rows(batch, kinds, self.fieldnames)
@@ -0,0 +1,41 @@
+import anyio
+import httpx
+import pytest
+
+from backend.app import DATA_DIR_ENV, STORAGE_ENV, create_app
+
+
+@pytest.fixture
+def storage_backend():
+    """The engine ``app`` stores its data on; request and parametrize it to cover both."""
+    return "csv"
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, storage_backend):
+    """The API, on an empty data directory under ``tmp_path``."""
+    monkeypatch.setenv(DATA_DIR_ENV, str(tmp_path))
+    monkeypatch.setenv(STORAGE_ENV, storage_backend)
+    return create_app()
+
+
+@pytest.fixture
+def call_api(request):
+    """Run ``main(client)`` with an HTTP client on an ASGI app and return its result.
+
+    The client talks to the ``app`` fixture, created on first use so that a
+    test can patch ``backend.app`` beforehand, unless another ``app`` is given.
+    """
+
+    def call(main, app=None):
+        if app is None:
+            app = request.getfixturevalue("app")
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await main(client)
+
+        return anyio.run(run)
+
+    return call
@@ -0,0 +1,117 @@
+import threading
+import time
+
+import anyio
+
+from backend.aio import AsyncRWLock, AsyncStore
+from backend.csv_store import CSVStore
+
+
+def test_rwlock_shares_reads_and_serializes_writes():
+    lock = AsyncRWLock()
+    events = []
+
+    async def reader(name):
+        async with lock.reading():
+            events.append(f"{name}+")
+            await anyio.sleep(0.02)
+            events.append(f"{name}-")
+
+    async def writer(name):
+        async with lock.writing():
+            events.append(f"{name}+")
+            await anyio.sleep(0.01)
+            events.append(f"{name}-")
+
+    async def main():
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(reader, "r1")
+            tg.start_soon(reader, "r2")
+            await anyio.sleep(0.005)
+            tg.start_soon(writer, "w")
+            await anyio.sleep(0.005)
+            # Queued behind the waiting writer rather than joining r1/r2.
+            tg.start_soon(reader, "r3")
+
+    anyio.run(main)
+    assert events[:2] == ["r1+", "r2+"]
+    assert events.index("w+") > max(events.index("r1-"), events.index("r2-"))
+    assert events.index("w-") == events.index("w+") + 1
+    assert events.index("r3+") > events.index("w-")
+
+
+def test_async_store_bounds_worker_threads(tmp_path):
+    store = AsyncStore(CSVStore(tmp_path / "rows.csv", ["id", "name"]), anyio.CapacityLimiter(2))
+    active = []
+    peak = []
+    guard = threading.Lock()
+
+    def slow_read():
+        with guard:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.01)
+        with guard:
+            active.pop()
+
+    async def main():
+        await store.append({"id": "a", "name": "alpha"})
+        async with anyio.create_task_group() as tg:
+            for _ in range(8):
+                tg.start_soon(store.run, slow_read)
+        assert await store.get("a") == {"id": "a", "name": "alpha"}
+        assert await store.update("a", {"id": "a", "name": "ALPHA"})
+        assert [row["name"] for row in await store.select()] == ["ALPHA"]
+
+    anyio.run(main)
+    assert max(peak) == 2
+
+
+def test_iter_batches_reads_each_batch_through_run(tmp_path):
+    store = AsyncStore(
+        CSVStore(tmp_path / "rows.csv", ["id", "created_at"], order_by=["created_at", "id"])
+    )
+    store.store.append_many([{"id": f"r{n}", "created_at": f"2024-01-0{n}"} for n in range(1, 6)])
+    calls = []
+    run = store.run
+
+    async def counting_run(func, *args):
+        calls.append(func)
+        return await run(func, *args)
+
+    store.run = counting_run
+
+    async def main():
+        return [
+            [row["id"] for row in batch]
+            async for batch in store.iter_batches(batch_size=2, since=["2024-01-02"])
+        ]
+
+    assert anyio.run(main) == [["r2", "r3"], ["r4", "r5"]]
+    assert len(calls) == 3  # Two batches, then the empty one.
+
+
+def test_export_attempts_keeps_both_ends_of_the_range(monkeypatch, call_api):
+    seconds = iter(range(10, 20))
+    monkeypatch.setattr("backend.app.now_iso", lambda: f"2025-01-05T10:00:{next(seconds)}")
+    attempt = {
+        "sentence_id": "s1",
+        "asr_text": "bonjour",
+        "score": 1,
+        "words_total": 1,
+        "words_correct": 1,
+        "diff_json": [],
+        "duration_ms": 800,
+    }
+
+    async def main(client):
+        for _ in range(4):
+            await client.post("/api/attempts", json=attempt)
+        bounds = {"date_from": "2025-01-05T10:00:11", "date_to": "2025-01-05T10:00:12"}
+        return await client.get("/api/export/attempts", params=bounds)
+
+    lines = call_api(main).text.splitlines()
+    assert [line.split(",")[-1] for line in lines[1:]] == [
+        "2025-01-05T10:00:11",
+        "2025-01-05T10:00:12",
+    ]
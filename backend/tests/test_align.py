@@ -0,0 +1,54 @@
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from backend.align import align_many, align_texts
+from backend.text import tokenize
+
+FIXTURES = Path(__file__).resolve().parents[2] / "frontend" / "src" / "lib" / "align.fixtures.json"
+CASES = json.loads(FIXTURES.read_text(encoding="utf-8"))
+
+
+def test_tokenize_splits_apostrophes():
+    assert tokenize("L'ami d'Éric") == ["le", "ami", "de", "éric"]
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case["reference"] or "<empty>")
+def test_matches_frontend_alignment(case):
+    result = align_texts(case["reference"], case["hypothesis"])
+    assert {
+        "diff": result.diff,
+        "wordsTotal": result.words_total,
+        "wordsCorrect": result.words_correct,
+        "referenceTokens": result.reference_tokens,
+        "hypothesisTokens": result.hypothesis_tokens,
+    } == case["expected"]
+
+
+def test_align_many_matches_single_alignment(monkeypatch):
+    pairs = [(case["reference"], case["hypothesis"]) for case in CASES] * 3
+    expected = [align_texts(*pair).diff for pair in pairs]
+    assert [result.diff for result in align_many(pairs)] == expected
+
+    monkeypatch.setattr("backend.align.PARALLEL_MIN_PAIRS", 1)
+    assert [result.diff for result in align_many(pairs)] == expected
+
+
+@pytest.mark.parametrize("band", [0, 2])
+def test_banded_alignment_matches_the_full_table(band, monkeypatch):
+    rng = random.Random(6)
+    words = ["le", "la", "chat", "chien", "noir", "dort", "ici"]
+    pairs = []
+    for _ in range(300):
+        reference = [rng.choice(words) for _ in range(rng.randint(0, 12))]
+        hypothesis = [word for word in reference if rng.random() > 0.2]
+        for _ in range(rng.randint(0, 4)):
+            hypothesis.insert(rng.randint(0, len(hypothesis)), rng.choice(words))
+        pairs.append((" ".join(reference), " ".join(hypothesis)))
+
+    monkeypatch.setattr("backend.align.ALIGN_BAND", 1000)
+    expected = [align_texts(*pair) for pair in pairs]
+    monkeypatch.setattr("backend.align.ALIGN_BAND", band)
+    assert [align_texts(*pair) for pair in pairs] == expected
@@ -0,0 +1,47 @@
+import json
+
+from backend.analytics import WordErrorIndex
+
+
+def attempt(sentence_id, diff, lang="fr-FR"):
+    return {"sentence_id": sentence_id, "target_lang": lang, "diff_json": json.dumps(diff)}
+
+
+def test_most_missed_words():
+    index = WordErrorIndex()
+    index.rebuild(
+        [
+            attempt(
+                "s1",
+                [
+                    {"op": "match", "ref": "le", "hyp": "le"},
+                    {"op": "sub", "ref": "chat", "hyp": "chaud"},
+                    {"op": "ins", "ref": None, "hyp": "euh"},
+                ],
+            ),
+            attempt("s2", [{"op": "sub", "ref": "chat", "hyp": "chaud"}]),
+            attempt("s2", [{"op": "del", "ref": "le", "hyp": None}]),
+            attempt("s3", [{"op": "del", "ref": "gato", "hyp": None}], lang="es-ES"),
+            {"sentence_id": "s4", "target_lang": "fr-FR", "diff_json": "not json"},
+        ]
+    )
+    index.add([attempt("s3", [{"op": "sub", "ref": "chat", "hyp": "chapeau"}])])
+
+    top = index.most_missed("fr-FR")
+    assert [(stat["word"], stat["misses"], stat["seen"]) for stat in top] == [
+        ("chat", 3, 3),
+        ("le", 1, 2),
+    ]
+    assert top[0]["substitutions"] == [
+        {"hyp": "chaud", "count": 2},
+        {"hyp": "chapeau", "count": 1},
+    ]
+    assert top[0]["sentence_ids"] == ["s1", "s2", "s3"]
+    assert top[1]["miss_rate"] == 0.5
+    assert index.most_missed("fr-FR", limit=1, max_substitutions=1)[0]["substitutions"] == [
+        {"hyp": "chaud", "count": 2}
+    ]
+    assert [stat["word"] for stat in index.most_missed("es-ES")] == ["gato"]
+    assert index.most_missed("fr-FR", word="le")[0]["sentence_ids"] == ["s2"]
+    assert index.most_missed("fr-FR", word="absent") == []
+    assert index.most_missed("de-DE") == []
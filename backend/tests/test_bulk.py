@@ -0,0 +1,69 @@
+def post_bulk(call_api, *batches):
+    async def main(client):
+        responses = [await client.post("/api/sentences/bulk", json=ops) for ops in batches]
+        listing = await client.get("/api/sentences", params={"limit": 500})
+        return responses, {row["id"]: row for row in listing.json()}
+
+    return call_api(main)
+
+
+def create(sentence_id, text, tags=""):
+    sentence = {"sentence_text": text, "tags": tags}
+    return {"op": "create", "id": sentence_id, "sentence": sentence}
+
+
+def test_bulk_applies_operations_in_order(call_api):
+    seed = [create("a", "Un", "grammaire"), create("b", "Deux", "grammaire"), create("c", "Trois")]
+    edits = [
+        {"op": "update", "where": {"tag": "grammaire"}, "changes": {"difficulty": "hard"}},
+        {"op": "update", "id": "a", "changes": {"sentence_text": "Une"}},
+        {"op": "delete", "id": "c"},
+        create("d", "Quatre", "grammaire"),
+    ]
+    (first, second), rows = post_bulk(call_api, seed, edits)
+
+    assert first.json()["created"] == 3
+    report = second.json()
+    assert report["applied"]
+    # Net changes: "a", updated twice, counts once.
+    assert (report["created"], report["updated"], report["deleted"]) == (1, 2, 1)
+    assert sorted(report["results"][0]["ids"]) == ["a", "b"]
+    assert sorted(rows) == ["a", "b", "d"]
+    assert rows["a"]["sentence_text"] == "Une" and rows["a"]["difficulty"] == "hard"
+    assert rows["b"]["difficulty"] == "hard"
+    assert rows["d"]["difficulty"] == "medium"
+
+
+def test_bulk_counts_the_net_change(call_api):
+    seed = [create("a", "Un"), create("b", "Deux")]
+    edits = [
+        {"op": "update", "id": "a", "changes": {"difficulty": "hard"}},
+        {"op": "delete", "id": "a"},
+        create("c", "Trois"),
+        {"op": "update", "id": "c", "changes": {"difficulty": "easy"}},
+        create("d", "Quatre"),
+        {"op": "delete", "id": "d"},
+    ]
+    (_, second), rows = post_bulk(call_api, seed, edits)
+
+    report = second.json()
+    assert (report["created"], report["updated"], report["deleted"]) == (1, 0, 1)
+    assert sorted(rows) == ["b", "c"] and rows["c"]["difficulty"] == "easy"
+
+
+def test_bulk_writes_nothing_when_an_operation_fails(call_api):
+    failing = [
+        create("a", "Un"),
+        {"op": "delete", "id": "missing"},
+        {"op": "update", "where": {}, "changes": {"difficulty": "easy"}},
+    ]
+    (response,), rows = post_bulk(call_api, failing)
+
+    assert response.status_code == 422
+    results = response.json()["detail"]["results"]
+    assert [result["error"] for result in results] == [
+        None,
+        "Sentence not found",
+        "where needs at least one filter",
+    ]
+    assert rows == {}
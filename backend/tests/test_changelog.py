@@ -0,0 +1,132 @@
+from backend.changelog import ChangeLog
+from backend.csv_store import CSVStore
+
+FIELDS = ["id", "lang", "text"]
+
+
+def make(tmp_path):
+    store = CSVStore(tmp_path / "rows.csv", FIELDS)
+    return store, ChangeLog(tmp_path / "rows.changes.csv", "lang", partition_default="fr")
+
+
+def ids(rows):
+    return sorted(row["id"] for row in rows)
+
+
+def test_changes_since_a_version(tmp_path):
+    store, log = make(tmp_path)
+    store.append_many([{"id": "a", "lang": "fr"}, {"id": "b", "lang": "en"}, {"id": "c"}])
+    first = log.changes(store)
+    assert first.reset and ids(first.upserts) == ["a", "b", "c"]
+
+    assert log.changes(store, first.version, first.epoch).upserts == []
+    store.update("a", {"id": "a", "lang": "fr", "text": "edited"})
+    store.update("b", {"id": "b", "lang": "fr"})
+    store.delete("c")
+    store.append({"id": "d", "lang": "en"})
+
+    delta = log.changes(store, first.version, first.epoch)
+    assert not delta.reset and delta.version > first.version
+    assert ids(delta.upserts) == ["a", "b", "d"]
+    assert delta.deleted == ["c"]
+
+    french = log.changes(store, first.version, first.epoch, "fr")
+    assert ids(french.upserts) == ["a", "b"]
+    assert french.deleted == ["c"]
+    english = log.changes(store, first.version, first.epoch, "en")
+    assert ids(english.upserts) == ["d"]
+    assert english.deleted == ["b"]
+
+
+def test_other_processes_share_the_numbering(tmp_path):
+    store, log = make(tmp_path)
+    store.append({"id": "a"})
+    start = log.changes(store)
+
+    other_store, other_log = make(tmp_path)
+    other_store.append({"id": "b"})
+    assert ids(other_log.changes(other_store, start.version, start.epoch).upserts) == ["b"]
+
+    delta = log.changes(store, start.version, start.epoch)
+    assert ids(delta.upserts) == ["b"]
+    # Logged once, by whichever process looked first.
+    with (tmp_path / "rows.changes.csv").open(encoding="utf-8") as fp:
+        assert sum(",b," in line for line in fp) == 1
+
+
+def test_watched_store_logs_appends_without_a_full_pass(tmp_path, monkeypatch):
+    store, log = make(tmp_path)
+    log.watch(store)
+    store.append({"id": "a"})
+    start = log.changes(store)
+
+    scans = []
+    iter_rows = CSVStore.iter_rows
+
+    def counting_iter_rows(self, *args, **kwargs):
+        scans.append(self)
+        return iter_rows(self, *args, **kwargs)
+
+    monkeypatch.setattr(CSVStore, "iter_rows", counting_iter_rows)
+    store.append({"id": "b"})
+    make(tmp_path)[0].append({"id": "c", "lang": "en"})  # Another process.
+    log.sync(store)
+    assert scans == []
+
+    store.update("a", {"id": "a", "text": "edited"})
+    log.sync(store)
+    assert len(scans) == 1
+    delta = log.changes(store, start.version, start.epoch)
+    assert ids(delta.upserts) == ["a", "b", "c"] and delta.deleted == []
+
+
+def test_unknown_epoch_or_version_resends_everything(tmp_path):
+    store, log = make(tmp_path)
+    store.append({"id": "a"})
+    current = log.changes(store)
+    assert log.changes(store, current.version, "another").reset
+    assert log.changes(store, current.version + 1, current.epoch).reset
+
+    (tmp_path / "rows.changes.csv").unlink()
+    store.append({"id": "b"})
+    delta = make(tmp_path)[1].changes(store, current.version, current.epoch)
+    assert delta.reset and delta.epoch != current.epoch
+    assert ids(delta.upserts) == ["a", "b"]
+
+
+def test_compaction_keeps_the_latest_records(tmp_path, monkeypatch):
+    monkeypatch.setattr("backend.changelog.COMPACT_SLACK", 0)
+    store, log = make(tmp_path)
+    store.append_many([{"id": "a"}, {"id": "b"}])
+    start = log.changes(store)
+    for text in ("1", "2", "3"):
+        store.update("a", {"id": "a", "text": text})
+        log.sync(store)
+    store.delete("b")
+
+    delta = log.changes(store, start.version, start.epoch)
+    assert ids(delta.upserts) == ["a"] and delta.deleted == ["b"]
+    lines = (tmp_path / "rows.changes.csv").read_text(encoding="utf-8").splitlines()
+    assert len(lines) <= 5
+    reopened = make(tmp_path)[1].changes(store, start.version, start.epoch)
+    assert reopened.version == delta.version
+    assert ids(reopened.upserts) == ["a"] and reopened.deleted == ["b"]
+
+
+def test_sync_endpoint_sends_values_in_field_order(call_api):
+    async def main(client):
+        created = await client.post(
+            "/api/sentences", json={"sentence_text": "Bonjour", "target_lang": "fr-FR"}
+        )
+        full = (await client.get("/api/sync/sentences")).json()
+        await client.delete(f"/api/sentences/{created.json()['id']}")
+        params = {"since": full["version"], "epoch": full["epoch"], "target_lang": "fr-FR"}
+        delta = (await client.get("/api/sync/sentences", params=params)).json()
+        return full, delta
+
+    full, delta = call_api(main)
+    assert full["reset"]
+    row = dict(zip(full["fields"], full["upserts"][0]))
+    assert row["sentence_text"] == "Bonjour"
+    assert not delta["reset"]
+    assert delta["upserts"] == [] and delta["deleted"] == [row["id"]]
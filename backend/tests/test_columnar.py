@@ -0,0 +1,165 @@
+import json
+import math
+
+import pytest
+
+from backend.analytics import WordErrorIndex
+from backend.columnar import CODE, DIFF, FLOAT, INT, OPS, TIME, Columns, CorruptSnapshot
+from backend.csv_store import CSVStore
+from backend.scheduler import ReviewScheduler
+from backend.sharded_store import ShardedStore
+from backend.stats import AttemptStats
+
+FIELDS = [
+    "id",
+    "sentence_id",
+    "target_lang",
+    "score",
+    "words_total",
+    "words_correct",
+    "duration_ms",
+    "diff_json",
+    "created_at",
+]
+KINDS = {
+    "sentence_id": CODE,
+    "target_lang": CODE,
+    "score": FLOAT,
+    "words_total": INT,
+    "words_correct": INT,
+    "duration_ms": INT,
+    "created_at": TIME,
+    "diff_json": DIFF,
+}
+
+
+def attempt(row_id, sentence_id, lang, created_at, score="0.5", diff=()):
+    return {
+        "id": row_id,
+        "sentence_id": sentence_id,
+        "target_lang": lang,
+        "score": score,
+        "words_total": "2",
+        "diff_json": json.dumps(list(diff)),
+        "created_at": created_at,
+    }
+
+
+MISSED = [{"op": "sub", "ref": "chat", "hyp": "chaud"}, {"op": "match", "ref": "le", "hyp": "le"}]
+ROWS = [
+    attempt("a", "s1", "fr-FR", "2025-01-05T10:00:00", "0.9", MISSED),
+    attempt("b", "s2", "en-US", "2025-01-06T10:00:00", "1", [{"op": "del", "ref": "cat"}]),
+    attempt("c", "s1", "fr-FR", "2025-02-01T08:00:00", "0.2", MISSED[:1]),
+    attempt("d", "s3", "fr-FR", "2025-03-01T00:00:00", "oops", [{"op": "ins", "hyp": "é"}]),
+]
+
+
+def make_store(tmp_path):
+    return ShardedStore(
+        tmp_path / "attempts",
+        FIELDS,
+        partition_field="target_lang",
+        partition_default="fr-FR",
+        columns=KINDS,
+    )
+
+
+def test_snapshot_round_trip(tmp_path):
+    rows = ROWS + [{"id": "e", "diff_json": "not json", "created_at": "yesterday"}]
+    columns = Columns.from_rows(rows, KINDS, FIELDS)
+    columns.write(tmp_path / "block.cols", meta={"checksum": "abc"})
+    mapped = Columns.open(tmp_path / "block.cols")
+
+    expected = [{field: row.get(field) or "" for field in mapped.fieldnames} for row in rows]
+    for block in (columns, mapped):
+        assert list(block.rows()) == expected
+        assert list(block.numbers("score")) == [0.9, 1.0, 0.2, 0.0, 0.0]
+        assert list(block.numbers("words_correct")) == [0] * 5
+        assert block.codes("target_lang").values == ["fr-FR", "en-US", ""]
+        assert math.isnan(block.numbers("created_at")[-1])
+        tokens = block.tokens("diff_json")
+        assert list(tokens.offsets) == [0, 2, 3, 4, 5, 5]
+        assert [OPS[op] for op in tokens.ops] == ["sub", "match", "del", "sub", "ins"]
+        assert [tokens.words[code] for code in tokens.hyps] == ["chaud", "le", "", "chaud", "é"]
+        assert sorted(count for *_, count in tokens.tally) == [1, 1, 1, 2]
+    assert mapped.meta == {"checksum": "abc"}
+
+    for garbage in (b"", b"ECOLS001", (tmp_path / "block.cols").read_bytes()[:-8]):
+        (tmp_path / "bad.cols").write_bytes(garbage)
+        with pytest.raises(CorruptSnapshot):
+            Columns.open(tmp_path / "bad.cols")
+
+
+def test_views_read_snapshots_like_rows(tmp_path):
+    Columns.from_rows(ROWS, KINDS, FIELDS).write(tmp_path / "block.cols")
+    blocks = [Columns.open(tmp_path / "block.cols")]
+    for view in (AttemptStats, WordErrorIndex, ReviewScheduler):
+        from_rows, from_columns = view(), view()
+        from_rows.rebuild(ROWS)
+        from_columns.rebuild_columns(blocks)
+        state = {key: value for key, value in vars(from_rows).items() if key != "_lock"}
+        assert state == {key: value for key, value in vars(from_columns).items() if key != "_lock"}
+
+
+def fill(tmp_path):
+    store = make_store(tmp_path)
+    for row in ROWS:
+        # A month at a time, so that older months get sealed.
+        store.append(row)
+    return store
+
+
+def test_sealed_shards_are_served_from_snapshots(tmp_path, monkeypatch):
+    store = fill(tmp_path)
+    assert sorted(path.name for path in tmp_path.glob("attempts/*/*.cols")) == [
+        "2025-01.cols",
+        "2025-01.cols",
+        "2025-02.cols",
+    ]
+    version = store.version()
+
+    loaded = []
+    reload_locked = CSVStore._reload_locked
+    monkeypatch.setattr(
+        CSVStore,
+        "_reload_locked",
+        lambda shard: loaded.append(shard.path.parent.name) or reload_locked(shard),
+    )
+    reopened = make_store(tmp_path)
+    seen = []
+    reopened.subscribe(lambda rows: seen.append(rows))
+    reopened.refresh()
+    assert seen == [None]
+    assert loaded == ["fr-FR"]
+    assert reopened.version() == version
+    assert reopened.count() == 4
+    assert [row["id"] for row in reopened.iter_rows()] == ["a", "b", "c", "d"]
+    assert [len(block) for block in reopened.iter_columns(KINDS)] == [1, 1, 1, 1]
+    assert loaded == ["fr-FR"]
+    # A bound falling in a sealed month reads that month's shards, not the snapshot.
+    since = reopened.iter_rows(since=["2025-01-06T10:00:00"])
+    assert [row["id"] for row in since] == ["b", "c", "d"]
+
+    # A query needing indexes loads the shard, which is not reported again.
+    assert [row["id"] for row in reopened.select({"sentence_id": "s1"})] == ["a", "c"]
+    assert len(loaded) == 4 and seen == [None]
+
+    # Written to again: unsealed, and its snapshot goes.
+    reopened.append(attempt("e", "s1", "fr-FR", "2025-01-07T00:00:00"))
+    assert [row["id"] for row in seen[-1]] == ["e"]
+    assert not (tmp_path / "attempts/fr-FR/2025-01.cols").exists()
+    assert [len(block) for block in make_store(tmp_path).iter_columns(KINDS)] == [1, 2, 1, 1]
+
+
+def test_shards_rewritten_before_they_load_are_reported(tmp_path):
+    fill(tmp_path)
+    store, other = make_store(tmp_path), make_store(tmp_path)
+    seen = []
+    store.subscribe(lambda rows: seen.append(rows))
+    store.refresh()
+    assert seen == [None]
+
+    other.delete("b")
+    store.refresh()
+    assert seen == [None, None]
+    assert [row["id"] for row in store.iter_rows()] == ["a", "c", "d"]
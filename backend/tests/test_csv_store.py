@@ -0,0 +1,307 @@
+import csv
+import threading
+import time
+
+import pytest
+
+from backend.csv_store import CSVStore
+from backend.indexes import HashIndex, TagIndex, TextIndex
+
+FIELDS = ["id", "name"]
+
+
+def make_store(tmp_path):
+    return CSVStore(tmp_path / "rows.csv", FIELDS)
+
+
+def test_append_update_delete_roundtrip(tmp_path):
+    store = make_store(tmp_path)
+    store.append({"id": "a", "name": "alpha"})
+    store.append({"id": "b", "name": "beta"})
+    assert store.update("a", {"id": "a", "name": "ALPHA"})
+    assert store.delete("b")
+    assert not store.delete("missing")
+
+    reopened = make_store(tmp_path)
+    assert reopened.read_all() == [{"id": "a", "name": "ALPHA"}]
+    assert reopened.get("a") == {"id": "a", "name": "ALPHA"}
+    assert reopened.get("b") is None
+
+
+def test_apply_writes_a_planned_batch_once(tmp_path):
+    store = CSVStore(tmp_path / "rows.csv", FIELDS, journal=True)
+    store.append_many([{"id": "a", "name": "alpha"}, {"id": "b", "name": "beta"}])
+    journal = tmp_path / "rows.csv.journal"
+
+    def plan():
+        renamed = {"id": "a", "name": store.get("a")["name"].upper()}
+        return [renamed, {"id": "c", "name": "gamma"}], ["b", "missing"]
+
+    store.apply(plan)
+    assert len(journal.read_text(encoding="utf-8").splitlines()) == 4  # header + 3 records
+
+    def failing():
+        raise RuntimeError("rejected")
+
+    with pytest.raises(RuntimeError):
+        store.apply(failing)
+    with pytest.raises(ValueError):
+        store.apply(lambda: ([{"id": "d", "name": "delta"}, {"name": "no id"}], ["a"]))
+    reopened = make_store(tmp_path)
+    assert reopened.read_all() == [{"id": "a", "name": "ALPHA"}, {"id": "c", "name": "gamma"}]
+    assert store.read_all() == reopened.read_all()
+
+
+def test_cache_reloads_after_external_write(tmp_path):
+    store = make_store(tmp_path)
+    store.append({"id": "a", "name": "alpha"})
+    assert store.get("a")["name"] == "alpha"
+
+    with (tmp_path / "rows.csv").open("a", newline="", encoding="utf-8") as fp:
+        csv.DictWriter(fp, fieldnames=FIELDS).writerow({"id": "zz", "name": "external write"})
+
+    assert store.get("zz") == {"id": "zz", "name": "external write"}
+    assert [row["id"] for row in store.read_all()] == ["a", "zz"]
+
+
+def test_rows_without_ids_are_kept(tmp_path):
+    path = tmp_path / "rows.csv"
+    path.write_text("id,name\n,anonymous\na,first\na,second\n", encoding="utf-8")
+    store = CSVStore(path, FIELDS)
+    assert len(store.read_all()) == 3
+    assert store.get("a")["name"] == "first"
+
+
+def make_journaled_store(tmp_path, **kwargs):
+    return CSVStore(tmp_path / "rows.csv", FIELDS, journal=True, **kwargs)
+
+
+def test_journal_replays_updates_and_deletes(tmp_path):
+    store = make_journaled_store(tmp_path)
+    for row_id in "abc":
+        store.append({"id": row_id, "name": row_id})
+    base = (tmp_path / "rows.csv").read_text(encoding="utf-8")
+
+    assert store.update("b", {"id": "b", "name": "BETA"})
+    assert store.delete("a")
+    store.append({"id": "a", "name": "again"})
+
+    assert (tmp_path / "rows.csv").read_text(encoding="utf-8") == base
+    reopened = make_journaled_store(tmp_path)
+    assert reopened.read_all() == [
+        {"id": "b", "name": "BETA"},
+        {"id": "c", "name": "c"},
+        {"id": "a", "name": "again"},
+    ]
+
+    reopened.compact()
+    assert not (tmp_path / "rows.csv.journal").exists()
+    assert make_journaled_store(tmp_path).read_all() == reopened.read_all()
+
+
+@pytest.mark.parametrize("torn", ['put,a,"half writ', 'put,a,"first line\nsecond li'])
+def test_journal_ignores_torn_tail(tmp_path, torn):
+    store = make_journaled_store(tmp_path)
+    store.append({"id": "a", "name": "alpha"})
+    store.update("a", {"id": "a", "name": "ALPHA\nwith a newline"})
+    with (tmp_path / "rows.csv.journal").open("a", encoding="utf-8") as fp:
+        fp.write(torn)
+
+    reopened = make_journaled_store(tmp_path)
+    assert reopened.get("a") == {"id": "a", "name": "ALPHA\nwith a newline"}
+    reopened.update("a", {"id": "a", "name": "final"})
+    assert make_journaled_store(tmp_path).get("a") == {"id": "a", "name": "final"}
+
+
+def test_journal_compacts_past_threshold(tmp_path):
+    store = make_journaled_store(tmp_path, compact_threshold=1)
+    store.append({"id": "a", "name": "alpha"})
+    store.update("a", {"id": "a", "name": "ALPHA"})
+    # Folded in by a background thread.
+    deadline = time.monotonic() + 5
+    while (tmp_path / "rows.csv.journal").exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not (tmp_path / "rows.csv.journal").exists()
+    assert make_journaled_store(tmp_path).get("a") == {"id": "a", "name": "ALPHA"}
+
+
+def test_select_uses_indexes_and_keeps_store_order(tmp_path):
+    fields = ["id", "lang", "tags"]
+    store = CSVStore(
+        tmp_path / "rows.csv",
+        fields,
+        indexes=[HashIndex("lang", default="fr"), TagIndex("tags")],
+    )
+    store.append({"id": "a", "lang": "", "tags": "verbe, Grammaire"})
+    store.append({"id": "b", "lang": "de", "tags": "grammaire"})
+    store.append({"id": "c", "lang": "fr", "tags": "voyage"})
+    store.append({"id": "d", "lang": "fr", "tags": "grammaire"})
+
+    def ids(**where):
+        return [row["id"] for row in store.select(where)]
+
+    assert ids(lang="fr") == ["a", "c", "d"]
+    assert ids(lang="fr", tag="grammaire") == ["a", "d"]
+    assert ids(tag="GRAMMAIRE", tags="grammaire") == ["b", "d"]
+    assert [row["id"] for row in store.select({"lang": "fr"}, offset=1, limit=1)] == ["c"]
+
+    store.update("a", {"id": "a", "lang": "de", "tags": ""})
+    store.delete("d")
+    assert ids(lang="fr") == ["c"]
+    assert ids(tag="grammaire") == ["b"]
+    assert ids(lang="de") == ["a", "b"]
+
+
+def test_select_full_text_search(tmp_path):
+    fields = ["id", "sentence_text", "translation_text"]
+    store = CSVStore(tmp_path / "rows.csv", fields, indexes=[TextIndex()])
+    store.append({"id": "a", "sentence_text": "L'été est chaud.", "translation_text": "夏天很热。"})
+    store.append({"id": "b", "sentence_text": "Il était une fois", "translation_text": ""})
+
+    def ids(query):
+        return [row["id"] for row in store.select({"search": query})]
+
+    assert ids("ete") == ["a"]
+    assert ids("et") == ["a", "b"]
+    assert ids("le CHAUD") == ["a"]
+    assert ids("夏天") == ["a"]
+    assert ids("热") == ["a"]
+    assert ids("天热") == []
+
+    store.update("a", {"id": "a", "sentence_text": "Autre chose", "translation_text": ""})
+    assert ids("ete") == []
+    assert ids("autre") == ["a"]
+
+
+def test_select_keyset_pagination(tmp_path):
+    fields = ["id", "created_at", "lang"]
+    store = CSVStore(
+        tmp_path / "rows.csv", fields, indexes=[HashIndex("lang")], order_by=["created_at", "id"]
+    )
+    for n in range(10):
+        lang = "fr" if n % 3 else "de"
+        store.append({"id": f"r{9 - n}", "created_at": f"2024-01-0{n // 2}", "lang": lang})
+
+    def walk(where, descending=False):
+        seen, after = [], None
+        while True:
+            page = store.select(where, limit=3, after=after, descending=descending)
+            seen += [row["id"] for row in page]
+            if len(page) < 3:
+                return seen
+            after = [page[-1]["created_at"], page[-1]["id"]]
+
+    ascending = walk({})
+    assert ascending == ["r8", "r9", "r6", "r7", "r4", "r5", "r2", "r3", "r0", "r1"]
+    assert walk({}, descending=True) == ascending[::-1]
+    german = {"r9", "r6", "r3", "r0"}
+    assert walk({"lang": "fr"}) == [row_id for row_id in ascending if row_id not in german]
+    assert [row["id"] for row in store.iter_rows(batch_size=3)] == ascending
+    assert [row["id"] for row in store.iter_rows({"lang": "de"}, after=["2024-01-02"])] == [
+        "r3",
+        "r0",
+    ]
+    # ``since`` keeps the rows sorting at the bound itself.
+    for batch_size in (1, 500):
+        rows = store.iter_rows({"lang": "de"}, batch_size=batch_size, since=["2024-01-03"])
+        assert [row["id"] for row in rows] == ["r3", "r0"]
+    assert [row["id"] for row in store.iter_rows(after=["2024-01-03", "r3"])] == ["r0", "r1"]
+    assert [row["id"] for row in store.select(since=["2024-01-03", "r3"])] == ["r3", "r0", "r1"]
+    assert store.count({"lang": "de"}) == 4
+    assert store.count() == 10
+
+
+def test_selective_iter_rows_sorts_once(tmp_path, monkeypatch):
+    store = CSVStore(
+        tmp_path / "rows.csv",
+        ["id", "created_at", "lang"],
+        indexes=[HashIndex("lang")],
+        order_by=["created_at", "id"],
+    )
+    store.append_many(
+        [
+            {"id": f"r{n:02}", "created_at": f"2024-01-{n:02}", "lang": "de" if n % 10 else "fr"}
+            for n in range(1, 41)
+        ]
+    )
+    sorts = []
+    sorted_matches = CSVStore._sorted_matches
+
+    def spy(self, matched):
+        entries = sorted_matches(self, matched)
+        sorts.append(entries is not None)
+        return entries
+
+    monkeypatch.setattr(CSVStore, "_sorted_matches", spy)
+    rows = store.iter_rows({"lang": "fr"}, batch_size=1, since=["2024-01-20"])
+    assert next(rows)["id"] == "r20"
+    store.delete("r30")
+    assert [row["id"] for row in rows] == ["r40"]
+    assert sorts == [True]
+
+
+def test_group_commit_coalesces_concurrent_appends(tmp_path, monkeypatch):
+    store = CSVStore(tmp_path / "rows.csv", FIELDS, group_commit_window=0.01)
+    writes = []
+    append_many = store.append_many
+
+    def counting_write(rows):
+        writes.append(len(rows))
+        append_many(rows)
+
+    monkeypatch.setattr(store._group_commit, "_write", counting_write)
+
+    threads = [
+        threading.Thread(target=store.append, args=({"id": str(n), "name": f"row {n}"},))
+        for n in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(writes) == 20
+    assert len(writes) < 20
+    assert sorted(int(row["id"]) for row in make_store(tmp_path).read_all()) == list(range(20))
+
+
+def test_version_tracks_content(tmp_path):
+    store = make_journaled_store(tmp_path)
+    initial, _ = store.version()
+    store.append({"id": "a", "name": "alpha"})
+    with_a, modified = store.version()
+    assert with_a != initial
+    assert modified > 0
+    store.update("a", {"id": "a", "name": "ALPHA"})
+    assert store.version()[0] not in (initial, with_a)
+    store.update("a", {"id": "a", "name": "alpha"})
+    assert store.version()[0] == with_a
+    assert make_journaled_store(tmp_path).version()[0] == with_a
+    store.delete("a")
+    assert store.version()[0] == initial
+
+
+def test_generation_keeps_processes_coherent(tmp_path):
+    # Two instances stand in for two worker processes; with a long stat
+    # interval only the shared generation counter tells them about writes.
+    first = make_journaled_store(tmp_path, stat_interval=3600)
+    second = make_journaled_store(tmp_path, stat_interval=3600)
+    first.append({"id": "a", "name": "alpha"})
+    assert second.read_all() == [{"id": "a", "name": "alpha"}]
+
+    seen = []
+    second.subscribe(seen.append)
+    first.append_many([{"id": "b", "name": "beta"}, {"id": "c", "name": "gamma"}])
+    assert second.get("c") == {"id": "c", "name": "gamma"}
+    assert seen == [[{"id": "b", "name": "beta"}, {"id": "c", "name": "gamma"}]]
+
+    # Same size and, likely, the same mtime tick: only the counter moves.
+    first.update("a", {"id": "a", "name": "ALPHA"})
+    assert second.get("a") == {"id": "a", "name": "ALPHA"}
+    assert seen[-1] is None
+    second.append({"id": "d", "name": "delta"})
+    assert seen[-1] == [{"id": "d", "name": "delta"}]
+    first.compact()
+    second.delete("b")
+    assert [row["id"] for row in first.read_all()] == ["a", "c", "d"]
+    assert first.version()[0] == second.version()[0]
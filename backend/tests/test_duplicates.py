@@ -0,0 +1,77 @@
+import io
+
+from backend.duplicates import DuplicateIndex
+
+
+def sentence(row_id, text, lang="fr-FR"):
+    return {"id": row_id, "sentence_text": text, "target_lang": lang}
+
+
+BANK = [
+    sentence("a", "Je n'aime pas les épinards."),
+    sentence("b", "je  n’aime pas les épinards"),
+    sentence("c", "Je n'aime pas du tout les épinards."),
+    sentence("d", "Il fait beau aujourd'hui."),
+    sentence("e", "Je n'aime pas les épinards.", lang="en-US"),
+]
+
+
+def test_exact_and_near_matches():
+    index = DuplicateIndex()
+    index.rebuild(BANK)
+
+    assert index.matches(sentence("x", "JE N'AIME PAS LES ÉPINARDS !"))[:2] == [
+        ("a", 1.0),
+        ("b", 1.0),
+    ]
+    found = index.matches(sentence("x", "Je n'aime pas les épinards."))
+    assert [row_id for row_id, _ in found] == ["a", "b", "c"]
+    assert found[2][1] == 0.5
+    assert index.matches(sentence("x", "Il fait froid ce matin.")) == []
+    assert index.matches(BANK[3]) == []  # Not a duplicate of itself.
+
+
+def test_clusters_follow_updates():
+    index = DuplicateIndex()
+    index.rebuild(BANK)
+    clusters = index.clusters()
+    assert [(cluster.ids, cluster.exact) for cluster in clusters] == [(["a", "b", "c"], False)]
+    assert [cluster.ids for cluster in index.clusters(near=False)] == [["a", "b"]]
+    assert index.clusters("en-US") == []
+
+    index.rebuild([BANK[0], sentence("b", "Tout autre chose."), BANK[3], BANK[4]])
+    assert index.clusters() == []
+    index.add([sentence("f", "Il fait beau aujourd'hui !")])
+    (cluster,) = index.clusters()
+    assert cluster.ids == ["d", "f"] and cluster.exact and cluster.similarity == 1.0
+
+
+def test_create_and_import_flag_or_skip_duplicates(call_api):
+    upload = "sentence_text,target_lang\nIl pleut.,fr-FR\nil pleut,fr-FR\nNouvelle phrase.,fr-FR\n"
+
+    async def main(client):
+        first = await client.post("/api/sentences", json={"sentence_text": "Il pleut !"})
+        flagged = await client.post("/api/sentences", json={"sentence_text": "il pleut"})
+        skipped = await client.post(
+            "/api/sentences?duplicates=skip", json={"sentence_text": "Il pleut."}
+        )
+        imported = await client.post(
+            "/api/import/sentences?mode=append&duplicates=skip",
+            files={"file": ("bank.csv", io.BytesIO(upload.encode()), "text/csv")},
+        )
+        clusters = await client.get("/api/sentences/duplicates")
+        return first, flagged, skipped, imported, clusters
+
+    first, flagged, skipped, imported, clusters = call_api(main)
+    first_id = first.json()["id"]
+    assert "X-Duplicate-Of" not in first.headers
+    assert flagged.status_code == 201
+    assert flagged.headers["X-Duplicate-Of"] == first_id
+    assert skipped.status_code == 409
+    assert set(skipped.json()["detail"]["duplicate_of"]) == {first_id, flagged.json()["id"]}
+
+    report = imported.json()
+    assert (report["created"], report["skipped"], report["duplicates"]) == (1, 2, 2)
+    (cluster,) = clusters.json()
+    assert cluster["exact"]
+    assert {item["id"] for item in cluster["sentences"]} == {first_id, flagged.json()["id"]}
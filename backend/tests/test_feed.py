@@ -0,0 +1,200 @@
+import json
+from itertools import count
+
+import anyio
+import pytest
+
+from backend.app import ATTEMPT_STREAM_PATH
+from backend.feed import Feed
+from backend.metrics import REGISTRY
+
+
+def row(row_id, lang="fr-FR", sentence_id="s1"):
+    return {"id": row_id, "target_lang": lang, "sentence_id": sentence_id}
+
+
+def test_subscribers_get_the_rows_matching_their_filters():
+    feed = Feed(["target_lang", "sentence_id"], name="test-filters")
+    everything = feed.subscribe()
+    french = feed.subscribe({"target_lang": "fr-FR"})
+    one = feed.subscribe({"target_lang": "fr-FR", "sentence_id": "s2"})
+    with pytest.raises(ValueError):
+        feed.subscribe({"score": "1"})
+
+    feed.publish([row("a"), row("b", sentence_id="s2"), row("c", lang="en-US")])
+
+    async def main():
+        return [
+            [item["id"] for item in await subscription.next(0)]
+            for subscription in (everything, french, one)
+        ]
+
+    assert anyio.run(main) == [["a", "b", "c"], ["a", "b"], ["b"]]
+
+
+def test_slow_subscribers_are_dropped():
+    feed = Feed(["target_lang"], name="test-overflow", queue_size=2)
+    slow, fast = feed.subscribe(), feed.subscribe({"target_lang": "fr-FR"})
+
+    async def main():
+        feed.publish([row("a"), row("b")])
+        drained = await fast.next(0)
+        feed.publish([row("c")])
+        return drained, await slow.next(0), await fast.next(0)
+
+    drained, dropped, kept = anyio.run(main)
+    assert [item["id"] for item in drained + kept] == ["a", "b", "c"]
+    assert slow.overflowed and dropped == []
+    feed.unsubscribe(slow)
+    feed.unsubscribe(fast)
+
+    text = REGISTRY.render()
+    assert 'ecoute_feed_subscribers{feed="test-overflow"} 0' in text
+    assert 'ecoute_feed_dropped_total{feed="test-overflow"} 1' in text
+    assert 'ecoute_feed_events_total{feed="test-overflow"} 6' in text
+
+
+def test_next_waits_for_a_publish():
+    feed = Feed(["target_lang"], name="test-wait")
+    subscription = feed.subscribe()
+
+    async def main():
+        results = []
+        async with anyio.create_task_group() as tg:
+
+            async def wait():
+                results.append(await subscription.next(5))
+
+            tg.start_soon(wait)
+            await anyio.sleep(0.01)
+            feed.publish([row("a")])
+        return results, await subscription.next(0.01)
+
+    (woken,), timed_out = anyio.run(main)
+    assert [item["id"] for item in woken] == ["a"] and timed_out == []
+
+
+def attempt(sentence_id):
+    return {
+        "sentence_id": sentence_id,
+        "asr_text": "bonjour",
+        "score": 1,
+        "words_total": 1,
+        "words_correct": 1,
+        "diff_json": [{"op": "match", "ref": "bonjour", "hyp": "bonjour"}],
+        "duration_ms": 800,
+    }
+
+
+async def stream(app, query, count, headers=(), during=None):
+    """Read ``count`` attempt events from the stream, then disconnect."""
+    events, done = [], anyio.Event()
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+    buffer = b""
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal buffer
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200
+            return
+        buffer += message.get("body", b"")
+        while b"\n\n" in buffer:
+            chunk, buffer = buffer.split(b"\n\n", 1)
+            fields = dict(
+                line.split(": ", 1) for line in chunk.decode().splitlines() if ": " in line
+            )
+            if fields.get("event") == "attempt":
+                events.append((fields["id"], json.loads(fields["data"])))
+            if during is not None and chunk.startswith(b"retry:"):
+                await during()
+            if len(events) >= count:
+                done.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/attempts/stream",
+        "raw_path": b"/api/attempts/stream",
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"test")] + [(k.encode(), v.encode()) for k, v in headers],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+    with anyio.fail_after(5):
+        await app(scope, receive, send)
+    return events
+
+
+@pytest.fixture
+def feeds(monkeypatch):
+    """The feeds ``create_app`` makes, when requested before ``app``."""
+    feeds = []
+
+    def record_feed(*args, **kwargs):
+        feeds.append(Feed(*args, **kwargs))
+        return feeds[-1]
+
+    monkeypatch.setattr("backend.app.Feed", record_feed)
+    return feeds
+
+
+def test_stream_sends_new_attempts_and_replays_missed_ones(monkeypatch, feeds, app, call_api):
+    # A second apart, so that attempts are streamed in the order they are posted.
+    seconds = count(10)
+    monkeypatch.setattr("backend.app.now_iso", lambda: f"2025-01-05T10:00:{next(seconds)}")
+
+    async def main(client):
+        async def post_some():
+            await client.post("/api/attempts", json=attempt("s2"))
+            await client.post("/api/attempts", json=attempt("s1"))
+
+        live = await stream(app, "sentence_id=s1", 1, during=post_some)
+        missed = await client.post("/api/attempts/batch", json=[attempt("s1")] * 2)
+        stored = await client.get("/api/attempts", params={"sentence_id": "s1"})
+
+        async def publish_late():
+            # Written before the stream resumed but published after it
+            # subscribed: sent once, by the replay.
+            feeds[0].publish(stored.json()[1:])
+            await client.post("/api/attempts", json=attempt("s1"))
+
+        resumed = [("last-event-id", live[0][0])]
+        replayed = await stream(app, "sentence_id=s1", 3, resumed, during=publish_late)
+        return live, [item["id"] for item in missed.json()], replayed
+
+    live, missed, replayed = call_api(main)
+    assert [data["sentence_id"] for _, data in live] == ["s1"]
+    assert [data["id"] for _, data in replayed][:2] == missed
+    assert len({data["id"] for _, data in replayed}) == 3
+
+
+def test_stream_subscribes_only_once_its_body_is_sent(app):
+    prefix = 'ecoute_feed_subscribers{feed="attempts"} '
+
+    def subscribers():
+        lines = REGISTRY.render().splitlines()
+        return next(float(line[len(prefix) :]) for line in lines if line.startswith(prefix))
+
+    stream_attempts = next(
+        route.endpoint for route in app.routes if getattr(route, "path", "") == ATTEMPT_STREAM_PATH
+    )
+    before = subscribers()
+
+    async def main():
+        # The response is never sent, e.g. because the client went away first.
+        await stream_attempts(
+            sentence_id=None, target_lang=None, cursor=None, last_event_id=None, store=None
+        )
+
+    anyio.run(main)
+    assert subscribers() == before
@@ -0,0 +1,115 @@
+import io
+
+import pytest
+
+from backend.importer import CSVImportError, ImportReport, iter_sentences
+
+SEED = (
+    "id,sentence_text,target_lang,created_at\n"
+    "s1,Bonjour,fr-FR,2025-01-01T00:00:00\n"
+    "s2,Merci,fr-FR,2025-01-02T00:00:00\n"
+)
+UPLOAD = "id,sentence_text,target_lang\ns2,Merci beaucoup,fr-FR\ns3,Au revoir,fr-FR\n"
+
+
+def upload(text):
+    data = text if isinstance(text, bytes) else text.encode()
+    return {"file": ("bank.csv", io.BytesIO(data), "text/csv")}
+
+
+def import_over_seed(call_api, mode, text=UPLOAD):
+    async def main(client):
+        await client.post("/api/import/sentences?mode=replace", files=upload(SEED))
+        report = await client.post(f"/api/import/sentences?mode={mode}", files=upload(text))
+        listing = await client.get("/api/sentences", params={"limit": 100})
+        return report, listing.json()
+
+    return call_api(main)
+
+
+@pytest.mark.parametrize("storage_backend", ["csv", "sqlite"])
+@pytest.mark.parametrize(
+    "mode, counts, bank",
+    [
+        ("replace", (2, 0), ["s2 Merci beaucoup", "s3 Au revoir"]),
+        ("upsert", (1, 1), ["s1 Bonjour", "s2 Merci beaucoup", "s3 Au revoir"]),
+        ("append", (2, 0), ["s1 Bonjour", "s2 Merci", "new Merci beaucoup", "s3 Au revoir"]),
+    ],
+)
+def test_import_modes(storage_backend, mode, counts, bank, monkeypatch, call_api):
+    # Written one sentence at a time.
+    monkeypatch.setattr("backend.app.IMPORT_BATCH_SIZE", 1)
+    response, rows = import_over_seed(call_api, mode)
+
+    report = response.json()
+    assert response.status_code == 200
+    assert (report["imported"], report["created"], report["updated"]) == (2, *counts)
+    texts = {row["sentence_text"]: row for row in rows}
+    assert sorted(texts) == sorted(line.split(" ", 1)[1] for line in bank)
+    for line in bank:
+        row_id, text = line.split(" ", 1)
+        assert (texts[text]["id"] == row_id) == (row_id != "new")
+    if mode == "upsert":
+        assert texts["Merci beaucoup"]["created_at"] == "2025-01-02T00:00:00"
+
+
+def test_invalid_rows_are_reported_by_line():
+    text = (
+        "sentence_text,target_lang,difficulty\n"
+        "Bonjour,fr-FR,easy\n"
+        ",fr-FR,easy\n"
+        '"Deux\nlignes",fr-FR,hard\n'
+        "Merci,fr-FR,impossible\n"
+    )
+    report = ImportReport()
+    sentences = list(iter_sentences(io.BytesIO(text.encode()), report))
+
+    assert [sentence.sentence_text for sentence in sentences] == ["Bonjour", "Deux\nlignes"]
+    assert (report.valid, report.error_count) == (2, 2)
+    assert report.errors[0] == {"line": 3, "error": "sentence_text is required"}
+    assert report.errors[1]["line"] == 6 and report.errors[1]["error"].startswith("difficulty")
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ("", "CSV missing header row"),
+        ("sentence_text\nBonjour\n", "CSV missing required columns: target_lang"),
+        ("sentence_text,target_lang\n,fr-FR\n", "No valid sentences found in CSV"),
+    ],
+)
+def test_unusable_uploads_are_rejected(text, message):
+    with pytest.raises(CSVImportError, match=message):
+        list(iter_sentences(io.BytesIO(text.encode()), ImportReport()))
+
+
+def test_non_utf8_upload_is_rejected_before_any_write(monkeypatch, call_api):
+    monkeypatch.setattr("backend.app.IMPORT_BATCH_SIZE", 1)
+    monkeypatch.setattr("backend.importer.CHECK_CHUNK_SIZE", 8)
+    text = UPLOAD.encode() + "s4,Très bien,fr-FR\n".encode("latin-1")
+    for mode in ("append", "upsert", "replace"):
+        response, rows = import_over_seed(call_api, mode, text)
+        assert response.status_code == 400
+        assert response.json()["detail"] == "File must be UTF-8 encoded"
+        assert sorted(row["sentence_text"] for row in rows) == ["Bonjour", "Merci"]
+
+
+@pytest.mark.parametrize("storage_backend", ["csv", "sqlite"])
+def test_replace_import_keeps_the_last_row_of_a_repeated_id(storage_backend, call_api):
+    bank = (
+        "id,sentence_text,target_lang,created_at\n"
+        "z1,Un,fr-FR,2025-01-01T00:00:00\n"
+        "z2,Deux,fr-FR,2025-01-02T00:00:00\n"
+        "z1,Trois,fr-FR,2025-01-01T00:00:00\n"
+    )
+
+    async def main(client):
+        imported = await client.post("/api/import/sentences?mode=replace", files=upload(bank))
+        return imported, await client.get("/api/sentences")
+
+    imported, listing = call_api(main)
+    assert imported.status_code == 200
+    assert [(row["id"], row["sentence_text"]) for row in listing.json()] == [
+        ("z1", "Trois"),
+        ("z2", "Deux"),
+    ]
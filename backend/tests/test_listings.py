@@ -0,0 +1,148 @@
+import base64
+from itertools import count
+
+import pytest
+
+BACKENDS = pytest.mark.parametrize("storage_backend", ["csv", "sqlite"])
+LONG_AGO = "Mon, 01 Jan 2001 00:00:00 GMT"
+
+
+def revalidate(client, etag=None, modified=None, path="/api/sentences"):
+    headers = {}
+    if etag is not None:
+        headers["If-None-Match"] = etag
+    if modified is not None:
+        headers["If-Modified-Since"] = modified
+    return client.get(path, headers=headers)
+
+
+@BACKENDS
+def test_unchanged_sentences_are_not_sent_again(storage_backend, call_api):
+    async def main(client):
+        await client.post("/api/sentences", json={"sentence_text": "Bonjour"})
+        first = await client.get("/api/sentences")
+        etag, modified = first.headers["ETag"], first.headers["Last-Modified"]
+        return first, [
+            await revalidate(client, etag),
+            await revalidate(client, etag.removeprefix("W/")),
+            await revalidate(client, f'"other", {etag}'),
+            await revalidate(client, modified=modified),
+            await revalidate(client, etag, path="/api/export/sentences"),
+            await revalidate(client, '"other"'),
+            await revalidate(client, modified=LONG_AGO),
+            # If-None-Match wins over If-Modified-Since.
+            await revalidate(client, '"other"', modified),
+        ]
+
+    first, responses = call_api(main)
+    assert first.status_code == 200 and first.headers["ETag"].startswith('W/"')
+    assert [response.status_code for response in responses] == [304] * 5 + [200] * 3
+    for response in responses[:5]:
+        assert response.content == b""
+        assert response.headers["ETag"] == first.headers["ETag"]
+    assert responses[-1].json() == first.json()
+
+
+@BACKENDS
+def test_writes_change_the_etag(storage_backend, call_api):
+    async def main(client):
+        created = (await client.post("/api/sentences", json={"sentence_text": "Un"})).json()
+        etags = [(await client.get("/api/sentences")).headers["ETag"]]
+        await client.put(f"/api/sentences/{created['id']}", json={"sentence_text": "Deux"})
+        stale = await revalidate(client, etags[-1])
+        etags.append(stale.headers["ETag"])
+        await client.delete(f"/api/sentences/{created['id']}")
+        deleted = await revalidate(client, etags[-1])
+        etags.append(deleted.headers["ETag"])
+        return stale, deleted, etags
+
+    stale, deleted, etags = call_api(main)
+    assert stale.status_code == 200 and stale.json()[0]["sentence_text"] == "Deux"
+    assert deleted.status_code == 200 and deleted.json() == []
+    assert len(set(etags)) == 3
+
+
+async def walk(client, path, params):
+    """Every page of a listing, following ``X-Next-Cursor`` until it is absent."""
+    pages, cursor = [], None
+    while True:
+        response = await client.get(path, params={**params, "cursor": cursor} if cursor else params)
+        assert response.status_code == 200
+        pages.append(response)
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+
+
+@BACKENDS
+def test_sentences_are_listed_page_by_page(storage_backend, monkeypatch, call_api):
+    # Two at a time on each timestamp, so that pages also split on the id.
+    stamps = (f"2025-01-01T00:00:0{n // 2}" for n in count())
+    monkeypatch.setattr("backend.app.now_iso", lambda: next(stamps))
+
+    async def main(client):
+        for n in range(5):
+            await client.post("/api/sentences", json={"sentence_text": f"Phrase {n}"})
+        everything = await client.get("/api/sentences", params={"total": "true"})
+        pages = await walk(client, "/api/sentences", {"limit": 2, "total": "true"})
+        return everything, pages
+
+    everything, pages = call_api(main)
+    assert everything.headers["X-Total-Count"] == "5"
+    assert "X-Next-Cursor" not in everything.headers
+    assert [len(page.json()) for page in pages] == [2, 2, 1]
+    assert {page.headers["X-Total-Count"] for page in pages} == {"5"}
+    assert [row for page in pages for row in page.json()] == everything.json()
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_attempts_are_listed_page_by_page(order, monkeypatch, call_api):
+    seconds = count(10)
+    monkeypatch.setattr("backend.app.now_iso", lambda: f"2025-01-05T10:00:{next(seconds)}")
+    attempt = {
+        "sentence_id": "s1",
+        "asr_text": "bonjour",
+        "score": 1,
+        "words_total": 1,
+        "words_correct": 1,
+        "diff_json": [{"op": "match", "ref": "bonjour", "hyp": "bonjour"}],
+        "duration_ms": 800,
+    }
+
+    async def main(client):
+        posted = await client.post("/api/attempts/batch", json=[attempt] * 4)
+        pages = await walk(client, "/api/attempts", {"limit": 3, "order": order})
+        # A full last page still hands out a cursor, which then lists nothing.
+        exact = await walk(client, "/api/attempts", {"limit": 2, "order": order})
+        return posted.json(), pages, exact
+
+    posted, pages, exact = call_api(main)
+    ids = [row["id"] for row in posted]
+    if order == "desc":
+        ids.reverse()
+    assert [row["id"] for page in pages for row in page.json()] == ids
+    assert [len(page.json()) for page in pages] == [3, 1]
+    assert [len(page.json()) for page in exact] == [2, 2, 0]
+    assert all("X-Total-Count" not in page.headers for page in pages)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not-a-cursor",
+        base64.urlsafe_b64encode(b"not json").decode(),
+        base64.urlsafe_b64encode(b'{"created_at": "2025"}').decode(),
+        base64.urlsafe_b64encode(b'["2025-01-01T00:00:00"]').decode(),
+        base64.urlsafe_b64encode(b'["2025-01-01T00:00:00", 1]').decode(),
+    ],
+)
+def test_malformed_cursors_are_rejected(cursor, call_api):
+    async def main(client):
+        return [
+            await client.get(path, params={"cursor": cursor})
+            for path in ("/api/sentences", "/api/attempts")
+        ]
+
+    for response in call_api(main):
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,110 @@
+import time
+
+import pytest
+from fastapi import FastAPI
+
+from backend.csv_store import CSVStore
+from backend.metrics import REGISTRY, Counter, Histogram, MetricsMiddleware, Registry
+from backend.profiling import SlowRequestProfiler
+
+
+def sample(text, line_start):
+    return [line for line in text.splitlines() if line.startswith(line_start)]
+
+
+def get_all(call_api, app, *paths):
+    async def main(client):
+        for path in paths:
+            await client.get(path)
+
+    call_api(main, app)
+
+
+def test_render_counters_and_cumulative_buckets():
+    registry = Registry()
+    counter = Counter("jobs_total", "Jobs done.", ("kind",), registry=registry)
+    histogram = Histogram(
+        "job_seconds", "Job time.", ("kind",), buckets=(0.1, 1), registry=registry
+    )
+    counter.labels('say "hi"\n').inc(2)
+    for value in (0.05, 0.5, 0.5, 3):
+        histogram.labels("x").observe(value)
+
+    text = registry.render()
+    assert "# HELP jobs_total Jobs done." in text
+    assert "# TYPE jobs_total counter" in text
+    assert 'jobs_total{kind="say \\"hi\\"\\n"} 2' in text
+    assert sample(text, "job_seconds_bucket") == [
+        'job_seconds_bucket{kind="x",le="0.1"} 1',
+        'job_seconds_bucket{kind="x",le="1"} 3',
+        'job_seconds_bucket{kind="x",le="+Inf"} 4',
+    ]
+    assert 'job_seconds_sum{kind="x"} 4.05' in text
+    assert 'job_seconds_count{kind="x"} 4' in text
+    with pytest.raises(ValueError):
+        Counter("jobs", "Jobs done.", registry=registry)
+
+
+def test_middleware_labels_requests_by_route_template(call_api):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    during = []
+
+    @app.get("/things/{thing_id}")
+    def get_thing(thing_id: str) -> dict:
+        during.extend(sample(REGISTRY.render(), "ecoute_http_requests_in_flight"))
+        return {"id": thing_id}
+
+    get_all(call_api, app, "/things/a", "/things/b", "/nowhere")
+
+    text = REGISTRY.render()
+    route = 'method="GET",route="/things/{thing_id}"'
+    assert f'ecoute_http_requests_total{{{route},status="200"}} 2' in text
+    assert 'route="unmatched",status="404"}' in text
+    assert f'ecoute_http_request_duration_seconds_count{{{route}}} 2' in text
+    assert f"ecoute_http_requests_in_flight{{{route}}} 1" in during
+    assert f"ecoute_http_requests_in_flight{{{route}}} 0" in text
+    assert 'ecoute_http_requests_in_flight{method="GET",route="unmatched"} 0' in text
+
+
+def test_csv_store_reports_parses_writes_and_rows(tmp_path):
+    path = tmp_path / "metered.csv"
+    store = CSVStore(path, ["id", "text"], journal=True)
+    store.append_many([{"id": "a", "text": "un"}, {"id": "b", "text": "deux"}])
+    store.update("a", {"id": "a", "text": "uno"})
+    CSVStore(path, ["id", "text"], journal=True).read_all()
+
+    text = REGISTRY.render()
+    assert 'ecoute_store_rows{store="metered.csv"} 2' in text
+    assert 'ecoute_store_rows_parsed_total{store="metered.csv"} 3' in text
+    for op in ("append", "journal"):
+        assert f'ecoute_store_write_seconds_count{{store="metered.csv",op="{op}"}} 1' in text
+    assert sample(text, 'ecoute_store_lock_wait_seconds_count{store="metered.csv"}')
+    written = sample(text, 'ecoute_store_bytes_written_total{store="metered.csv"}')
+    # Everything but the header written when the file was created.
+    appended = path.stat().st_size - len("id,text\r\n") + store.journal_path.stat().st_size
+    assert int(written[0].split()[-1]) == appended
+
+
+def test_profiler_dumps_only_slow_requests(tmp_path, call_api):
+    app = FastAPI()
+    app.add_middleware(SlowRequestProfiler, threshold_ms=50, directory=tmp_path)
+
+    @app.get("/fast")
+    def fast() -> dict:
+        return {}
+
+    @app.get("/slow")
+    def slow() -> dict:
+        time.sleep(0.1)
+        return {}
+
+    get_all(call_api, app, "/fast", "/slow")
+
+    names = sorted(path.name for path in tmp_path.iterdir())
+    assert len(names) == 2
+    assert names[0].endswith("ms.prof") and "-GET-slow-" in names[0]
+    summary = (tmp_path / names[1]).read_text(encoding="utf-8")
+    assert summary.startswith("GET /slow took")
+    assert "cumulative" in summary
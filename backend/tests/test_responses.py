@@ -0,0 +1,75 @@
+import json
+
+from backend.responses import AttemptRecord, SentenceRecord
+
+DIFF = [{"op": "sub", "ref": "été", "hyp": "était"}, {"op": "del", "ref": "là", "hyp": None}]
+
+
+def attempt_row(**overrides):
+    row = {
+        "id": "a1",
+        "sentence_id": "s1",
+        "target_lang": "fr-FR",
+        "asr_lang": "",
+        "asr_text": "l'était",
+        "score": "0.5",
+        "words_total": "2",
+        "words_correct": "1",
+        "diff_json": json.dumps(DIFF),
+        "duration_ms": "900",
+        "created_at": "2025-01-01T10:00:00",
+    }
+    row.update(overrides)
+    return row
+
+
+def test_attempt_record_splices_stored_diff():
+    encoded = AttemptRecord(attempt_row()).to_json()
+    assert json.loads(encoded) == {
+        "id": "a1",
+        "sentence_id": "s1",
+        "target_lang": "fr-FR",
+        "asr_lang": "fr-FR",
+        "asr_text": "l'était",
+        "score": 0.5,
+        "words_total": 2,
+        "words_correct": 1,
+        "duration_ms": 900,
+        "created_at": "2025-01-01T10:00:00",
+        "diff_json": DIFF,
+    }
+    assert json.loads(AttemptRecord(attempt_row()).to_json(parse_diff=True))["diff_json"] == DIFF
+
+
+def test_attempt_record_tolerates_bad_diffs():
+    for raw in ("", "not json", '{"op": "sub"}'):
+        record = AttemptRecord(attempt_row(diff_json=raw))
+        assert json.loads(record.to_json())["diff_json"] == []
+        assert json.loads(record.to_json(parse_diff=True))["diff_json"] == []
+
+
+def test_sentence_record_applies_defaults():
+    encoded = SentenceRecord({"id": "s1", "sentence_text": "Bonjour", "created_at": "x"}).to_json()
+    sentence = json.loads(encoded)
+    assert sentence["difficulty"] == "medium"
+    assert sentence["translation_text"] is None
+    assert sentence["created_at"] == "x"
+
+
+def test_listed_diffs_are_the_ones_posted(call_api):
+    diff = DIFF + [{"op": "ins", "ref": None, "hyp": 'dit "oui"'}]
+    attempt = {
+        "sentence_id": "s1",
+        "asr_text": "l'était",
+        "score": 0.5,
+        "words_total": 2,
+        "words_correct": 1,
+        "diff_json": diff,
+        "duration_ms": 900,
+    }
+
+    async def main(client):
+        await client.post("/api/attempts", json=attempt)
+        return (await client.get("/api/attempts")).json()
+
+    assert [item["diff_json"] for item in call_api(main)] == [diff]
@@ -0,0 +1,58 @@
+from backend.scheduler import DAY_SECONDS, Card, ReviewScheduler
+
+
+def attempt(sentence_id, score, created_at, lang="fr-FR"):
+    return {
+        "sentence_id": sentence_id,
+        "target_lang": lang,
+        "score": str(score),
+        "created_at": created_at,
+    }
+
+
+def test_card_intervals_follow_sm2():
+    card = Card()
+    card.review(1.0, 0.0)
+    assert (card.repetitions, card.interval_days, card.due) == (1, 1.0, DAY_SECONDS)
+    card.review(1.0, 0.0)
+    assert card.interval_days == 6.0
+    card.review(1.0, 0.0)
+    assert card.interval_days > 6.0 * 2.5
+    card.review(0.0, 0.0)
+    assert card.repetitions == 0
+    assert card.interval_days < 1.0
+    assert card.ease >= 1.3
+
+
+def test_next_due_orders_overdue_new_then_upcoming():
+    scheduler = ReviewScheduler()
+    scheduler.rebuild(
+        [
+            attempt("good", 1.0, "2025-01-01T10:00:00"),
+            attempt("bad", 0.0, "2025-01-01T10:00:00"),
+            attempt("later", 1.0, "2025-01-01T09:00:00"),
+            attempt("later", 1.0, "2025-01-02T09:00:00"),
+            attempt("gone", 0.0, "2025-01-01T08:00:00"),
+            attempt("other", 0.0, "2025-01-01T10:00:00", lang="es-ES"),
+        ]
+    )
+    live = {"good", "bad", "later", "new1", "new2"}
+    # Two days later: "bad" and "good" are due, "later" (6 days) is not.
+    now = scheduler._cards["fr-FR"]["good"].due + DAY_SECONDS
+
+    def ids(n):
+        picked = scheduler.next_due("fr-FR", n, live.__contains__, ["good", "new1", "new2"], now)
+        return [(sentence_id, card is None) for sentence_id, card in picked]
+
+    assert ids(5) == [
+        ("bad", False),
+        ("good", False),
+        ("new1", True),
+        ("new2", True),
+        ("later", False),
+    ]
+    assert ids(1) == [("bad", False)]
+    assert "gone" not in scheduler._cards["fr-FR"]
+
+    scheduler.add([attempt("bad", 1.0, "2025-01-03T10:00:00")])
+    assert ids(2) == [("good", False), ("new1", True)]
@@ -0,0 +1,189 @@
+import csv
+import threading
+
+import pytest
+
+from backend.csv_store import CSVStore
+from backend.indexes import HashIndex
+from backend.sharded_store import ShardedStore
+
+FIELDS = ["id", "lang", "text", "created_at"]
+
+
+def indexes():
+    return [HashIndex("lang", default="fr"), HashIndex("text")]
+
+
+def make_store(tmp_path, **kwargs):
+    return ShardedStore(
+        tmp_path / "rows",
+        FIELDS,
+        partition_field="lang",
+        partition_default="fr",
+        indexes=indexes,
+        **kwargs,
+    )
+
+
+def row(row_id, lang, created_at, text=""):
+    return {"id": row_id, "lang": lang, "text": text, "created_at": created_at}
+
+
+ROWS = [
+    row("a", "fr", "2025-01-05T10:00:00"),
+    row("b", "en", "2025-01-03T09:00:00"),
+    row("c", "", "2025-02-01T08:00:00", "x"),
+    row("d", "en", "2025-02-10T12:00:00", "x"),
+    row("e", "fr", "2025-03-01T00:00:00"),
+]
+
+
+def ids(rows):
+    return [item["id"] for item in rows]
+
+
+def test_rows_are_sharded_and_read_back_in_order(tmp_path):
+    store = make_store(tmp_path)
+    store.append_many(ROWS)
+
+    assert sorted(store.manifest()) == [
+        "en/2025-01",
+        "en/2025-02",
+        "fr/2025-01",
+        "fr/2025-02",
+        "fr/2025-03",
+    ]
+    assert (tmp_path / "rows" / "fr" / "2025-02.csv").exists()
+    reopened = make_store(tmp_path)
+    assert ids(reopened.select()) == ["b", "a", "c", "d", "e"]
+    assert ids(reopened.select(descending=True)) == ["e", "d", "c", "a", "b"]
+    assert ids(reopened.select(offset=1, limit=2)) == ["a", "c"]
+    assert ids(reopened.select(limit=2, after=["2025-01-05T10:00:00", "a"])) == ["c", "d"]
+    assert ids(reopened.select({"text": "x"}, descending=True)) == ["d", "c"]
+    assert ids(reopened.iter_rows(after=["2025-02"], batch_size=1)) == ["c", "d", "e"]
+    assert ids(reopened.iter_rows(after=["2025-02-01T08:00:00"])) == ["d", "e"]
+    assert ids(reopened.iter_rows(since=["2025-02-01T08:00:00"])) == ["c", "d", "e"]
+    assert ids(reopened.select(since=["2025-02-10T12:00:00"], descending=True)) == ["e", "d"]
+    assert reopened.count({"lang": "fr"}) == 3
+    assert reopened.get("d") == ROWS[3]
+
+
+def test_queries_only_touch_matching_shards(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    store.append_many(ROWS)
+    touched = []
+    select = CSVStore.select
+
+    def spy(self, *args, **kwargs):
+        touched.append(self.path.relative_to(tmp_path / "rows").as_posix())
+        return select(self, *args, **kwargs)
+
+    monkeypatch.setattr(CSVStore, "select", spy)
+    assert ids(store.select({"lang": "en"})) == ["b", "d"]
+    assert sorted(touched) == ["en/2025-01.csv", "en/2025-02.csv"]
+
+    touched.clear()
+    assert ids(store.select({"lang": "fr"}, limit=1, after=["2025-02"])) == ["c"]
+    assert touched == ["fr/2025-02.csv"]
+
+
+def test_older_months_are_sealed_until_written_again(tmp_path):
+    store = make_store(tmp_path)
+    store.append_many(ROWS[:2])
+    assert not any(entry["sealed"] for entry in store.manifest().values())
+
+    store.append(ROWS[2])
+    manifest = store.manifest()
+    assert manifest["fr/2025-01"] == {
+        "partition": "fr",
+        "month": "2025-01",
+        "file": "fr/2025-01.csv",
+        "sealed": True,
+        "rows": 1,
+        "first": "2025-01-05T10:00:00",
+        "last": "2025-01-05T10:00:00",
+    }
+    assert not manifest["fr/2025-02"]["sealed"]
+
+    store.update("a", row("a", "fr", "2025-01-05T10:00:00", "late edit"))
+    assert not store.manifest()["fr/2025-01"]["sealed"]
+    assert make_store(tmp_path).get("a")["text"] == "late edit"
+
+
+def test_update_moves_rows_between_shards(tmp_path):
+    store = make_store(tmp_path)
+    store.append_many(ROWS)
+    assert store.update("a", row("a", "en", "2025-03-02T00:00:00"))
+    assert store.upsert_many([row("b", "fr", "2025-03-03T00:00:00"), row("z", "en", "")]) == (1, 1)
+
+    reopened = make_store(tmp_path)
+    assert ids(reopened.select({"lang": "en"})) == ["z", "d", "a"]
+    assert ids(reopened.select({"lang": "fr"})) == ["c", "e", "b"]
+    assert "en/0000-00" in reopened.manifest()
+    assert reopened.delete("z")
+    assert reopened.count() == 5
+
+
+def test_apply_keeps_other_writers_out_until_it_is_written(tmp_path):
+    store = make_store(tmp_path)
+    other = make_store(tmp_path)
+    store.append_many(ROWS)
+    events = []
+
+    def write_elsewhere():
+        other.append(row("f", "en", "2025-01-04T00:00:00"))
+        events.append("other")
+
+    def plan():
+        writer.start()
+        writer.join(0.2)
+        events.append("planned")
+        return [row("b", "fr", "2025-03-03T00:00:00", "moved")], ["c"]
+
+    writer = threading.Thread(target=write_elsewhere)
+    store.apply(plan)
+    events.append("applied")
+    writer.join()
+
+    assert events == ["planned", "applied", "other"]
+    assert ids(make_store(tmp_path).select()) == ["f", "a", "d", "e", "b"]
+
+
+def test_apply_writes_nothing_when_a_put_has_no_id(tmp_path):
+    store = make_store(tmp_path)
+    store.append_many(ROWS)
+    with pytest.raises(ValueError):
+        store.apply(lambda: ([row("", "fr", "2025-03-03T00:00:00")], ["a"]))
+    assert make_store(tmp_path).count() == 5
+
+
+def test_legacy_file_is_split_once(tmp_path):
+    legacy = tmp_path / "rows.csv"
+    with legacy.open("w", newline="", encoding="utf-8") as fp:
+        writer = csv.DictWriter(fp, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(ROWS)
+
+    assert ids(make_store(tmp_path, legacy=legacy).select()) == ["b", "a", "c", "d", "e"]
+    legacy.write_text("id,lang,text,created_at\n", encoding="utf-8")
+    assert make_store(tmp_path, legacy=legacy).count() == 5
+
+
+def test_listeners_see_rows_from_other_instances(tmp_path):
+    store = make_store(tmp_path)
+    other = make_store(tmp_path)
+    store.append_many(ROWS[:2])
+    seen = []
+    store.subscribe(lambda rows: seen.append(None if rows is None else ids(rows)))
+    store.refresh()
+    assert seen == [None]
+
+    other.append(ROWS[2])  # A new shard.
+    other.append(row("f", "en", "2025-01-04T00:00:00"))  # An existing one.
+    store.refresh()
+    assert sorted(seen[1:]) == [["c"], ["f"]]
+
+    other.delete("f")
+    store.refresh()
+    assert seen[-1] is None
+    assert ids(store.select()) == ["b", "a", "c"]
@@ -0,0 +1,136 @@
+from backend.csv_store import CSVStore
+from backend.indexes import HashIndex, TagIndex, TextIndex
+from backend.sqlite_store import SQLiteStore
+
+FIELDS = ["id", "name"]
+
+
+def make_store(tmp_path, fields=FIELDS, **kwargs):
+    return SQLiteStore(tmp_path / "rows.sqlite3", "rows", fields, **kwargs)
+
+
+def test_append_update_delete_roundtrip(tmp_path):
+    store = make_store(tmp_path)
+    store.append({"id": "a", "name": "alpha"})
+    store.append({"id": "b", "name": "beta"})
+    assert store.update("a", {"id": "a", "name": "ALPHA"})
+    assert store.delete("b")
+    assert not store.delete("missing")
+    assert not store.update("missing", {"id": "missing", "name": ""})
+
+    reopened = make_store(tmp_path)
+    assert reopened.read_all() == [{"id": "a", "name": "ALPHA"}]
+    assert reopened.get("a") == {"id": "a", "name": "ALPHA"}
+    assert reopened.get("b") is None
+    assert reopened.upsert_many([{"id": "a", "name": "A"}, {"id": "c", "name": "gamma"}]) == (1, 1)
+    assert [row["name"] for row in reopened.read_all()] == ["A", "gamma"]
+
+
+def test_apply_reads_and_writes_in_one_transaction(tmp_path):
+    store = make_store(tmp_path)
+    store.append_many([{"id": "a", "name": "alpha"}, {"id": "b", "name": "beta"}])
+    store.apply(lambda: ([{"id": "a", "name": store.get("b")["name"]}, {"id": "c"}], ["b"]))
+    assert make_store(tmp_path).read_all() == [
+        {"id": "a", "name": "beta"},
+        {"id": "c", "name": ""},
+    ]
+
+
+def test_version_changes_on_every_write(tmp_path):
+    store = make_store(tmp_path)
+    initial = store.version()[0]
+    store.append({"id": "a", "name": "alpha"})
+    after_append = store.version()[0]
+    assert after_append != initial
+    assert make_store(tmp_path).version()[0] == after_append
+    store.delete("a")
+    assert store.version()[0] not in (initial, after_append)
+
+
+def test_select_matches_csv_store(tmp_path):
+    fields = ["id", "created_at", "lang", "tags", "sentence_text", "translation_text"]
+    options = dict(
+        indexes=[HashIndex("lang", default="fr"), TagIndex("tags"), TextIndex()],
+        order_by=["created_at", "id"],
+    )
+    csv_store = CSVStore(tmp_path / "rows.csv", fields, **options)
+    sqlite_store = make_store(tmp_path, fields, **options)
+    rows = [
+        ("a", "", "verbe, Grammaire", "L'été est chaud.", "夏天很热。"),
+        ("b", "de", "grammaire", "Il était une fois", ""),
+        ("c", "fr", "voyage", "Le train part", "火车"),
+        ("d", "fr", "grammaire", "Une fois encore", ""),
+    ]
+    for n, (row_id, lang, tags, text, translation) in enumerate(rows):
+        row = {
+            "id": row_id,
+            "created_at": f"2024-01-0{n // 2}",
+            "lang": lang,
+            "tags": tags,
+            "sentence_text": text,
+            "translation_text": translation,
+        }
+        csv_store.append(row)
+        sqlite_store.append(row)
+    updated = dict(csv_store.get("c"), lang="de", sentence_text="Autre chose")
+    for store in (csv_store, sqlite_store):
+        store.update("c", updated)
+        store.delete("d")
+
+    queries = [
+        {},
+        {"lang": "fr"},
+        {"lang": "de", "tag": "GRAMMAIRE"},
+        {"search": "ete"},
+        {"search": "et"},
+        {"search": "夏天"},
+        {"search": "天热"},
+        {"search": "autre"},
+        {"search": "train"},
+        {"search": "!!"},
+        {"tags": "grammaire"},
+        {"unknown": "x"},
+    ]
+    for where in queries:
+        expected = [row["id"] for row in csv_store.select(where)]
+        assert [row["id"] for row in sqlite_store.select(where)] == expected, where
+        assert sqlite_store.count(where) == len(expected)
+    for after in (["2024-01-00", "a"], ["2024-01-00"]):
+        for descending in (False, True):
+            expected = csv_store.select(after=after, descending=descending)
+            assert sqlite_store.select(after=after, descending=descending) == expected
+            expected = csv_store.select(since=after, descending=descending)
+            assert sqlite_store.select(since=after, descending=descending) == expected
+    assert list(sqlite_store.iter_rows(batch_size=1)) == csv_store.read_all()
+
+
+def test_replace_all_resets_side_tables(tmp_path):
+    fields = ["id", "tags", "sentence_text", "translation_text"]
+    store = make_store(tmp_path, fields, indexes=[TagIndex("tags"), TextIndex()])
+    store.append({"id": "a", "tags": "x", "sentence_text": "bonjour"})
+    store.replace_all(iter([{"id": "b", "tags": "y", "sentence_text": "merci"}]))
+    assert store.select({"tag": "x"}) == []
+    assert store.select({"search": "bonjour"}) == []
+    assert [row["id"] for row in store.select({"search": "mer"})] == ["b"]
+
+
+def test_listeners_see_appends_from_other_connections(tmp_path):
+    writer = make_store(tmp_path)
+    reader = make_store(tmp_path)
+    seen = []
+    reader.subscribe(seen.append)
+    reader.refresh()
+    assert seen == [None]
+
+    writer.append_many([{"id": "a", "name": "alpha"}, {"id": "b", "name": "beta"}])
+    reader.refresh()
+    reader.refresh()
+    assert seen[1:] == [[{"id": "a", "name": "alpha"}, {"id": "b", "name": "beta"}]]
+
+    reader.append({"id": "c", "name": "gamma"})
+    assert seen[-1] == [{"id": "c", "name": "gamma"}]
+    writer.delete("a")
+    writer.append({"id": "d", "name": "delta"})
+    reader.refresh()
+    assert seen[-1] is None
+    assert len(seen) == 4
@@ -0,0 +1,51 @@
+import pytest
+
+from backend.stats import AttemptStats
+
+
+def attempt(sentence_id, score, words_total, words_correct, duration_ms, created_at, lang="fr-FR"):
+    return {
+        "sentence_id": sentence_id,
+        "target_lang": lang,
+        "score": str(score),
+        "words_total": str(words_total),
+        "words_correct": str(words_correct),
+        "duration_ms": str(duration_ms),
+        "created_at": created_at,
+    }
+
+
+def test_rollups_by_each_grouping():
+    stats = AttemptStats()
+    stats.rebuild(
+        [
+            attempt("s1", 1.0, 4, 4, 1000, "2025-01-01T10:00:00"),
+            attempt("s1", 0.0, 4, 2, 3000, "2025-01-02T10:00:00"),
+        ]
+    )
+    stats.add([attempt("s2", 1.0, 2, 2, 2000, "2025-01-02T11:00:00", lang="es-ES")])
+    difficulties = {"s1": "hard"}
+
+    def groups(group_by):
+        report = stats.report(group_by, difficulties.get)
+        return {group["key"]: group for group in report["groups"]}
+
+    by_sentence = groups("sentence")
+    assert by_sentence["s1"]["attempts"] == 2
+    assert by_sentence["s1"]["mean_score"] == 0.5
+    assert by_sentence["s1"]["best_score"] == 1.0
+    assert by_sentence["s1"]["word_accuracy"] == 0.75
+    assert by_sentence["s1"]["mean_duration_ms"] == 2000
+    assert sorted(groups("target_lang")) == ["es-ES", "fr-FR"]
+    assert groups("day")["2025-01-02"]["attempts"] == 2
+    assert {key: group["attempts"] for key, group in groups("difficulty").items()} == {
+        "hard": 2,
+        "unknown": 1,
+    }
+
+    totals = stats.report("day", difficulties.get)["totals"]
+    assert totals["attempts"] == 3
+    assert totals["word_accuracy"] == pytest.approx(0.8)
+
+    stats.rebuild([])
+    assert stats.report("sentence", difficulties.get)["groups"] == []
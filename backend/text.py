@@ -0,0 +1,86 @@
+"""Text normalization shared by search and scoring.
+
+``normalize_text`` and ``tokenize`` mirror ``frontend/src/lib/align.ts`` so the
+backend sees the same words the browser scored.
+"""
+
+import re
+import unicodedata
+from typing import List, Tuple
+
+PUNCT_REGEX = re.compile(r"[.,?!;:()\[\]{}\"“”«»]")
+WHITESPACE_REGEX = re.compile(r"\s+")
+CJK_REGEX = re.compile(r"([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+)")
+COMBINING_MARKS = {
+    code: None for code in range(0x10000) if unicodedata.combining(chr(code))
+}
+APOSTROPHE_MAP = {
+    "l": "le",
+    "j": "je",
+    "t": "te",
+    "s": "se",
+    "d": "de",
+    "c": "ce",
+    "m": "me",
+    "n": "ne",
+    "qu": "que",
+    "lorsqu": "lorsque",
+    "puisqu": "puisque",
+    "jusqu": "jusque",
+}
+
+
+def normalize_text(value: str) -> str:
+    value = unicodedata.normalize("NFKC", value).lower().replace("’", "'")
+    return WHITESPACE_REGEX.sub(" ", value).strip()
+
+
+def tokenize(value: str) -> List[str]:
+    normalized = PUNCT_REGEX.sub(" ", normalize_text(value)).replace("-", " ")
+    tokens: List[str] = []
+    for part in WHITESPACE_REGEX.split(normalized):
+        if not part:
+            continue
+        tokens.extend(_split_apostrophes(part))
+    return [token for token in tokens if token]
+
+
+def _split_apostrophes(token: str) -> List[str]:
+    if "'" not in token:
+        return [token]
+    # Same as ``token.split("'", 2)`` in JS: only the first two pieces are kept.
+    parts = token.split("'")
+    prefix, rest = parts[0], parts[1]
+    if not rest:
+        return [token.replace("'", "", 1)]
+    return [APOSTROPHE_MAP.get(prefix, prefix)] + _split_apostrophes(rest)
+
+
+def fold_accents(value: str) -> str:
+    if value.isascii():
+        return value
+    stripped = unicodedata.normalize("NFD", value).translate(COMBINING_MARKS)
+    return unicodedata.normalize("NFC", stripped)
+
+
+def search_pieces(value: str) -> List[Tuple[str, bool]]:
+    """Tokenize and accent-fold ``value`` for search.
+
+    Returns ``(piece, is_cjk)`` pairs: CJK runs are split out of the tokens
+    because those scripts are not space-delimited and get n-gram treatment.
+    """
+    pieces: List[Tuple[str, bool]] = []
+    for token in tokenize(fold_accents(value)):
+        if token.isascii():
+            pieces.append((token, False))
+            continue
+        for piece in CJK_REGEX.split(token):
+            if piece:
+                pieces.append((piece, bool(CJK_REGEX.fullmatch(piece))))
+    return pieces
+
+
+def cjk_ngrams(run: str, unigrams: bool = True) -> List[str]:
+    grams = list(run) if unigrams or len(run) == 1 else []
+    grams.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return grams
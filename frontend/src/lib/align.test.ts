@@ -1,5 +1,6 @@
 import { describe, expect, it } from "vitest";
 import { alignTexts, tokenize } from "./align";
+import fixtures from "./align.fixtures.json";
 
 describe("tokenize", () => {
   it("splits apostrophes into mapped tokens", () => {
@@ -23,3 +24,17 @@ describe("alignTexts", () => {
     expect(ops).toContain("sub");
   });
 });
+
+describe("alignTexts fixtures", () => {
+  // Shared with backend/tests/test_align.py to keep both implementations in sync.
+  it.each(fixtures)("aligns $reference / $hypothesis", ({ reference, hypothesis, expected }) => {
+    const result = alignTexts(reference, hypothesis);
+    expect({
+      diff: result.diff,
+      wordsTotal: result.wordsTotal,
+      wordsCorrect: result.wordsCorrect,
+      referenceTokens: result.referenceTokens,
+      hypothesisTokens: result.hypothesisTokens
+    }).toEqual(expected);
+  });
+});
@@ -1,4 +1,4 @@
-import { Attempt, AttemptCreate, Sentence, SentenceCreate } from "./types";
+import { Attempt, AttemptCreate, PracticeItem, Sentence, SentenceCreate } from "./types";
 
 const API_BASE = "/api";
 
@@ -31,6 +31,61 @@ export interface SentenceQuery {
   search?: string;
   target_lang?: string;
   translation_lang?: string;
+  tag?: string;
+  cursor?: string;
+}
+
+export interface AttemptQuery {
+  limit?: number;
+  cursor?: string;
+  order?: "asc" | "desc";
+}
+
+export interface ImportResult {
+  imported: number;
+  created: number;
+  updated: number;
+  skipped: number;
+  errors: { line: number; error: string }[];
+  duplicates: number;
+  duplicate_rows: { id: string; duplicate_of: string[] }[];
+}
+
+export interface DuplicateCluster {
+  target_lang: string;
+  exact: boolean;
+  similarity: number;
+  sentences: Sentence[];
+}
+
+export interface SentenceFilter {
+  difficulty?: string;
+  target_lang?: string;
+  translation_lang?: string;
+  tag?: string;
+  search?: string;
+}
+
+export type BulkOperation =
+  | { op: "create"; id?: string; sentence: SentenceCreate }
+  | { op: "update"; id?: string; where?: SentenceFilter; changes: Partial<SentenceCreate> }
+  | { op: "delete"; id?: string; where?: SentenceFilter };
+
+export interface BulkReport {
+  applied: boolean;
+  created: number;
+  updated: number;
+  deleted: number;
+  results: { index: number; op: BulkOperation["op"]; ids: string[]; error?: string | null }[];
+}
+
+export interface SentenceDelta {
+  epoch: string;
+  version: number;
+  reset: boolean;
+  fields: (keyof Sentence)[];
+  upserts: (string | null)[][];
+  deleted: string[];
 }
 
 export const api = {
@@ -48,6 +103,28 @@ export const api = {
     });
   },
 
+  async getDuplicates(targetLang = "", near = true): Promise<DuplicateCluster[]> {
+    const search = new URLSearchParams({ near: String(near) });
+    if (targetLang) search.set("target_lang", targetLang);
+    return request<DuplicateCluster[]>(`${API_BASE}/sentences/duplicates?${search}`, {
+      method: "GET"
+    });
+  },
+
+  async bulkSentences(operations: BulkOperation[]): Promise<BulkReport> {
+    return request<BulkReport>(`${API_BASE}/sentences/bulk`, {
+      method: "POST",
+      body: JSON.stringify(operations)
+    });
+  },
+
+  async syncSentences(since = 0, epoch = "", targetLang = ""): Promise<SentenceDelta> {
+    const search = new URLSearchParams({ since: String(since) });
+    if (epoch) search.set("epoch", epoch);
+    if (targetLang) search.set("target_lang", targetLang);
+    return request<SentenceDelta>(`${API_BASE}/sync/sentences?${search}`, { method: "GET" });
+  },
+
   async createSentence(payload: SentenceCreate): Promise<Sentence> {
     return request<Sentence>(`${API_BASE}/sentences`, {
       method: "POST",
@@ -66,10 +143,17 @@ export const api = {
     await request<void>(`${API_BASE}/sentences/${id}`, { method: "DELETE" });
   },
 
-  async getAttempts(sentenceId?: string, targetLang?: string): Promise<Attempt[]> {
+  async getAttempts(
+    sentenceId?: string,
+    targetLang?: string,
+    params: AttemptQuery = {}
+  ): Promise<Attempt[]> {
     const search = new URLSearchParams();
     if (sentenceId) search.set("sentence_id", sentenceId);
     if (targetLang) search.set("target_lang", targetLang);
+    if (params.limit) search.set("limit", String(params.limit));
+    if (params.cursor) search.set("cursor", params.cursor);
+    if (params.order) search.set("order", params.order);
     const suffix = search.toString() ? `?${search.toString()}` : "";
     return request<Attempt[]>(`${API_BASE}/attempts${suffix}`, {
       method: "GET",
@@ -77,6 +161,14 @@ export const api = {
     });
   },
 
+  async getNextPractice(targetLang: string, n = 10): Promise<PracticeItem[]> {
+    const search = new URLSearchParams({ target_lang: targetLang, n: String(n) });
+    return request<PracticeItem[]>(`${API_BASE}/practice/next?${search}`, {
+      method: "GET",
+      headers: { "Content-Type": "application/json" }
+    });
+  },
+
   async createAttempt(payload: AttemptCreate): Promise<Attempt> {
     return request<Attempt>(`${API_BASE}/attempts`, {
       method: "POST",
@@ -84,10 +176,29 @@ export const api = {
     });
   },
 
-  async importSentences(file: File): Promise<{ imported: number }> {
+  /** Live attempts; the browser reconnects on its own and resumes after the last one seen. */
+  streamAttempts(
+    onAttempt: (attempt: Attempt) => void,
+    params: { sentence_id?: string; target_lang?: string } = {}
+  ): () => void {
+    const search = new URLSearchParams();
+    if (params.sentence_id) search.set("sentence_id", params.sentence_id);
+    if (params.target_lang) search.set("target_lang", params.target_lang);
+    const suffix = search.toString() ? `?${search}` : "";
+    const source = new EventSource(`${API_BASE}/attempts/stream${suffix}`);
+    source.addEventListener("attempt", (event) => {
+      onAttempt(JSON.parse((event as MessageEvent<string>).data) as Attempt);
+    });
+    return () => source.close();
+  },
+
+  async importSentences(
+    file: File,
+    mode: "replace" | "upsert" | "append" = "replace"
+  ): Promise<ImportResult> {
     const form = new FormData();
     form.append("file", file, file.name);
-    const response = await fetch(`${API_BASE}/import/sentences`, {
+    const response = await fetch(`${API_BASE}/import/sentences?mode=${mode}`, {
       method: "POST",
       body: form
     });
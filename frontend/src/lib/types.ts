@@ -52,3 +52,11 @@ export interface AttemptCreate {
   diff_json: DiffToken[];
   duration_ms: number;
 }
+
+export interface PracticeItem {
+  sentence: Sentence;
+  new: boolean;
+  due_at?: string | null;
+  interval_days: number;
+  repetitions: number;
+}
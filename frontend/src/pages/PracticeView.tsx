@@ -24,6 +24,8 @@ import {
 import { Attempt, DiffToken, Sentence } from "../lib/types";
 
 const GOOD_THRESHOLD = 0.9;
+const ATTEMPT_HISTORY_LIMIT = 20;
+const PRACTICE_BATCH_SIZE = 10;
 
 export function PracticeView() {
   const [targetLang, setTargetLang] = useState(DEFAULT_TARGET_LANG);
@@ -98,11 +100,16 @@ export function PracticeView() {
     setSelectedVoiceURI(best?.voiceURI ?? null);
   }, [voices, targetLang, selectedVoiceURI]);
 
+  // Next due sentences, as scheduled by the server from the attempt history
+  const loadPracticeQueue = () =>
+    api
+      .getNextPractice(targetLang, PRACTICE_BATCH_SIZE)
+      .then((items) => items.map((item) => item.sentence));
+
   // Fetch sentences when language changes
   useEffect(() => {
     setLoading(true);
-    api
-      .getSentences({ target_lang: targetLang, limit: 200 })
+    loadPracticeQueue()
       .then((data) => {
         setSentences(data);
         setCurrentIndex(0);
@@ -123,8 +130,8 @@ export function PracticeView() {
       return;
     }
     api
-      .getAttempts(sentence.id, targetLang)
-      .then((results) => setAttemptHistory(results.reverse()))
+      .getAttempts(sentence.id, targetLang, { limit: ATTEMPT_HISTORY_LIMIT, order: "desc" })
+      .then((results) => setAttemptHistory(results))
       .catch(() => setAttemptHistory([]));
     setCurrentDiff([]);
     setCurrentScore(null);
@@ -218,7 +225,20 @@ export function PracticeView() {
 
   const handleNext = () => {
     if (!sentences.length) return;
-    setCurrentIndex((prev) => (prev + 1) % sentences.length);
+    if (currentIndex + 1 < sentences.length) {
+      setCurrentIndex(currentIndex + 1);
+      return;
+    }
+    // End of the batch: ask for the next one, which reflects the new attempts.
+    loadPracticeQueue()
+      .then((data) => {
+        if (!data.length) return;
+        setSentences(data);
+        setCurrentIndex(0);
+      })
+      .catch((err) =>
+        setStatus(err instanceof Error ? err.message : "Erreur lors du chargement")
+      );
   };
 
   if (loading) {
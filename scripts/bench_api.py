@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+"""
+Benchmark every API endpoint and store method on synthetic data.
+
+A bank is generated with scripts/gen_synthetic_data.py (in a child process,
+so it does not count towards peak RSS) or copied from --data-dir, then served
+through an in-process ASGI client. Each endpoint is called --requests times
+one after the other for latency percentiles, then --requests times from
+--concurrency tasks for throughput; each store method is timed directly.
+The report is JSON, so two runs can be diffed between commits.
+
+Usage:
+    python3 scripts/bench_api.py --sentences 10k --attempts 100k --output bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import anyio
+import httpx
+from fastapi.routing import APIRoute
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import backend.app as api  # noqa: E402
+from backend.storage import Store  # noqa: E402
+from gen_synthetic_data import parse_count  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+# (method, url, httpx keyword arguments)
+Call = tuple[str, str, dict[str, Any]]
+STREAM_TIMEOUT_S = 30.0
+
+
+def peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def summarize(samples: list[float], elapsed: Optional[float] = None) -> dict[str, float]:
+    """Latency percentiles (ms) of ``samples`` (seconds) and the resulting rate."""
+    ordered = sorted(samples)
+
+    def pick(quantile: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(quantile * len(ordered)))] * 1000, 3)
+
+    total = sum(ordered)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(total / len(ordered) * 1000, 3),
+        "p50_ms": pick(0.5),
+        "p90_ms": pick(0.9),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "ops_per_s": round(len(ordered) / (elapsed or total), 1),
+    }
+
+
+def time_calls(func: Callable[[int], object], count: int) -> dict[str, float]:
+    samples = []
+    for n in range(count):
+        started = time.perf_counter()
+        func(n)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def load_rows(path: Path, limit: int) -> list[dict[str, str]]:
+    with path.open(newline="", encoding="utf-8") as fp:
+        return [row for _, row in zip(range(limit), csv.DictReader(fp))]
+
+
+def attempt_payload(sentence: dict[str, str], n: int) -> dict[str, Any]:
+    words = sentence["sentence_text"].rstrip(".?!").lower().split()
+    heard = words[:-1] if n % 3 == 0 else words
+    return {
+        "sentence_id": sentence["id"],
+        "target_lang": sentence["target_lang"],
+        "asr_lang": sentence["target_lang"],
+        "asr_text": " ".join(heard),
+        "score": 0 if n % 3 == 0 else 1,
+        "words_total": len(words),
+        "words_correct": len(heard),
+        "diff_json": [{"op": "match", "ref": word, "hyp": word} for word in heard],
+        "duration_ms": 1500,
+    }
+
+
+def endpoint_cases(
+    page: httpx.Response,
+    recent: httpx.Response,
+    synced: httpx.Response,
+    sentences: list[dict[str, str]],
+    requests: int,
+) -> list[tuple[str, int, Callable[[int], Call]]]:
+    """``(name, calls per run, build call n)``: reads first, then writes.
+
+    ``page`` is a first ``GET /api/sentences`` response, for its cursor and
+    ETag, ``recent`` the newest attempts (``GET /api/attempts?order=desc``),
+    for a stream to replay what followed its last one, and ``synced`` a first
+    ``GET /api/sync/sentences``, for a delta. ``STREAM`` calls read the
+    ``events`` attempts replayed by ``/api/attempts/stream``, then disconnect.
+    """
+    first = sentences[0]
+    word = first["sentence_text"].split()[0].lower()
+    tag = next((row["tags"].split(",")[0] for row in sentences if row["tags"]), "voyage")
+    cursor = page.headers.get("X-Next-Cursor") or ""
+    etag = page.headers.get("ETag") or ""
+    # The stream replays the attempts newer than the oldest of ``recent``.
+    oldest = recent.headers.get("X-Next-Cursor")
+    replayed = len(recent.json()) - 1 if oldest else 0
+    resume = {"Last-Event-ID": oldest} if oldest else {}
+    version = {"since": synced.json()["version"], "epoch": synced.json()["epoch"]}
+    heavy = max(2, requests // 20)
+    # Every write case gets its own rows: two runs of ``requests`` calls.
+    victims = [row["id"] for row in sentences[-2 * requests :]]
+    upload = io.StringIO()
+    writer = csv.DictWriter(upload, fieldnames=["sentence_text", "target_lang", "tags"])
+    writer.writeheader()
+    writer.writerows(
+        {"sentence_text": row["sentence_text"], "target_lang": row["target_lang"], "tags": "bench"}
+        for row in sentences[:100]
+    )
+    csv_bytes = upload.getvalue().encode("utf-8")
+
+    def pick(n: int) -> dict[str, str]:
+        return sentences[n % len(sentences)]
+
+    def get(url: str, **params: Any) -> Callable[[int], Call]:
+        return lambda n: ("GET", url, {"params": params})
+
+    cases: list[tuple[str, int, Callable[[int], Call]]] = [
+        ("GET /api/sentences", requests, get("/api/sentences", limit=100)),
+        ("GET /api/sentences?total", requests, get("/api/sentences", limit=100, total=True)),
+        (
+            "GET /api/sentences?filters",
+            requests,
+            get(
+                "/api/sentences",
+                target_lang=first["target_lang"],
+                difficulty=first["difficulty"],
+                tag=tag,
+            ),
+        ),
+        ("GET /api/sentences?search", requests, get("/api/sentences", search=word)),
+        ("GET /api/sentences?cursor", requests, get("/api/sentences", cursor=cursor)),
+        (
+            "GET /api/sentences (304)",
+            requests,
+            lambda n: (
+                "GET",
+                "/api/sentences",
+                {"params": {"limit": 100}, "headers": {"If-None-Match": etag}},
+            ),
+        ),
+        ("GET /api/export/sentences", heavy, get("/api/export/sentences")),
+        (
+            "GET /api/practice/next",
+            requests,
+            lambda n: (
+                "GET",
+                "/api/practice/next",
+                {"params": {"target_lang": pick(n)["target_lang"], "n": 10}},
+            ),
+        ),
+        ("GET /api/attempts", requests, get("/api/attempts", limit=100)),
+        ("GET /api/attempts?desc", requests, get("/api/attempts", limit=100, order="desc")),
+        (
+            "GET /api/attempts?parse_diff",
+            requests,
+            get("/api/attempts", limit=100, parse_diff=True),
+        ),
+        (
+            "GET /api/attempts?sentence_id",
+            requests,
+            lambda n: ("GET", "/api/attempts", {"params": {"sentence_id": pick(n)["id"]}}),
+        ),
+        ("GET /api/export/attempts", heavy, get("/api/export/attempts")),
+        (
+            f"GET /api/attempts/stream (replay {replayed})",
+            requests,
+            lambda n: (
+                "STREAM",
+                "/api/attempts/stream",
+                {"headers": resume, "events": replayed},
+            ),
+        ),
+        ("GET /api/sentences/duplicates", requests, get("/api/sentences/duplicates")),
+        ("GET /api/sync/sentences", heavy, get("/api/sync/sentences")),
+        ("GET /api/sync/sentences?since", requests, get("/api/sync/sentences", **version)),
+        ("GET /metrics", requests, get("/metrics")),
+    ]
+    for group_by in ("sentence", "target_lang", "difficulty", "day"):
+        cases.append(
+            (f"GET /api/stats?group_by={group_by}", requests, get("/api/stats", group_by=group_by))
+        )
+
+    def rescore(n: int) -> Call:
+        items = [
+            {"reference": row["sentence_text"], "asr_text": row["sentence_text"][3:]}
+            for row in sentences[n % 50 : n % 50 + 20]
+        ]
+        return "POST", "/api/attempts/rescore", {"json": {"items": items}}
+
+    def create_sentence(n: int) -> Call:
+        payload = {
+            "sentence_text": f"Phrase de test {n}.",
+            "target_lang": "fr-FR",
+            "translation_lang": "zh-CN",
+            "tags": "bench",
+        }
+        return "POST", "/api/sentences", {"json": payload}
+
+    def bulk(n: int) -> Call:
+        operations = [
+            {"op": "update", "id": pick(n + k)["id"], "changes": {"tags": f"bench,{n}"}}
+            for k in range(20)
+        ]
+        return "POST", "/api/sentences/bulk", {"json": operations}
+
+    def import_sentences(n: int) -> Call:
+        files = {"file": ("bench.csv", csv_bytes, "text/csv")}
+        return "POST", "/api/import/sentences", {"params": {"mode": "append"}, "files": files}
+
+    cases += [
+        (
+            "GET /api/analytics/words",
+            requests,
+            lambda n: (
+                "GET", "/api/analytics/words", {"params": {"target_lang": pick(n)["target_lang"]}}
+            ),
+        ),
+        ("POST /api/attempts/rescore", requests, rescore),
+        ("POST /api/sentences", requests, create_sentence),
+        (
+            "PUT /api/sentences/{id}",
+            requests,
+            lambda n: (
+                "PUT",
+                f"/api/sentences/{pick(n)['id']}",
+                {"json": {"difficulty": ("easy", "medium", "hard")[n % 3]}},
+            ),
+        ),
+        (
+            "POST /api/attempts",
+            requests,
+            lambda n: ("POST", "/api/attempts", {"json": attempt_payload(pick(n), n)}),
+        ),
+        (
+            "POST /api/attempts/batch",
+            requests,
+            lambda n: (
+                "POST",
+                "/api/attempts/batch",
+                {"json": [attempt_payload(pick(n + k), k) for k in range(50)]},
+            ),
+        ),
+        ("POST /api/sentences/bulk", requests, bulk),
+        ("POST /api/import/sentences?mode=append", heavy, import_sentences),
+        (
+            "DELETE /api/sentences/{id}",
+            min(requests, len(victims) // 2),
+            lambda n: ("DELETE", f"/api/sentences/{victims[n % len(victims)]}", {}),
+        ),
+    ]
+    return cases
+
+
+async def bench_endpoints(
+    app: Any, sentences: list[dict[str, str]], requests: int, concurrency: int
+) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        page = await client.get("/api/sentences", params={"limit": 100})
+        recent = await client.get("/api/attempts", params={"limit": 100, "order": "desc"})
+        synced = await client.get("/api/sync/sentences")
+        cases = endpoint_cases(page, recent, synced, sentences, requests)
+        for route in uncovered_routes(app, cases):
+            print(f"  no benchmark case for {route}", file=sys.stderr)
+        for name, count, build in cases:
+            errors = 0
+
+            async def call(n: int) -> float:
+                nonlocal errors
+                method, url, kwargs = build(n)
+                started = time.perf_counter()
+                if method == "STREAM":
+                    status = await read_stream(app, url, **kwargs)
+                else:
+                    status = (await client.request(method, url, **kwargs)).status_code
+                elapsed = time.perf_counter() - started
+                if status >= 400:
+                    errors += 1
+                return elapsed
+
+            latency = [await call(n) for n in range(count)]
+            pending = iter(range(count, 2 * count))
+            loaded: list[float] = []
+
+            async def worker() -> None:
+                for n in pending:
+                    loaded.append(await call(n))
+
+            started = time.perf_counter()
+            async with anyio.create_task_group() as group:
+                for _ in range(concurrency):
+                    group.start_soon(worker)
+            elapsed = time.perf_counter() - started
+            results[name] = {
+                "latency": summarize(latency),
+                "throughput": summarize(loaded, elapsed),
+                "errors": errors,
+            }
+            p50 = results[name]["latency"]["p50_ms"]
+            print(f"  {name:45s} p50 {p50:8.2f} ms", file=sys.stderr)
+    return results
+
+
+def uncovered_routes(app: Any, cases: list[tuple[str, int, Callable[[int], Call]]]) -> list[str]:
+    """The app's API routes that no case calls, as ``"METHOD /path"``."""
+    calls = [build(0)[:2] for _, _, build in cases]
+    calls = [("GET" if method == "STREAM" else method, url) for method, url in calls]
+    missing = []
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        for method in sorted(route.methods):
+            if not any(
+                method == called and route.path_regex.match(url) for called, url in calls
+            ):
+                missing.append(f"{method} {route.path}")
+    return missing
+
+
+async def read_stream(app: Any, url: str, headers: dict[str, str], events: int) -> int:
+    """Read ``events`` events from a Server-Sent Events endpoint, then disconnect.
+
+    Called on the ASGI app directly: the httpx transport would wait for the
+    end of a response that never ends. Returns the status code, 504 when the
+    events do not all come within STREAM_TIMEOUT_S.
+    """
+    done = anyio.Event()
+    status, received = 0, 0
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive() -> dict[str, Any]:
+        if requests:
+            return requests.pop()
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status, received
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            if status >= 400:
+                done.set()
+            return
+        received += message.get("body", b"").count(b"\nevent: ")
+        if received >= events or not message.get("more_body", False):
+            done.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": url,
+        "raw_path": url.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")]
+        + [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    with anyio.move_on_after(STREAM_TIMEOUT_S) as timeout:
+        await app(scope, receive, send)
+    return 504 if timeout.cancelled_caught else status
+
+
+def bench_store(store: Store, requests: int) -> dict[str, Any]:
+    """Time each store method on a store opened over the benchmark data."""
+    sample = store.select(limit=max(requests, 100))
+    ids = [row["id"] for row in sample]
+    text = sample[0].get("sentence_text") or sample[0].get("asr_text") or "a"
+    word = text.split()[0].lower()
+    lang = sample[0]["target_lang"]
+    after = [sample[-1][field] for field in store.order_by] if store.order_by else None
+    heavy = max(2, requests // 20)
+    stamp = datetime.now().isoformat(timespec="seconds")
+
+    def fresh(n: int, k: int = 0) -> dict[str, str]:
+        return dict(sample[(n + k) % len(sample)], id=f"bench-{n}-{k}", created_at=stamp)
+
+    def batch(n: int) -> list[dict[str, str]]:
+        return [fresh(n, k) for k in range(1, 101)]
+
+    methods: list[tuple[str, int, Callable[[int], object]]] = [
+        ("read_all", heavy, lambda n: store.read_all()),
+        ("iter_rows", heavy, lambda n: sum(1 for _ in store.iter_rows())),
+        ("get", requests, lambda n: store.get(ids[n % len(ids)])),
+        ("select", requests, lambda n: store.select(limit=100)),
+        ("select(where)", requests, lambda n: store.select({"target_lang": lang}, limit=100)),
+        ("select(after)", requests, lambda n: store.select(limit=100, after=after)),
+        ("select(descending)", requests, lambda n: store.select(limit=100, descending=True)),
+        ("count", requests, lambda n: store.count()),
+        ("count(where)", requests, lambda n: store.count({"target_lang": lang})),
+        ("version", requests, lambda n: store.version()),
+        ("refresh", requests, lambda n: store.refresh()),
+        ("append", requests, lambda n: store.append(fresh(n))),
+        ("append_many(100)", heavy, lambda n: store.append_many(batch(n))),
+        ("upsert_many(100)", heavy, lambda n: store.upsert_many(batch(n))),
+        ("update", requests, lambda n: store.update(f"bench-{n}-0", fresh(n))),
+        ("delete", requests, lambda n: store.delete(f"bench-{n}-0")),
+    ]
+    if "search" in getattr(store, "indexes", {}):
+        methods.append(
+            ("select(search)", requests, lambda n: store.select({"search": word}, limit=100))
+        )
+    if hasattr(store, "compact"):
+        methods.append(("compact", heavy, lambda n: store.compact()))
+    rows = store.read_all()
+    methods.append(("replace_all", heavy, lambda n: store.replace_all(rows)))
+
+    results = {}
+    for name, count, func in methods:
+        results[name] = time_calls(func, count)
+        print(f"  {name:45s} p50 {results[name]['p50_ms']:8.3f} ms", file=sys.stderr)
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sentences", type=parse_count, default=parse_count("2k"))
+    parser.add_argument("--attempts", type=parse_count, default=parse_count("20k"))
+    parser.add_argument("--langs", default="fr-FR,en-US,es-ES,de-DE")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", type=Path, help="reuse generated data (copied first)")
+    parser.add_argument("--backend", choices=("csv", "sqlite"), default="csv")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--output", type=Path, help="write the JSON report here (default stdout)")
+    args = parser.parse_args()
+
+    report: dict[str, Any] = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "setup": {},
+        "peak_rss_bytes": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        started = time.perf_counter()
+        if args.data_dir:
+            for name in ("sentences.csv", "attempts.csv"):
+                shutil.copy(args.data_dir / name, data_dir / name)
+        else:
+            subprocess.run(
+                [sys.executable, str(Path(__file__).with_name("gen_synthetic_data.py")),
+                 "--out", str(data_dir), "--sentences", str(args.sentences),
+                 "--attempts", str(args.attempts), "--langs", args.langs,
+                 "--seed", str(args.seed)],
+                check=True,
+                stdout=sys.stderr,
+            )
+        report["setup"]["generate_s"] = round(time.perf_counter() - started, 3)
+        sentences = load_rows(data_dir / "sentences.csv", 1000)
+        report["meta"]["sentences"] = sum(1 for _ in open(data_dir / "sentences.csv", "rb")) - 1
+        report["meta"]["attempts"] = sum(1 for _ in open(data_dir / "attempts.csv", "rb")) - 1
+
+        if args.backend == "sqlite":
+            started = time.perf_counter()
+            sources = api.open_stores("csv", data_dir)
+            for source, target in zip(sources, api.open_stores("sqlite", data_dir)):
+                target.replace_all(source.iter_rows())
+            report["setup"]["migrate_s"] = round(time.perf_counter() - started, 3)
+
+        os.environ[api.STORAGE_ENV] = args.backend
+        os.environ[api.DATA_DIR_ENV] = str(data_dir)
+        started = time.perf_counter()
+        app = api.create_app()
+        report["setup"]["startup_s"] = round(time.perf_counter() - started, 3)
+        report["peak_rss_bytes"]["startup"] = peak_rss_bytes()
+
+        print("endpoints:", file=sys.stderr)
+        report["endpoints"] = anyio.run(
+            bench_endpoints, app, sentences, args.requests, args.concurrency
+        )
+        report["peak_rss_bytes"]["endpoints"] = peak_rss_bytes()
+
+        print("store:", file=sys.stderr)
+        report["store"] = {}
+        for name, store in zip(("sentences", "attempts"), api.open_stores(args.backend, data_dir)):
+            report["store"][name] = bench_store(store, args.requests)
+        report["peak_rss_bytes"]["store"] = peak_rss_bytes()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
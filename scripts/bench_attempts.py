@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Measure attempts/sec for concurrent CSVStore appends, with and without group commit.
+
+Usage:
+    python3 scripts/bench_attempts.py [--threads 32] [--per-thread 50] [--window-ms 2]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from uuid import uuid4
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from backend.app import ATTEMPT_FIELDS  # noqa: E402
+from backend.csv_store import CSVStore  # noqa: E402
+
+
+def make_row() -> dict[str, str]:
+    return {
+        "id": str(uuid4()),
+        "sentence_id": str(uuid4()),
+        "target_lang": "fr-FR",
+        "asr_lang": "fr-FR",
+        "asr_text": "bonjour tout le monde",
+        "score": "1.0",
+        "words_total": "4",
+        "words_correct": "4",
+        "diff_json": "[]",
+        "duration_ms": "1200",
+        "created_at": "2025-01-01T00:00:00",
+    }
+
+
+def run(threads: int, per_thread: int, window: float) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CSVStore(Path(tmp) / "attempts.csv", ATTEMPT_FIELDS, group_commit_window=window)
+
+        def worker() -> None:
+            for _ in range(per_thread):
+                store.append(make_row())
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        start = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    return threads * per_thread / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--per-thread", type=int, default=50)
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    direct = run(args.threads, args.per_thread, 0.0)
+    grouped = run(args.threads, args.per_thread, args.window_ms / 1000)
+    print(f"direct appends : {direct:8.0f} attempts/sec")
+    print(f"group commit   : {grouped:8.0f} attempts/sec ({args.window_ms:g} ms window)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic sentence bank and attempt log for benchmarks.
+
+Rows are written straight to CSV in the stores' column layout, so the output
+directory can be served with ECOUTE_DATA_DIR=<dir>. Counts accept k/M
+suffixes (10k, 1M) and the output is deterministic for a given --seed.
+
+Usage:
+    python3 scripts/gen_synthetic_data.py --out /tmp/bank --sentences 10k --attempts 1M
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+from pathlib import Path
+from typing import Iterator, Sequence
+from uuid import UUID
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from backend.align import GOOD_THRESHOLD  # noqa: E402
+from backend.app import ATTEMPT_FIELDS, SENTENCE_FIELDS  # noqa: E402
+from backend.text import tokenize  # noqa: E402
+
+VOCABULARY = {
+    "fr-FR": (
+        "je tu il elle nous vous ils le la les un une des de du au et mais ou donc "
+        "est suis sont avons avez fait va vais veux peux dois aime mange bois "
+        "prends parle habite travaille cherche trouve maison voiture train gare "
+        "café pain eau livre école ville rue marché ami amie famille enfant "
+        "demain hier aujourd'hui toujours souvent jamais très trop bien mal "
+        "petit grand nouveau vieux beau chaud froid rapide lentement ici là"
+    ).split(),
+    "en-US": (
+        "i you he she we they the a an of to in on at and but or so is am are "
+        "was were have has do does will can must like eat drink take speak live "
+        "work look find house car train station coffee bread water book school "
+        "city street market friend family child tomorrow yesterday today always "
+        "often never very too well badly small big new old nice hot cold fast "
+        "slowly here there"
+    ).split(),
+    "es-ES": (
+        "yo tú él ella nosotros vosotros ellos el la los las un una de del al y "
+        "pero o es soy son somos hace voy quiero puedo debo me gusta como bebo "
+        "tomo hablo vivo trabajo busco encuentro casa coche tren estación café "
+        "pan agua libro escuela ciudad calle mercado amigo amiga familia niño "
+        "mañana ayer hoy siempre a menudo nunca muy demasiado bien mal pequeño "
+        "grande nuevo viejo bonito caliente frío rápido despacio aquí allí"
+    ).split(),
+    "de-DE": (
+        "ich du er sie wir ihr der die das ein eine den dem und aber oder also "
+        "ist bin sind haben hat macht gehe will kann muss mag esse trinke nehme "
+        "spreche wohne arbeite suche finde haus auto zug bahnhof kaffee brot "
+        "wasser buch schule stadt straße markt freund freundin familie kind "
+        "morgen gestern heute immer oft nie sehr zu gut schlecht klein groß neu "
+        "alt schön heiß kalt schnell langsam hier dort"
+    ).split(),
+}
+TRANSLATION_CHARS = (
+    "我你他她们的是不了在有这个人来到去说要会能好吃喝"
+    "看听写读学家车站水面包书校城街市朋友孩子"
+    "明天昨今总常从很太大小新老热冷快慢这里那"
+)
+TAGS = (
+    "salutation voyage restaurant travail famille maison ville temps "
+    "grammaire verbe question négation passé futur achats santé loisirs"
+).split()
+DIFFICULTIES = ("easy", "medium", "hard")
+# Chance that a reference word comes back wrong, by difficulty.
+ERROR_RATES = {"easy": 0.04, "medium": 0.1, "hard": 0.2}
+
+
+def parse_count(value: str) -> int:
+    """``"10k"`` -> 10_000, ``"1.5M"`` -> 1_500_000."""
+    value = value.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    if scale > 1:
+        value = value[:-1]
+    return int(float(value) * scale)
+
+
+def make_id(rng: random.Random) -> str:
+    return str(UUID(int=rng.getrandbits(128), version=4))
+
+
+def iter_sentences(
+    count: int, langs: Sequence[str], seed: int = 0, days: int = 365
+) -> Iterator[dict[str, str]]:
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    step = days * 86400 / max(count, 1)
+    for n in range(count):
+        lang = langs[n % len(langs)]
+        length = rng.randint(3, 16)
+        words = rng.choices(VOCABULARY[lang], k=length)
+        text = " ".join(words).capitalize() + rng.choice(".....?!")
+        translation = "".join(rng.choices(TRANSLATION_CHARS, k=length + rng.randint(0, 4)))
+        timestamp = (start + timedelta(seconds=n * step)).isoformat(timespec="seconds")
+        yield {
+            "id": make_id(rng),
+            "target_lang": lang,
+            "sentence_text": text,
+            "translation_lang": "zh-CN",
+            "translation_text": translation + "。",
+            "difficulty": DIFFICULTIES[min(2, length // 6)],
+            "tags": ",".join(rng.sample(TAGS, rng.randint(0, 3))),
+            "created_at": timestamp,
+            "updated_at": timestamp,
+        }
+
+
+def iter_attempts(
+    sentences: Sequence[dict[str, str]], count: int, seed: int = 0, days: int = 365
+) -> Iterator[dict[str, str]]:
+    """Attempts on ``sentences``, oldest first, a few sentences practised far more.
+
+    Each attempt's transcript is the reference with substituted, dropped and
+    inserted words; ``diff_json`` is built from those edits (the way the
+    aligner would report them) rather than by re-aligning, which keeps
+    millions of rows quick to generate.
+    """
+    if not sentences:
+        return
+    rng = random.Random(seed + 1)
+    start = datetime(2025, 1, 1)
+    step = days * 86400 / max(count, 1)
+    ranks = rng.sample(range(len(sentences)), len(sentences))
+    cum_weights = list(accumulate(1 / (rank + 1) ** 0.8 for rank in ranks))
+    tokens: dict[str, list[str]] = {}
+    for n in range(count):
+        sentence = rng.choices(sentences, cum_weights=cum_weights)[0]
+        reference = tokens.get(sentence["id"])
+        if reference is None:
+            reference = tokens[sentence["id"]] = tokenize(sentence["sentence_text"])
+        vocabulary = VOCABULARY.get(sentence["target_lang"]) or VOCABULARY["fr-FR"]
+        rate = ERROR_RATES.get(sentence["difficulty"], 0.1)
+        diff = []
+        hypothesis = []
+        for word in reference:
+            roll = rng.random()
+            if roll >= rate:
+                diff.append({"op": "match", "ref": word, "hyp": word})
+                hypothesis.append(word)
+            elif roll < rate * 0.6:
+                heard = rng.choice(vocabulary)
+                diff.append({"op": "sub", "ref": word, "hyp": heard})
+                hypothesis.append(heard)
+            elif roll < rate * 0.9:
+                diff.append({"op": "del", "ref": word, "hyp": None})
+            else:
+                heard = rng.choice(vocabulary)
+                diff += [
+                    {"op": "match", "ref": word, "hyp": word},
+                    {"op": "ins", "ref": None, "hyp": heard},
+                ]
+                hypothesis += [word, heard]
+        correct = sum(token["op"] == "match" for token in diff)
+        total = len(reference)
+        lang = sentence["target_lang"]
+        yield {
+            "id": make_id(rng),
+            "sentence_id": sentence["id"],
+            "target_lang": lang,
+            "asr_lang": lang,
+            "asr_text": " ".join(hypothesis),
+            "score": "1" if correct / (total or 1) >= GOOD_THRESHOLD else "0",
+            "words_total": str(total),
+            "words_correct": str(correct),
+            "diff_json": json.dumps(diff, ensure_ascii=False, separators=(",", ":")),
+            "duration_ms": str(int(total * rng.uniform(250, 600))),
+            "created_at": (start + timedelta(seconds=n * step)).isoformat(timespec="seconds"),
+        }
+
+
+def write_csv(path: Path, fieldnames: list[str], rows: Iterator[dict[str, str]]) -> int:
+    written = 0
+    with path.open("w", newline="", encoding="utf-8") as fp:
+        writer = csv.DictWriter(fp, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            written += 1
+    return written
+
+
+def generate(
+    out: Path, sentences: int, attempts: int, langs: Sequence[str], seed: int = 0
+) -> tuple[int, int]:
+    """Write ``sentences.csv`` and ``attempts.csv`` under ``out``."""
+    out.mkdir(parents=True, exist_ok=True)
+    bank = list(iter_sentences(sentences, langs, seed))
+    write_csv(out / "sentences.csv", SENTENCE_FIELDS, iter(bank))
+    written = write_csv(out / "attempts.csv", ATTEMPT_FIELDS, iter_attempts(bank, attempts, seed))
+    return len(bank), written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--sentences", type=parse_count, default=parse_count("1k"))
+    parser.add_argument("--attempts", type=parse_count, default=parse_count("10k"))
+    parser.add_argument("--langs", default=",".join(VOCABULARY))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    langs = [lang for lang in args.langs.split(",") if lang]
+    unknown = [lang for lang in langs if lang not in VOCABULARY]
+    if unknown:
+        parser.error(f"no vocabulary for {', '.join(unknown)}")
+    started = time.perf_counter()
+    sentences, attempts = generate(args.out, args.sentences, args.attempts, langs, args.seed)
+    elapsed = time.perf_counter() - started
+    print(f"{sentences} sentences, {attempts} attempts in {args.out} ({elapsed:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Copy data/sentences.csv and data/attempts.csv (journals replayed) into the SQLite store.
+
+Existing rows in the SQLite tables are replaced. Start the API with
+ECOUTE_STORAGE_BACKEND=sqlite afterwards to serve from the database.
+
+Usage:
+    python3 scripts/migrate_csv_to_sqlite.py
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from backend.app import SQLITE_PATH, open_stores  # noqa: E402
+
+
+def main() -> None:
+    sources = open_stores("csv")
+    targets = open_stores("sqlite")
+    for name, source, target in zip(("sentences", "attempts"), sources, targets):
+        target.replace_all(source.iter_rows())
+        print(f"{name:10s}: {target.count()} rows")
+    print(f"Wrote {SQLITE_PATH}")
+
+
+if __name__ == "__main__":
+    main()